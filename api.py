@@ -0,0 +1,330 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from PIL import Image
+
+from models.menu_pipeline import (
+    convert_menu_image_fast,
+    extract_menu_text_async,
+    get_pipeline_executors,
+    process_menu_document_async,
+    process_menu_image_async,
+    run_menu_pipeline,
+    structure_menu_text_async,
+    translate_menu_text_async
+)
+from models.text_processor import process_menu_text_stream
+from models.braille_translator import text_to_grade1_braille
+from utils.pdf_generator import PDF_LAYOUTS, PdfRenderer
+from utils.brf_generator import write_brf
+from utils.artifact_store import artifact_key, safe_filename, store_artifact
+from utils.metrics import get_metrics
+from utils.profiling import profile_call, run_profiled_coroutine, sample_profile
+
+# API limits and server settings (can be overridden with environment variables)
+MAX_REQUEST_BYTES = int(os.environ.get("API_MAX_REQUEST_BYTES", 10 * 1024 * 1024))
+MAX_TEXT_CHARS = int(os.environ.get("API_MAX_TEXT_CHARS", 20000))
+API_HOST = os.environ.get("API_HOST", "0.0.0.0")
+API_PORT = int(os.environ.get("API_PORT", 8000))
+API_WORKERS = int(os.environ.get("API_WORKERS", 1))
+API_KEEP_ALIVE_SECONDS = int(os.environ.get("API_KEEP_ALIVE", 30))
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_bytes with 413.
+
+    Checks the Content-Length header up front and counts the bytes of
+    chunked bodies as they arrive, so an oversized upload is never read
+    into memory in full.
+    """
+
+    def __init__(self, app, max_bytes=MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope['headers']).get(b'content-length', b'0')
+        if not content_length.isdigit():
+            response = JSONResponse({'detail': "Invalid Content-Length header"}, status_code=400)
+            await response(scope, receive, send)
+            return
+        if int(content_length) > self.max_bytes:
+            response = JSONResponse({'detail': f"Request body is larger than {self.max_bytes} bytes"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Request body is larger than {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class MenuTextRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=MAX_TEXT_CHARS)
+    use_llm: bool = True
+    use_context: bool = True
+    profile: bool = False
+
+
+class DocumentRequest(BaseModel):
+    original_text: str = Field(..., min_length=1, max_length=MAX_TEXT_CHARS)
+    braille_text: Optional[str] = Field(None, max_length=4 * MAX_TEXT_CHARS)
+    title: str = Field("Menu in Braille", max_length=200)
+    layout: str = "sequential"
+    tactile: bool = False
+    profile: bool = False
+
+
+app = FastAPI(title="Menu to Braille API")
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES)
+
+
+async def read_upload_image(image):
+    """Decode an uploaded image, answering 400 if it isn't one."""
+    data = await image.read()
+    try:
+        return Image.open(io.BytesIO(data)).convert("RGB")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read image: {str(e)}")
+
+
+def menu_response(result):
+    """Turn a pipeline result into a JSON response."""
+    if not result['success']:
+        # The request was well-formed, but the menu could not be converted
+        return JSONResponse(result, status_code=422)
+    return result
+
+
+@app.get("/health")
+async def health():
+    """Report that the server is up; models load on the first request."""
+    return {'status': 'ok'}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Export per-stage latency, CPU time, memory growth and errors for Prometheus."""
+    return PlainTextResponse(
+        get_metrics().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.post("/v1/menus/image")
+async def convert_menu_image(
+    image: UploadFile = File(...),
+    use_llm: bool = Form(True),
+    use_context: bool = Form(True),
+    menu_id: Optional[str] = Form(None),
+    profile: bool = Form(False)
+):
+    """Convert an uploaded menu image to Braille."""
+    pil_image = await read_upload_image(image)
+    menu_id = (menu_id or '').strip() or None
+    if sample_profile(profile):
+        # Profiled runs do their work inline, so they are kept off the event loop
+        result = await run_in_threadpool(run_menu_pipeline, pil_image, use_llm, use_context, menu_id, True)
+    elif not use_llm and not use_context:
+        # OCR and translation only; the lightweight mode runs on one worker thread
+        result = await run_in_threadpool(convert_menu_image_fast, pil_image)
+    else:
+        result = await process_menu_image_async(pil_image, use_llm, use_context, menu_id)
+    return menu_response(result)
+
+
+@app.post("/v1/menus/document")
+async def convert_menu_document(
+    files: List[UploadFile] = File(...),
+    use_llm: bool = Form(True),
+    use_context: bool = Form(True)
+):
+    """Convert a multi-page menu, given as PDFs and/or page images in reading order."""
+    # OCR workers read the pages from disk, one page at a time
+    with tempfile.TemporaryDirectory(prefix="braille_menu_upload_") as upload_dir:
+        paths = []
+        for index, upload in enumerate(files):
+            path = os.path.join(upload_dir, f"{index:04d}")
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(upload.file, f)
+            paths.append(path)
+
+        result = await process_menu_document_async(paths, use_llm, use_context)
+    return menu_response(result)
+
+
+async def convert_text(text, use_llm, use_context):
+    """Structure and translate menu text."""
+    trace = []
+    processed_text = await structure_menu_text_async(text, use_llm, None, trace)
+    braille_result, metadata = await translate_menu_text_async(processed_text, use_context, trace)
+
+    if not braille_result['success']:
+        return {
+            'raw_text': text,
+            'processed_text': processed_text,
+            'error': "Braille translation failed.",
+            'trace': trace,
+            'success': False
+        }
+
+    return {
+        'raw_text': text,
+        'processed_text': processed_text,
+        'braille_text': braille_result['formatted_braille'],
+        'metadata': metadata,
+        'trace': trace,
+        'success': True
+    }
+
+
+@app.post("/v1/menus/text")
+async def convert_menu_text(request: MenuTextRequest):
+    """Convert menu text, e.g. from another OCR system, to Braille."""
+    if sample_profile(request.profile):
+        result = await run_in_threadpool(
+            run_profiled_coroutine, "process_text", convert_text, request.text, request.use_llm, request.use_context
+        )
+    else:
+        result = await convert_text(request.text, request.use_llm, request.use_context)
+    return menu_response(result)
+
+
+@app.post("/v1/menus/image/stream")
+async def stream_menu_image(
+    image: UploadFile = File(...),
+    use_llm: bool = Form(True),
+    use_context: bool = Form(True)
+):
+    """
+    Convert an uploaded menu image, streaming progress as JSON lines.
+
+    Emits one event with the OCR text, events with the partially
+    structured text while the LLM runs, and a final event with the full
+    result.
+    """
+    pil_image = await read_upload_image(image)
+
+    async def events():
+        try:
+            raw_text = await extract_menu_text_async(pil_image)
+            if not raw_text:
+                yield json.dumps({'stage': 'done', 'error': "No text was extracted from the image.", 'success': False}) + "\n"
+                return
+            yield json.dumps({'stage': 'ocr', 'text': raw_text}) + "\n"
+
+            processed_text = raw_text
+            if use_llm:
+                # Generation runs on the model worker; the streamer blocks between
+                # tokens, so it is consumed on a threadpool thread
+                _, _, model_executor = get_pipeline_executors()
+                stream = process_menu_text_stream(raw_text, executor=model_executor)
+                async for processed_result in iterate_in_threadpool(stream):
+                    if not processed_result['done']:
+                        yield json.dumps({'stage': 'structuring', 'text': processed_result['structured_text']}) + "\n"
+                    elif processed_result['success']:
+                        processed_text = processed_result['structured_text']
+
+            braille_result, metadata = await translate_menu_text_async(processed_text, use_context)
+            if not braille_result['success']:
+                yield json.dumps({'stage': 'done', 'processed_text': processed_text, 'error': "Braille translation failed.", 'success': False}) + "\n"
+                return
+
+            yield json.dumps({
+                'stage': 'done',
+                'raw_text': raw_text,
+                'processed_text': processed_text,
+                'braille_text': braille_result['formatted_braille'],
+                'metadata': metadata,
+                'success': True
+            }) + "\n"
+        except Exception as e:
+            yield json.dumps({'stage': 'done', 'error': f"Error processing image: {str(e)}", 'success': False}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def braille_for_document(request):
+    """Return the request's Braille text, translating the original text if it has none."""
+    if request.braille_text:
+        return request.braille_text
+
+    braille_result, _ = await translate_menu_text_async(request.original_text, use_context=False)
+    if not braille_result['success']:
+        raise HTTPException(status_code=500, detail="Braille translation failed.")
+    return braille_result['formatted_braille']
+
+
+@app.post("/v1/pdf")
+async def create_pdf(request: DocumentRequest):
+    """Render a Braille PDF; the file is streamed from the artifact store."""
+    if request.layout not in PDF_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Unknown layout: {request.layout}")
+
+    braille_text = await braille_for_document(request)
+    try:
+        renderer = PdfRenderer(request.layout, tactile=request.tactile, error_pdf=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Same key as the UI's downloads, so both share stored files
+    key = artifact_key("pdf", renderer.cache_key(request.original_text, braille_text, request.title))
+    filename = safe_filename(request.title + ("_tactile" if request.tactile else ""), "pdf")
+    try:
+        path = await run_in_threadpool(
+            profile_call, "create_pdf", store_artifact, key, filename,
+            lambda output: renderer.render(request.original_text, braille_text, request.title, output=output),
+            force=request.profile
+        )
+    except Exception:
+        # The error was logged by the renderer, and no file was stored
+        raise HTTPException(status_code=500, detail="PDF rendering failed.")
+    return FileResponse(path, media_type="application/pdf", filename=filename)
+
+
+@app.post("/v1/brf")
+async def create_brf(request: DocumentRequest):
+    """Write an embosser-ready BRF file; the file is streamed from the artifact store."""
+    braille_text = await braille_for_document(request)
+
+    key = artifact_key("brf", request.title, braille_text)
+    filename = safe_filename(request.title, "brf")
+    path = await run_in_threadpool(
+        store_artifact, key, filename,
+        lambda output: write_brf(output, braille_text, text_to_grade1_braille(request.title))
+    )
+    return FileResponse(path, media_type="application/x-brf", filename=filename)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Each worker process loads its own models on first use
+    uvicorn.run(
+        "api:app",
+        host=API_HOST,
+        port=API_PORT,
+        workers=API_WORKERS,
+        timeout_keep_alive=API_KEEP_ALIVE_SECONDS
+    )
@@ -1,357 +1,486 @@
 import gradio as gr
-import numpy as np
-from PIL import Image
-import io
-import base64
+import os
+import asyncio
+import shutil
+import hashlib
+import tempfile
 
 # Import our custom modules
-from utils.image_preprocessing import preprocess_image
-from models.document_ai import extract_text_and_layout
-from models.text_processor import process_menu_text
-from models.braille_translator import text_to_braille, get_braille_metadata
-from utils.pdf_generator import create_braille_pdf, create_braille_pdf_with_comparison
+from models.text_processor import process_menu_text, process_menu_text_stream
+from models.braille_translator import text_to_grade1_braille
+from models.menu_pipeline import (
+    extract_document_text_async,
+    extract_menu_text_async,
+    get_pipeline_executors,
+    run_menu_pipeline,
+    translate_menu_text_async
+)
+from models.batch_converter import BATCH_FORMATS, convert_batch
+from utils.pdf_generator import PdfRenderer
+from utils.brf_generator import write_brf
+from utils.artifact_store import artifact_key, safe_filename, store_artifact
+from utils.metrics import format_trace, stage_timer, start_metrics_server
+from utils.profiling import profiled, run_profiled_coroutine, sample_profile
+from utils.session_store import get_session_store
 
+# Request queue settings (can be overridden with environment variables).
+# OCR and preprocessing are CPU-bound and can run side by side; the LLM and
+# BART context enhancement share one model worker by default so a slow
+# generation queues behind others instead of competing for the same device.
+CPU_STAGE_CONCURRENCY = int(os.environ.get("CPU_STAGE_CONCURRENCY", os.cpu_count() or 1))
+MODEL_STAGE_CONCURRENCY = int(os.environ.get("MODEL_STAGE_CONCURRENCY", 1))
+QUEUE_MAX_SIZE = int(os.environ.get("QUEUE_MAX_SIZE", 32))
+
+# Batch outputs are kept per uploaded archive, so uploading it again resumes the batch
+BATCH_DIR = os.environ.get("BATCH_DIR", os.path.join(tempfile.gettempdir(), "braille_menu_batches"))
+
+# PDF format choices shown in the UI and the layouts they render
+PDF_FORMATS = {
+    "Sequential (Text then Braille)": "sequential",
+    "Side-by-Side Comparison": "comparison",
+    "Single-Line Comparison": "single_line"
+}
 
-def generate_pdf(original_text, braille_text, title, comparison=False):
-    """Generate a PDF file with Braille content."""
-    try:
-        if comparison:
-            pdf_buffer = create_braille_pdf_with_comparison(original_text, braille_text, title)
-        else:
-            pdf_buffer = create_braille_pdf(original_text, braille_text, title)
-        
-        return pdf_buffer
-    except Exception as e:
-        print(f"Error in generate_pdf: {str(e)}")
-        raise
 
-# Function to create a download link for a PDF
-def generate_pdf1(original_text, braille_text, title, comparison=False):
-    """Generate a PDF file with Braille content."""
-    if comparison:
-        pdf_buffer = create_braille_pdf_with_comparison(original_text, braille_text, title)
-    else:
-        pdf_buffer = create_braille_pdf(original_text, braille_text, title)
+def menu_outputs(processed_text, braille_text, metadata):
+    """
+    Build the UI outputs for a translated menu.
     
-    return pdf_buffer
+    The menu is kept in the session store and only its ID goes into
+    gr.State, so downloads read the one stored copy.
+    
+    Args:
+        processed_text: Processed menu text
+        braille_text: Formatted Braille translation
+        metadata: Metadata from text_to_braille
+        
+    Returns:
+        Processed text, Braille text, metadata text and the session ID
+    """
+    metadata_text = f"Translation contains {metadata['word_count']} words, {metadata['character_count']} characters, {metadata['line_count']} lines."
+    session_id = get_session_store().put(processed_text, braille_text, metadata)
+    return processed_text, braille_text, metadata_text, session_id
+
+
+async def run_pipeline_step(name, coroutine_function, *args, profile=False):
+    """Await a pipeline step, profiling it on a worker thread if the request is sampled."""
+    if sample_profile(profile):
+        # Profiled steps run their stages inline, which must not block the server's event loop
+        return await asyncio.to_thread(run_profiled_coroutine, name, coroutine_function, *args)
+    return await coroutine_function(*args)
 
-def process_image_v2(image, use_llm, use_context):
-    """Process the uploaded image and generate results."""
-    if image is None:
-        return "Please upload an image first.", "", "", None
+
+async def ocr_stage(image, menu_files=None, profile=False, session_id=None, use_llm=True, use_context=True, show_trace=False):
+    """
+    First pipeline stage: preprocess the image and extract its text.
+    
+    Runs in the CPU-bound queue; the work itself goes to the pipeline's
+    preprocessing threads and OCR processes. With both AI options off, a
+    single image is converted completely here in the lightweight mode and
+    the later stages have nothing to do.
     
-    # Convert to PIL Image if needed
-    if isinstance(image, np.ndarray):
-        image = Image.fromarray(image)
+    Args:
+        image: Uploaded image
+        menu_files: Uploaded PDF or page image files; when given, they are
+            used instead of image and their pages are OCR'd in parallel
+        profile: Whether to profile this stage regardless of PROFILE_SAMPLE_RATE
+        session_id: Session ID of the user's previous menu, which is dropped
+        use_llm: Whether the LLM stage will structure the text
+        use_context: Whether the translation stage will use context enhancement
+        show_trace: Whether to add the stage timings to the metadata panel
+        
+    Returns:
+        UI outputs, the extracted text for the next stage (None if processing
+        stopped here) and the stage records of the request
+    """
+    if image is None and not menu_files:
+        return "Please upload an image first.", "", "", None, None, []
     
-    # Preprocess the image
-    preprocessed_img = preprocess_image(image)
+    # Each user keeps only the menu they are working on
+    if session_id is not None:
+        get_session_store().delete(session_id)
     
-    # Extract text using document AI
+    trace = []
     try:
-        result = extract_text_and_layout(preprocessed_img)
-        
-        if not result.get('words', []):
-            return "No text was extracted from the image.", "", "", None
-        
-        raw_text = ' '.join(result['words'])
-        
-        # Process text with LLM if enabled
-        if use_llm:
-            processed_result = process_menu_text(raw_text)
+        if not menu_files and not use_llm and not use_context:
+            # No stage needs a model, so the menu is converted in one go
+            result = await asyncio.to_thread(run_menu_pipeline, image, False, False, None, profile)
+            trace = result['trace']
+            if not result['success']:
+                if 'processed_text' in result:
+                    return result['processed_text'], "", result['error'], None, None, trace
+                return result['error'], "", "", None, None, trace
             
-            if processed_result['success']:
-                processed_text = processed_result['structured_text']
-            else:
-                processed_text = raw_text
+            outputs = menu_outputs(result['processed_text'], result['braille_text'], result['metadata'])
+            if show_trace:
+                outputs = (outputs[0], outputs[1], outputs[2] + "\n\n" + format_trace(trace), outputs[3])
+            return outputs + (None, trace)
+        
+        if menu_files:
+            paths = [menu_file if isinstance(menu_file, str) else menu_file.name for menu_file in menu_files]
+            raw_text = await run_pipeline_step("ocr_stage", extract_document_text_async, paths, trace, profile=profile)
         else:
-            processed_text = raw_text
-        
-        # Translate to Braille
-        braille_result = text_to_braille(processed_text, use_context=use_context)
-        
-        if not braille_result['success']:
-            return processed_text, "", "Braille translation failed.", None
-        
-        braille_text = braille_result['formatted_braille']
-        
-        # Generate metadata
-        metadata = get_braille_metadata(processed_text)
-        metadata_text = f"Translation contains {metadata['word_count']} words, {metadata['character_count']} characters, {metadata['line_count']} lines."
+            raw_text = await run_pipeline_step("ocr_stage", extract_menu_text_async, image, trace, profile=profile)
         
-        # Store both Unicode and ASCII versions for later use
-        state_data = {
-            'original_text': processed_text,
-            'braille_text': braille_text,
-            'ascii_braille': braille_result.get('formatted_ascii', '')
-        }
+        if not raw_text:
+            return "No text was extracted from the image.", "", "", None, None, trace
         
-        # Return results
-        return processed_text, braille_text, metadata_text, state_data
+        return raw_text, "", "Waiting for the text processor...", None, raw_text, trace
     
     except Exception as e:
-        return f"Error processing image: {str(e)}", "", "", None
+        return f"Error processing image: {str(e)}", "", "", None, None, trace
 
 
-def process_image(image, use_llm, use_context):
-    """Process the uploaded image and generate results."""
-    if image is None:
-        return "Please upload an image first.", "", "", None
+def llm_stage(raw_text, use_llm, menu_id="", trace=None):
+    """
+    Second pipeline stage: structure the extracted text with the LLM.
     
-    # Convert to PIL Image if needed
-    if isinstance(image, np.ndarray):
-        image = Image.fromarray(image)
+    Runs in the model-bound queue and streams sections as they are produced.
     
-    # Preprocess the image
-    preprocessed_img = preprocess_image(image)
+    Args:
+        raw_text: Text from ocr_stage, or None if that stage stopped
+        use_llm: Whether to use the LLM at all
+        menu_id: Optional menu ID for incremental re-structuring
+        trace: Stage records of the request so far
+        
+    Yields:
+        Processed text and status outputs, the text for the next stage and
+        the stage records
+    """
+    if raw_text is None:
+        yield gr.update(), gr.update(), None, trace
+        return
     
-    # Extract text using document AI
+    if not use_llm:
+        yield raw_text, "Waiting for the Braille translator...", raw_text, trace
+        return
+    
+    trace = list(trace or [])
     try:
-        result = extract_text_and_layout(preprocessed_img)
-        
-        if not result.get('words', []):
-            return "No text was extracted from the image.", "", "", None
-        
-        raw_text = ' '.join(result['words'])
-        
-        # Process text with LLM if enabled
-        if use_llm:
-            processed_result = process_menu_text(raw_text)
-            
-            if processed_result['success']:
-                processed_text = processed_result['structured_text']
+        # Model calls go through the pipeline's model worker, shared with batches and the API
+        _, _, model_executor = get_pipeline_executors()
+        with stage_timer("structuring", trace):
+            menu_id = (menu_id or '').strip() or None
+            if menu_id:
+                # Incremental re-structuring sends several small prompts, so it is not streamed
+                processed_result = model_executor.submit(process_menu_text, raw_text, menu_id=menu_id).result()
+                processed_text = processed_result['structured_text'] if processed_result['success'] else raw_text
             else:
                 processed_text = raw_text
-        else:
-            processed_text = raw_text
-        
-        # Translate to Braille
-        braille_result = text_to_braille(processed_text, use_context=use_context)
-        
-        if not braille_result['success']:
-            return processed_text, "", "Braille translation failed.", None
-        
-        braille_text = braille_result['formatted_braille']
+                for processed_result in process_menu_text_stream(raw_text, executor=model_executor):
+                    if not processed_result['done']:
+                        yield processed_result['structured_text'], "Structuring menu text...", None, gr.update()
+                    elif processed_result['success']:
+                        processed_text = processed_result['structured_text']
         
-        # Generate metadata
-        metadata = get_braille_metadata(processed_text)
-        metadata_text = f"Translation contains {metadata['word_count']} words, {metadata['character_count']} characters, {metadata['line_count']} lines."
-        
-        # Return results
-        return processed_text, braille_text, metadata_text, (processed_text, braille_text)
+        yield processed_text, "Waiting for the Braille translator...", processed_text, trace
     
     except Exception as e:
-        return f"Error processing image: {str(e)}", "", "", None
+        yield f"Error processing text: {str(e)}", "", None, trace
 
 
-def create_pdf_v2(state, pdf_title, pdf_type):
-    """Create a PDF file for download."""
-    if state is None:
-        return None
+async def translate_stage(processed_text, use_context, trace=None, show_trace=False, profile=False):
+    """
+    Last pipeline stage: translate the processed text to Braille.
     
-    # Extract data from state
-    try:
-        original_text = state['original_text']
-        ascii_braille = state['ascii_braille']
-        
-        # If ASCII version is not available, use the Unicode version
-        if not ascii_braille:
-            ascii_braille = state['braille_text']
-    except:
-        # Fallback for backward compatibility
-        if isinstance(state, tuple) and len(state) == 2:
-            original_text, braille_text = state
-            ascii_braille = braille_text
-        else:
-            return None
+    Runs in the CPU-bound queue, so plain translation doesn't wait for a
+    model slot; context enhancement is still handed to the model worker,
+    where it runs one at a time with the LLM calls.
     
-    comparison = (pdf_type == "Side-by-Side Comparison")
+    Args:
+        processed_text: Text from llm_stage, or None if an earlier stage stopped
+        use_context: Whether to use AI for context enhancement
+        trace: Stage records of the request so far
+        show_trace: Whether to add the stage timings to the metadata panel
+        profile: Whether to profile this stage regardless of PROFILE_SAMPLE_RATE
+        
+    Returns:
+        Final UI outputs and the session ID used for downloads
+    """
+    if processed_text is None:
+        # An earlier stage already set the outputs, including the session ID
+        # of a menu converted in the lightweight mode
+        return gr.update(), gr.update(), gr.update(), gr.update()
     
+    trace = list(trace or [])
     try:
-        pdf_buffer = generate_pdf(original_text, ascii_braille, pdf_title, comparison)
-        
-        # Create a temporary file to save the PDF
-        temp_file_path = f"/tmp/{pdf_title.replace(' ', '_').lower()}.pdf"
+        braille_result, metadata = await run_pipeline_step(
+            "translate_stage", translate_menu_text_async, processed_text, use_context, trace, profile=profile
+        )
         
-        # Write the buffer to a file
-        with open(temp_file_path, "wb") as f:
-            f.write(pdf_buffer.getvalue())
+        if not braille_result['success']:
+            return processed_text, "", "Braille translation failed.", None
         
-        return temp_file_path
+        outputs = menu_outputs(processed_text, braille_result['formatted_braille'], metadata)
+        if show_trace:
+            outputs = (outputs[0], outputs[1], outputs[2] + "\n\n" + format_trace(trace), outputs[3])
+        return outputs
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
-        return None
+        return processed_text, "", f"Error translating text: {str(e)}", None
+
 
-def create_pdf(state, pdf_title, pdf_type):
-    """Create a PDF file for download."""
-    if state is None:
+def get_menu_session(session_id):
+    """Look up the user's translated menu, or None if there is none or it expired."""
+    if session_id is None:
         return None
     
-    # Extract data from state
-    try:
-        original_text = state['original_text']
-        braille_text = state['braille_text']  # Use Unicode Braille text
-    except:
-        # Fallback for backward compatibility
-        if isinstance(state, tuple) and len(state) == 2:
-            original_text, braille_text = state
-        else:
-            return None
-    
-    comparison = (pdf_type == "Side-by-Side Comparison")
-    
-    try:
-        pdf_buffer = generate_pdf(original_text, braille_text, pdf_title, comparison)
-        
-        # Create a temporary file to save the PDF
-        temp_file_path = f"/tmp/{pdf_title.replace(' ', '_').lower()}.pdf"
-        
-        # Write the buffer to a file
-        with open(temp_file_path, "wb") as f:
-            f.write(pdf_buffer.getvalue())
-        
-        return temp_file_path
-    except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
-        return None
+    session = get_session_store().get(session_id)
+    if session is None:
+        print("Menu session expired; the menu has to be processed again")
+    return session
 
-def create_pdf_v1_working(state, pdf_title, pdf_type):
-    """Create a PDF file for download."""
-    if state is None or len(state) != 2:
+
+def create_pdf(session_id, pdf_title, pdf_type, tactile=False, profile=False):
+    """Create a PDF file for download, profiling it if the request is sampled."""
+    session = get_menu_session(session_id)
+    if session is None:
         return None
     
-    original_text, braille_text = state
-    
-    # Get ASCII representation for PDF
-    try:
-        braille_result = text_to_braille(original_text, use_context=False)
-        ascii_braille = braille_result.get('formatted_ascii', braille_text)
-    except:
-        ascii_braille = braille_text
-    
-    comparison = (pdf_type == "Side-by-Side Comparison")
+    # The stored translation is used as is, so the menu is never translated again
+    original_text = session.original_text
+    braille_text = session.braille_text
+    layout = PDF_FORMATS.get(pdf_type, "sequential")
     
     try:
-        pdf_buffer = generate_pdf(original_text, ascii_braille, pdf_title, comparison)
-        
-        # Create a temporary file to save the PDF
-        temp_file_path = f"/tmp/{pdf_title.replace(' ', '_').lower()}.pdf"
-        
-        # Write the buffer to a file
-        with open(temp_file_path, "wb") as f:
-            f.write(pdf_buffer.getvalue())
-        
-        return temp_file_path
+        renderer = PdfRenderer(layout, tactile=tactile, error_pdf=False)
+        key = artifact_key("pdf", renderer.cache_key(original_text, braille_text, pdf_title))
+        filename = safe_filename(pdf_title + ("_tactile" if tactile else ""), "pdf")
+        
+        # Re-downloading the same menu reuses the stored file
+        with profiled("create_pdf", force=profile):
+            return store_artifact(
+                key, filename, lambda path: renderer.render(original_text, braille_text, pdf_title, output=path)
+            )
     except Exception as e:
         print(f"Error generating PDF: {str(e)}")
         return None
 
-def create_pdf2(state, pdf_title, pdf_type):
-    """Create a PDF file for download."""
-    if state is None or len(state) != 2:
+
+def create_brf_file(session_id, title):
+    """Create an embosser-ready BRF file for download."""
+    session = get_menu_session(session_id)
+    if session is None:
         return None
     
-    original_text, braille_text = state
-    comparison = (pdf_type == "Side-by-Side Comparison")
-    
     try:
-        pdf_buffer = generate_pdf(original_text, braille_text, pdf_title, comparison)
-        
-        # Create a temporary file to save the PDF
-        temp_file_path = f"/tmp/{pdf_title.replace(' ', '_').lower()}.pdf"
-        
-        # Write the buffer to a file
-        with open(temp_file_path, "wb") as f:
-            f.write(pdf_buffer.getvalue())
-        
-        return temp_file_path
+        braille_text = session.braille_text
+        key = artifact_key("brf", title, braille_text)
+        return store_artifact(
+            key, safe_filename(title, "brf"), lambda path: write_brf(path, braille_text, text_to_grade1_braille(title))
+        )
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+        print(f"Error generating BRF: {str(e)}")
         return None
 
 
-def create_pdf1(state, pdf_title, pdf_type):
-    """Create a PDF file for download."""
-    if state is None or len(state) != 2:
-        return None
+def convert_batch_upload(archive, use_llm, use_context, formats, pdf_type, progress=gr.Progress()):
+    """Convert an uploaded ZIP of menu images and return the results as a ZIP."""
+    if archive is None:
+        return "Please upload a ZIP of menu images first.", None
+    if not formats:
+        return "Please choose at least one output format.", None
     
-    original_text, braille_text = state
-    comparison = (pdf_type == "Side-by-Side Comparison")
+    archive_path = archive if isinstance(archive, str) else archive.name
+    digest = hashlib.sha256()
+    with open(archive_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
     
-    pdf_buffer = generate_pdf(original_text, braille_text, pdf_title, comparison)
+    layout = PDF_FORMATS.get(pdf_type, "sequential")
+    batch_dir = os.path.join(BATCH_DIR, artifact_key(digest.hexdigest(), use_llm, use_context, sorted(formats), layout))
+    results_dir = os.path.join(batch_dir, "results")
+    
+    try:
+        result = convert_batch(
+            archive_path,
+            results_dir,
+            formats=formats,
+            layout=layout,
+            use_llm=use_llm,
+            use_context=use_context,
+            progress=lambda finished, total: progress((finished, total), desc="Converting menus")
+        )
+        results_zip = shutil.make_archive(os.path.join(batch_dir, "braille_menus"), "zip", results_dir)
+    except Exception as e:
+        print(f"Error converting batch: {str(e)}")
+        return f"Error converting batch: {str(e)}", None
     
-    # Return the file for download
-    return pdf_buffer
+    summary = (
+        f"Converted {result['done']} menus, {result['failed']} failed, "
+        f"{result['skipped']} already done ({result['total']} total). "
+        "Failed menus are listed in manifest.jsonl and are retried on the next upload."
+    )
+    return summary, results_zip
+
 
-# Create the Gradio interface
-with gr.Blocks(title="English Menu to Braille Menu Converter") as demo:
-    gr.Markdown("# English Menu to Braille Menu")
-    gr.Markdown("Upload a menu image to convert it to Braille text")
+def build_demo():
+    """
+    Build the Gradio interface.
     
-    with gr.Row():
-        with gr.Column(scale=1):
-            # Input components
-            image_input = gr.Image(type="pil", label="Upload Menu Image")
-            
+    Only called when the app is started, so the spawned OCR and PDF worker
+    processes, which import this module again, don't build the UI.
+    
+    Returns:
+        The gr.Blocks app
+    """
+    with gr.Blocks(title="English Menu to Braille Menu Converter") as demo:
+        gr.Markdown("# English Menu to Braille Menu")
+        gr.Markdown("Upload a menu image to convert it to Braille text")
+        
+        with gr.Tab("Single Menu"):
             with gr.Row():
-                use_llm = gr.Checkbox(label="Use AI for text processing", value=True)
-                use_context = gr.Checkbox(label="Use AI for context enhancement", value=True)
+                with gr.Column(scale=1):
+                    # Input components
+                    image_input = gr.Image(type="pil", label="Upload Menu Image")
+                    menu_files = gr.File(
+                        label="Or upload a PDF menu or several page images",
+                        file_count="multiple",
+                        file_types=[".pdf", "image"]
+                    )
+                    
+                    with gr.Row():
+                        use_llm = gr.Checkbox(label="Use AI for text processing", value=True)
+                        use_context = gr.Checkbox(label="Use AI for context enhancement", value=True)
+                    
+                    menu_id = gr.Textbox(
+                        label="Menu ID (optional)",
+                        placeholder="e.g. restaurant name - only changed parts of a known menu are re-processed"
+                    )
+                    
+                    with gr.Row():
+                        show_trace = gr.Checkbox(label="Show stage timings", value=False)
+                        profile_request = gr.Checkbox(label="Profile this request", value=False)
+                    
+                    process_button = gr.Button("Process Menu")
+                
+                with gr.Column(scale=2):
+                    # Output components
+                    processed_text = gr.Textbox(label="Processed Text", lines=8)
+                    braille_output = gr.Textbox(label="Braille Translation", lines=10)
+                    metadata_output = gr.Markdown()
+                    
+                    # Session ID of the translated menu, used for downloads
+                    state = gr.State()
+                    
+                    # PDF download section
+                    with gr.Group():
+                        gr.Markdown("### Download Options")
+                        pdf_title = gr.Textbox(label="PDF Title", value="Menu in Braille")
+                        pdf_type = gr.Radio(
+                            list(PDF_FORMATS),
+                            label="PDF Format",
+                            value="Sequential (Text then Braille)"
+                        )
+                        tactile_dots = gr.Checkbox(label="Draw Braille as tactile dots (for swell paper)", value=False)
+                        pdf_button = gr.Button("Generate PDF")
+                        pdf_output = gr.File(label="Download PDF")
+                        brf_button = gr.Button("Generate BRF (for embossers)")
+                        brf_output = gr.File(label="Download BRF")
             
-            process_button = gr.Button("Process Menu")
-        
-        with gr.Column(scale=2):
-            # Output components
-            processed_text = gr.Textbox(label="Processed Text", lines=8)
-            braille_output = gr.Textbox(label="Braille Translation", lines=10)
-            metadata_output = gr.Markdown()
+            # Add examples
+            gr.Examples(
+                examples=["assets/sample_menus/menu1.jpg", "assets/sample_menus/menu2.jpg"],
+                inputs=image_input
+            )
+        
+        with gr.Tab("Batch"):
+            gr.Markdown("Convert a ZIP of menu images. Uploading the same ZIP again resumes an interrupted batch.")
             
-            # Hidden state for PDF generation
-            state = gr.State()
+            with gr.Row():
+                with gr.Column(scale=1):
+                    batch_input = gr.File(label="Upload ZIP of Menu Images", file_types=[".zip"])
+                    
+                    with gr.Row():
+                        batch_use_llm = gr.Checkbox(label="Use AI for text processing", value=True)
+                        batch_use_context = gr.Checkbox(label="Use AI for context enhancement", value=True)
+                    
+                    batch_formats = gr.CheckboxGroup(list(BATCH_FORMATS), label="Output Formats", value=list(BATCH_FORMATS))
+                    batch_pdf_type = gr.Radio(
+                        list(PDF_FORMATS),
+                        label="PDF Format",
+                        value="Sequential (Text then Braille)"
+                    )
+                    batch_button = gr.Button("Convert Batch")
+                
+                with gr.Column(scale=2):
+                    batch_summary = gr.Markdown()
+                    batch_output = gr.File(label="Download Results")
+        
+        # Text and stage records handed from one pipeline stage to the next
+        stage_text = gr.State()
+        stage_trace = gr.State()
+        
+        # Set up event handlers. Each stage is queued separately so a slow LLM
+        # call only holds a model slot, and the queue position is shown on the
+        # outputs while a request waits. Events sharing a concurrency_id share
+        # the lowest limit among them, so every event states its limit.
+        process_button.click(
+            ocr_stage,
+            inputs=[image_input, menu_files, profile_request, state, use_llm, use_context, show_trace],
+            outputs=[processed_text, braille_output, metadata_output, state, stage_text, stage_trace],
+            concurrency_id="cpu",
+            concurrency_limit=CPU_STAGE_CONCURRENCY
+        ).then(
+            llm_stage,
+            inputs=[stage_text, use_llm, menu_id, stage_trace],
+            outputs=[processed_text, metadata_output, stage_text, stage_trace],
+            concurrency_id="model",
+            concurrency_limit=MODEL_STAGE_CONCURRENCY
+        ).then(
+            translate_stage,
+            inputs=[stage_text, use_context, stage_trace, show_trace, profile_request],
+            outputs=[processed_text, braille_output, metadata_output, state],
+            concurrency_id="cpu",
+            concurrency_limit=CPU_STAGE_CONCURRENCY
+        )
+        
+        pdf_button.click(
+            create_pdf,
+            inputs=[state, pdf_title, pdf_type, tactile_dots, profile_request],
+            outputs=[pdf_output],
+            concurrency_id="cpu",
+            concurrency_limit=CPU_STAGE_CONCURRENCY
+        )
+        
+        brf_button.click(
+            create_brf_file,
+            inputs=[state, pdf_title],
+            outputs=[brf_output],
+            concurrency_id="cpu",
+            concurrency_limit=CPU_STAGE_CONCURRENCY
+        )
+        
+        # A batch uses every stage's executors, so batches run one at a time
+        batch_button.click(
+            convert_batch_upload,
+            inputs=[batch_input, batch_use_llm, batch_use_context, batch_formats, batch_pdf_type],
+            outputs=[batch_summary, batch_output],
+            concurrency_id="batch",
+            concurrency_limit=1
+        )
+        
+        # Add about section
+        with gr.Accordion("About", open=False):
+            gr.Markdown("""
+            This application converts menu images to Braille text using AI technologies:
             
-            # PDF download section
-            with gr.Group():
-                gr.Markdown("### Download Options")
-                pdf_title = gr.Textbox(label="PDF Title", value="Menu in Braille")
-                pdf_type = gr.Radio(
-                    ["Sequential (Text then Braille)", "Side-by-Side Comparison"],
-                    label="PDF Format",
-                    value="Sequential (Text then Braille)"
-                )
-                pdf_button = gr.Button("Generate PDF")
-                pdf_output = gr.File(label="Download PDF")
-    
-    # Set up event handlers
-    process_button.click(
-        process_image,
-        inputs=[image_input, use_llm, use_context],
-        outputs=[processed_text, braille_output, metadata_output, state]
-    )
-    
-    pdf_button.click(
-        create_pdf,
-        inputs=[state, pdf_title, pdf_type],
-        outputs=[pdf_output]
-    )
-    
-    # Add examples
-    gr.Examples(
-        examples=["assets/sample_menus/menu1.jpg", "assets/sample_menus/menu2.jpg"],
-        inputs=image_input
-    )
+            - Document AI for text extraction
+            - LLMs for text processing and enhancement
+            - Braille translation with formatting
+            - PDF generation for download
+            
+            Created as a demonstration of AI-powered accessibility tools.
+            """)
     
-    # Add about section
-    with gr.Accordion("About", open=False):
-        gr.Markdown("""
-        This application converts menu images to Braille text using AI technologies:
-        
-        - Document AI for text extraction
-        - LLMs for text processing and enhancement
-        - Braille translation with formatting
-        - PDF generation for download
-        
-        Created as a demonstration of AI-powered accessibility tools.
-        """)
+    return demo
+
 
 # Launch the app
 if __name__ == "__main__":
+    demo = build_demo()
+    # The queue is required for streaming outputs; requests beyond
+    # QUEUE_MAX_SIZE are rejected instead of waiting indefinitely
+    demo.queue(max_size=QUEUE_MAX_SIZE)
+    # Prometheus metrics are served on METRICS_PORT when it is set
+    start_metrics_server()
     demo.launch()
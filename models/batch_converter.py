@@ -0,0 +1,276 @@
+import os
+import io
+import json
+import time
+import asyncio
+import zipfile
+import functools
+
+from PIL import Image
+
+from models.menu_pipeline import extract_menu_text_async, get_pipeline_executors
+from models.text_processor import LLM_BATCH_SIZE, process_menu_texts
+from models.braille_translator import text_to_braille, text_to_grade1_braille
+from utils.pdf_generator import PdfRenderer
+from utils.brf_generator import write_brf
+from utils.artifact_store import artifact_key, safe_filename
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp')
+BATCH_FORMATS = ("txt", "pdf", "brf")
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def list_batch_images(source):
+    """
+    List the menu images in a directory or ZIP archive.
+
+    Args:
+        source: Path of a directory (searched recursively) or a ZIP file
+
+    Returns:
+        Sorted list of image paths relative to source
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [
+                info.filename for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+            ]
+        # Skip metadata that macOS adds to archives
+        return sorted(name for name in names if not name.startswith('__MACOSX/'))
+
+    images = []
+    for root, _, files in os.walk(source):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.relpath(os.path.join(root, name), source).replace(os.sep, '/'))
+    return sorted(images)
+
+
+def load_batch_image(source, item_id):
+    """Load one image listed by list_batch_images."""
+    if zipfile.is_zipfile(source):
+        # Each read opens the archive itself, so loads can run on several threads
+        with zipfile.ZipFile(source) as archive:
+            data = archive.read(item_id)
+        image = Image.open(io.BytesIO(data))
+    else:
+        image = Image.open(os.path.join(source, item_id))
+    return image.convert("RGB")
+
+
+def read_manifest(path):
+    """
+    Read a batch manifest.
+
+    Args:
+        path: Manifest path
+
+    Returns:
+        Dictionary mapping item IDs to their latest record
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partial last line; that item is simply redone
+                continue
+            records[record['id']] = record
+    return records
+
+
+def write_batch_outputs(output_dir, item_id, processed_text, braille_text, formats, layout):
+    """
+    Write the output files for one converted menu.
+
+    Args:
+        output_dir: Batch output directory
+        item_id: Item ID from list_batch_images
+        processed_text: Processed menu text
+        braille_text: Formatted Unicode Braille
+        formats: Output formats, a subset of BATCH_FORMATS
+        layout: PDF layout, see PDF_LAYOUTS
+
+    Returns:
+        Dictionary mapping each format to its file name
+    """
+    # The hash keeps names unique when different paths flatten to the same name
+    stem = os.path.splitext(item_id)[0].replace('/', '_')[:60] + "_" + artifact_key(item_id)[:8]
+    title = os.path.splitext(os.path.basename(item_id))[0]
+    outputs = {}
+
+    for output_format in formats:
+        filename = safe_filename(stem, output_format)
+        path = os.path.join(output_dir, filename)
+        if output_format == "txt":
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(braille_text + "\n")
+        elif output_format == "pdf":
+            # A failed render raises, so the item is recorded as failed and retried on resume
+            try:
+                PdfRenderer(layout, use_cache=False, error_pdf=False).render(processed_text, braille_text, title, output=path)
+            except Exception:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+        elif output_format == "brf":
+            write_brf(path, braille_text, text_to_grade1_braille(title))
+        outputs[output_format] = filename
+
+    return outputs
+
+
+async def _extract_batch(source, item_ids):
+    """Load and OCR a group of images concurrently."""
+    loop = asyncio.get_running_loop()
+    preprocess_executor, _, _ = get_pipeline_executors()
+
+    async def extract(item_id):
+        try:
+            image = await loop.run_in_executor(preprocess_executor, load_batch_image, source, item_id)
+            return await extract_menu_text_async(image), None
+        except Exception as e:
+            return None, f"Error processing image: {str(e)}"
+
+    return await asyncio.gather(*(extract(item_id) for item_id in item_ids))
+
+
+async def convert_batch_async(source, output_dir, formats=BATCH_FORMATS, layout="sequential",
+                              use_llm=True, use_context=True, batch_size=LLM_BATCH_SIZE,
+                              resume=True, progress=None):
+    """
+    Convert a directory or ZIP of menu images to Braille outputs.
+
+    Images are OCR'd a group at a time on the pipeline's executors, and the
+    next group is OCR'd while the LLM structures the current one in a
+    single batched call. Every finished item is appended to manifest.jsonl
+    in output_dir, so an interrupted job started again with resume=True
+    skips the items that were already converted.
+
+    Args:
+        source: Directory or ZIP file of menu images
+        output_dir: Directory for the output files and the manifest
+        formats: Output formats, a subset of BATCH_FORMATS
+        layout: PDF layout, see PDF_LAYOUTS
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+        batch_size: Number of images per group and per LLM call
+        resume: Whether to skip items already converted in output_dir
+        progress: Optional function called with (finished, total) after
+            each item
+
+    Returns:
+        Dictionary with item counts and the manifest path
+    """
+    unknown = set(formats) - set(BATCH_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown output formats: {', '.join(sorted(unknown))}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if not resume and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    done = {
+        item_id for item_id, record in read_manifest(manifest_path).items()
+        if record['status'] == 'done'
+    }
+    item_ids = list_batch_images(source)
+    todo = [item_id for item_id in item_ids if item_id not in done]
+    groups = [todo[start:start + batch_size] for start in range(0, len(todo), batch_size)]
+
+    loop = asyncio.get_running_loop()
+    preprocess_executor, _, model_executor = get_pipeline_executors()
+    counts = {'total': len(item_ids), 'skipped': len(item_ids) - len(todo), 'done': 0, 'failed': 0}
+    finished = counts['skipped']
+
+    # Terminate a partial line left by a crash so the next record starts on its own line
+    if os.path.exists(manifest_path) and os.path.getsize(manifest_path) > 0:
+        with open(manifest_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    with open(manifest_path, 'a', encoding='utf-8') as manifest:
+        next_group = asyncio.ensure_future(_extract_batch(source, groups[0])) if groups else None
+
+        for group_index, group in enumerate(groups):
+            start = time.perf_counter()
+            extracted = await next_group
+            # Keep the OCR workers busy while the model handles this group
+            if group_index + 1 < len(groups):
+                next_group = asyncio.ensure_future(_extract_batch(source, groups[group_index + 1]))
+
+            texts = [raw_text for raw_text, error in extracted if raw_text]
+            if use_llm and texts:
+                processed = iter(await loop.run_in_executor(
+                    model_executor, functools.partial(process_menu_texts, texts, batch_size=batch_size)
+                ))
+            else:
+                processed = iter([])
+
+            for item_id, (raw_text, error) in zip(group, extracted):
+                record = {'id': item_id}
+                try:
+                    if error:
+                        raise RuntimeError(error)
+                    if not raw_text:
+                        raise RuntimeError("No text was extracted from the image.")
+
+                    processed_text = raw_text
+                    if use_llm:
+                        processed_result = next(processed)
+                        if processed_result['success']:
+                            processed_text = processed_result['structured_text']
+
+                    # Only context enhancement needs the model worker
+                    braille_result = await loop.run_in_executor(
+                        model_executor if use_context else preprocess_executor,
+                        text_to_braille, processed_text, use_context
+                    )
+                    if not braille_result['success']:
+                        raise RuntimeError("Braille translation failed.")
+
+                    record['outputs'] = await loop.run_in_executor(
+                        preprocess_executor, write_batch_outputs, output_dir, item_id,
+                        processed_text, braille_result['formatted_braille'], formats, layout
+                    )
+                    record['metadata'] = braille_result['metadata']
+                    record['status'] = 'done'
+                    counts['done'] += 1
+                except Exception as e:
+                    record['status'] = 'failed'
+                    record['error'] = str(e)
+                    counts['failed'] += 1
+
+                record['seconds'] = round((time.perf_counter() - start) / len(group), 3)
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                # Flush every record so a crash loses at most the item in progress
+                manifest.flush()
+                os.fsync(manifest.fileno())
+
+                finished += 1
+                if progress is not None:
+                    progress(finished, counts['total'])
+
+    return dict(counts, manifest=manifest_path, success=counts['failed'] == 0)
+
+
+def convert_batch(source, output_dir, **kwargs):
+    """
+    Convert a directory or ZIP of menu images from synchronous code.
+
+    Args:
+        source: Directory or ZIP file of menu images
+        output_dir: Directory for the output files and the manifest
+        kwargs: Options for convert_batch_async
+
+    Returns:
+        Dictionary from convert_batch_async
+    """
+    return asyncio.run(convert_batch_async(source, output_dir, **kwargs))
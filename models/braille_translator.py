@@ -1,6 +1,7 @@
-from transformers import pipeline
 import re
 
+from utils.metrics import stage_timer
+
 # English to Braille mapping (Grade 1 Braille) #
 BRAILLE_MAP = {
     'a': '⠁', 'b': '⠃', 'c': '⠉', 'd': '⠙', 'e': '⠑', 'f': '⠋', 'g': '⠛', 'h': '⠓', 'i': '⠊', 'j': '⠚',
@@ -13,6 +14,16 @@ BRAILLE_MAP = {
     ' ': '⠀'
 }
 
+# Translation tables built once from BRAILLE_MAP, so each conversion is a single str.translate pass
+BRAILLE_TABLE = str.maketrans(BRAILLE_MAP)
+# Single-cell signs map back to the first character that produces them, e.g. '⠁' to "[A]";
+# built in reverse so earlier characters overwrite later ones sharing a sign
+ASCII_BRAILLE_TABLE = {
+    ord(braille): f"[{char.upper()}]" for char, braille in reversed(BRAILLE_MAP.items()) if len(braille) == 1
+}
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
 # Initialize the summarization pipeline for context understanding
 summarizer = None
 
@@ -21,6 +32,9 @@ def get_summarizer():
     global summarizer
     if summarizer is None:
         try:
+            # Imported here so translating without context enhancement never loads transformers
+            from transformers import pipeline
+            
             # Use a small, efficient model for summarization
             summarizer = pipeline(
                 "summarization", 
@@ -43,15 +57,8 @@ def text_to_grade1_braille(text):
     Returns:
         Braille text
     """
-    braille_text = ""
-    for char in text.lower():
-        if char in BRAILLE_MAP:
-            braille_text += BRAILLE_MAP[char]
-        else:
-            # For characters not in our map, just keep the original
-            braille_text += char
-    
-    return braille_text
+    # Characters not in BRAILLE_MAP are kept as they are
+    return text.lower().translate(BRAILLE_TABLE)
 
 
 def text_to_braille(text, use_context=True):
@@ -66,11 +73,13 @@ def text_to_braille(text, use_context=True):
         Dictionary with Braille text and metadata
     """
     try:
-        # Basic Braille translation
-        braille_text = text_to_grade1_braille(text)
-        
-        # Create an ASCII representation for PDF
-        ascii_braille = unicode_braille_to_ascii(braille_text)
+        with stage_timer("translation"):
+            # Basic Braille translation
+            braille_text = text_to_grade1_braille(text)
+            
+            # A second scan of the original text (str.translate can't count
+            # words); done once here so callers don't repeat it
+            metadata = get_braille_metadata(text)
         
         # If context enhancement is enabled
         context_summary = None
@@ -79,22 +88,22 @@ def text_to_braille(text, use_context=True):
             if summarizer:
                 try:
                     # Generate a summary to understand context
-                    summary_result = summarizer(text)
+                    with stage_timer("summarization"):
+                        summary_result = summarizer(text)
                     if summary_result and len(summary_result) > 0:
                         context_summary = summary_result[0]['summary_text']
                 except Exception as e:
                     print(f"Summarization error: {str(e)}")
         
         # Format the Braille text for better readability
-        formatted_braille = format_braille_text(braille_text)
-        formatted_ascii = format_braille_text(ascii_braille)
+        with stage_timer("formatting"):
+            formatted_braille = format_braille_text(braille_text)
         
         return {
             'braille_text': braille_text,
             'formatted_braille': formatted_braille,
-            'ascii_braille': ascii_braille,
-            'formatted_ascii': formatted_ascii,
             'context_summary': context_summary,
+            'metadata': metadata,
             'success': True
         }
     except Exception as e:
@@ -114,22 +123,8 @@ def unicode_braille_to_ascii(braille_text):
     Returns:
         ASCII representation of Braille
     """
-    # Map each Braille character to a descriptive ASCII representation
-    result = ""
-    for char in braille_text:
-        if char in BRAILLE_MAP.values():
-            # For Braille characters, use a letter representation
-            for letter, braille in BRAILLE_MAP.items():
-                if braille == char and len(letter) == 1:
-                    result += f"[{letter.upper()}]"
-                    break
-            else:
-                result += "[?]"
-        else:
-            # For non-Braille characters, keep them as is
-            result += char
-    
-    return result
+    # Braille characters become a letter representation; other characters are kept as they are
+    return braille_text.translate(ASCII_BRAILLE_TABLE)
 
 def text_to_braille1(text, use_context=True):
     """
@@ -233,9 +228,9 @@ def get_braille_metadata(text):
     Returns:
         Dictionary with metadata
     """
-    word_count = len(re.findall(r'\b\w+\b', text))
+    word_count = len(WORD_PATTERN.findall(text))
     character_count = len(text)
-    line_count = len(text.split('\n'))
+    line_count = text.count('\n') + 1
     
     return {
         'word_count': word_count,
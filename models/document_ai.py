@@ -1,5 +1,3 @@
-import torch
-from transformers import LayoutLMv2Processor, LayoutLMv2ForSequenceClassification
 from PIL import Image
 import numpy as np
 import pytesseract
@@ -11,6 +9,9 @@ model = None
 def get_document_ai_models():
     """Get or initialize document AI models with proper caching."""
     global processor, model
+    # Imported here so OCR alone, e.g. in the OCR worker processes, never loads torch
+    from transformers import LayoutLMv2Processor, LayoutLMv2ForSequenceClassification
+    
     if processor is None:
         processor = LayoutLMv2Processor.from_pretrained("microsoft/layoutlmv2-base-uncased")
     if model is None:
@@ -24,23 +25,50 @@ def extract_text_with_tesseract(image):
     else:
         pil_image = image.convert("RGB")
     
-    # Use pytesseract for OCR
-    text = pytesseract.image_to_string(pil_image)
-    
-    # Get word boxes for structure
+    # One Tesseract run gives the words with their boxes and lines; the text is rebuilt from them
     boxes = pytesseract.image_to_data(pil_image, output_type=pytesseract.Output.DICT)
     
     # Extract words and their positions
     words = []
     word_boxes = []
+    word_lines = []
     
     for i in range(len(boxes['text'])):
         if boxes['text'][i].strip() != '':
             words.append(boxes['text'][i])
             x, y, w, h = boxes['left'][i], boxes['top'][i], boxes['width'][i], boxes['height'][i]
             word_boxes.append([x, y, x + w, y + h])
+            word_lines.append((boxes['block_num'][i], boxes['par_num'][i], boxes['line_num'][i]))
+    
+    return words, word_boxes, word_lines
+
+def join_words_into_text(words, word_lines):
+    """
+    Rebuild the text layout from Tesseract's block/paragraph/line numbers.
+    
+    Args:
+        words: List of recognized words
+        word_lines: List of (block_num, par_num, line_num) tuples, one per word
+        
+    Returns:
+        Text with one line per OCR line and blank lines between paragraphs
+    """
+    text = ""
+    previous = None
+    
+    for word, line_id in zip(words, word_lines):
+        if previous is None:
+            pass
+        elif line_id[:2] != previous[:2]:
+            text += "\n\n"
+        elif line_id != previous:
+            text += "\n"
+        else:
+            text += " "
+        text += word
+        previous = line_id
     
-    return words, word_boxes
+    return text
 
 def extract_text_and_layout(image):
     """
@@ -57,18 +85,20 @@ def extract_text_and_layout(image):
         image = Image.fromarray(image).convert("RGB")
     
     # Extract text using Tesseract
-    words, boxes = extract_text_with_tesseract(image)
+    words, boxes, word_lines = extract_text_with_tesseract(image)
     
     # If no words were found, return empty result
     if not words:
         return {
             'words': [],
             'boxes': [],
+            'text': '',
             'success': False
         }
     
     return {
         'words': words,
         'boxes': boxes,
+        'text': join_words_into_text(words, word_lines),
         'success': True
     }
@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import time
+
+# Stand-in for the structuring LLM, used for load tests and development
+# without a GPU. Select it with MENU_LLM_BACKEND=fake. The latency settings
+# can be overridden with environment variables.
+FAKE_MODEL_ID = "fake/menu-structurer"
+FAKE_LLM_LATENCY = float(os.environ.get("FAKE_LLM_LATENCY", 0.5))
+FAKE_LLM_TOKEN_LATENCY = float(os.environ.get("FAKE_LLM_TOKEN_LATENCY", 0.01))
+
+# Characters per token, for counting, chunking and streaming
+CHARS_PER_TOKEN = 4
+
+PRICE_PATTERN = re.compile(r'^(?P<name>.*?)\s*(?P<price>[$€£]?\d+[.,]\d{2})\s*$')
+SECTION_PATTERN = re.compile(r'^[A-Z][A-Z &\'-]{2,}$')
+
+
+class FakeTokenizer:
+    """
+    Tokenizer interface used by the text processor, without a vocabulary.
+
+    Text is split into pieces of CHARS_PER_TOKEN characters, which stand in
+    for token IDs, so counting and truncation behave like a real tokenizer.
+    """
+
+    chat_template = None
+    eos_token_id = 0
+
+    def __init__(self):
+        self.pad_token_id = None
+        self.padding_side = 'right'
+
+    def __call__(self, text, add_special_tokens=True):
+        pieces = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+        return {'input_ids': pieces}
+
+    def decode(self, token_ids, **kwargs):
+        return ''.join(token_ids)
+
+
+def fake_menu_data(prompt):
+    """
+    Structure the menu lines in a prompt with simple rules.
+
+    Upper-case lines become sections, lines ending in a price become items
+    and other lines become the description of the item before them. The
+    same prompt always gives the same menu.
+
+    Args:
+        prompt: Structuring prompt containing the OCR text
+
+    Returns:
+        menu_data dictionary
+    """
+    sections = []
+    item = None
+    for line in prompt.splitlines():
+        line = line.strip()
+        price_match = PRICE_PATTERN.match(line)
+        if SECTION_PATTERN.match(line):
+            sections.append({'section_name': line.title(), 'items': []})
+            item = None
+        elif price_match and price_match.group('name'):
+            if not sections:
+                sections.append({'section_name': "Menu", 'items': []})
+            item = {'name': price_match.group('name'), 'description': "", 'price': price_match.group('price')}
+            sections[-1]['items'].append(item)
+        elif item is not None and line and not item['description']:
+            item['description'] = line
+        else:
+            # Prompt instructions between menus end the current item
+            item = None
+
+    return {'menu_sections': [section for section in sections if section['items']]}
+
+
+class FakeTextPipeline:
+    """
+    Deterministic replacement for the transformers text-generation pipeline.
+
+    Answers with the JSON of fake_menu_data after a delay of latency
+    seconds plus token_latency seconds per generated token, like a model
+    that is compute-bound on decoding. Batched calls pay the delay once for
+    the longest answer, and streamers receive the answer token by token.
+    """
+
+    def __init__(self, latency=FAKE_LLM_LATENCY, token_latency=FAKE_LLM_TOKEN_LATENCY):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.tokenizer = FakeTokenizer()
+
+    def _respond(self, prompt):
+        """Build the answer to one prompt and split it into tokens."""
+        response = json.dumps(fake_menu_data(prompt), indent=2)
+        return response, self.tokenizer(response)['input_ids']
+
+    def __call__(self, prompts, streamer=None, **generation_kwargs):
+        if isinstance(prompts, str):
+            response, tokens = self._respond(prompts)
+            time.sleep(self.latency)
+            if streamer is None:
+                time.sleep(self.token_latency * len(tokens))
+            else:
+                for token in tokens:
+                    time.sleep(self.token_latency)
+                    streamer.on_finalized_text(token)
+                streamer.end()
+            return [{'generated_text': response}]
+
+        answers = [self._respond(prompt) for prompt in prompts]
+        longest = max((len(tokens) for _, tokens in answers), default=0)
+        time.sleep(self.latency + self.token_latency * longest)
+        return [[{'generated_text': response}] for response, _ in answers]
@@ -0,0 +1,399 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from utils.image_preprocessing import preprocess_image
+from utils.document_loader import list_menu_pages, load_menu_page
+from utils.metrics import record_stages, run_timed, stage_timer
+from utils.profiling import profiled, profiling_active
+from models.document_ai import extract_text_and_layout
+from models.text_processor import process_menu_text
+from models.braille_translator import text_to_braille
+
+# Pipeline executor sizes (can be overridden with environment variables)
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", os.cpu_count() or 1))
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", os.cpu_count() or 1))
+
+# Initialize with None - will be created on first use
+preprocess_pool = None
+ocr_pool = None
+model_pool = None
+_pipeline_pools_lock = threading.Lock()
+
+
+def get_pipeline_executors():
+    """
+    Get or initialize the executors used by the pipeline stages.
+
+    OpenCV releases the GIL, so preprocessing runs in a thread pool.
+    Tesseract and the PIL conversions around it run in a process pool. The
+    LLM and BART share one worker thread, so model calls from concurrent
+    requests run one at a time instead of competing for memory and device.
+
+    Returns:
+        Tuple of (preprocess executor, OCR executor, model executor)
+    """
+    global preprocess_pool, ocr_pool, model_pool
+    if model_pool is None:
+        with _pipeline_pools_lock:
+            if model_pool is None:
+                preprocess_pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="preprocess")
+                # Spawned workers don't inherit model weights or server threads from the app process
+                ocr_pool = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                model_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+    return preprocess_pool, ocr_pool, model_pool
+
+
+async def _run_stage(executor, stage, function, *args, trace=None):
+    """
+    Run a measured pipeline stage in an executor.
+
+    Args:
+        executor: Executor to run the stage in
+        stage: Stage name for the metrics
+        function: Function to call
+        args: Arguments for function
+        trace: Optional list collecting the stage records of the request
+
+    Returns:
+        Result of function
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        if profiling_active():
+            # Profiled requests run inline so cProfile and tracemalloc see the work
+            result, records = run_timed(stage, function, *args)
+        else:
+            result, records = await loop.run_in_executor(executor, run_timed, stage, function, *args)
+    except Exception:
+        # The worker's records are lost with the exception, so the failure is recorded here
+        record_stages([{
+            'stage': stage,
+            'error': True,
+            'wall_seconds': time.perf_counter() - start,
+            'cpu_seconds': None,
+            'rss_delta_bytes': None
+        }], trace)
+        raise
+    record_stages(records, trace)
+    return result
+
+
+def _structure_text(raw_text, use_llm, menu_id):
+    """Structure extracted text with the LLM, falling back to the raw text."""
+    if not use_llm:
+        return raw_text
+
+    processed_result = process_menu_text(raw_text, menu_id=menu_id)
+    if processed_result['success']:
+        return processed_result['structured_text']
+    return raw_text
+
+
+def extract_page_text(path, page_index=None):
+    """
+    Load, preprocess and OCR one page of a menu file.
+
+    Runs in an OCR worker process, so only the file path crosses the process
+    boundary and each worker holds a single page's raster at a time.
+
+    Args:
+        path: File path of a PDF or image
+        page_index: Page of the PDF, or None for an image file
+
+    Returns:
+        Extracted text, or an empty string if no text was found
+    """
+    with stage_timer("rasterize"):
+        image = load_menu_page(path, page_index)
+    with stage_timer("preprocess"):
+        preprocessed_img = preprocess_image(image)
+    result = extract_text_and_layout(preprocessed_img)
+
+    if not result.get('words', []):
+        return ''
+    return result.get('text') or ' '.join(result['words'])
+
+
+async def extract_menu_text_async(image, trace=None):
+    """
+    Preprocess an image and extract its text.
+
+    Args:
+        image: PIL Image or numpy array
+        trace: Optional list collecting the stage records of the request
+
+    Returns:
+        Extracted text, or an empty string if no text was found
+    """
+    preprocess_executor, ocr_executor, _ = get_pipeline_executors()
+
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+
+    preprocessed_img = await _run_stage(preprocess_executor, "preprocess", preprocess_image, image, trace=trace)
+    result = await _run_stage(ocr_executor, "ocr", extract_text_and_layout, preprocessed_img, trace=trace)
+
+    if not result.get('words', []):
+        return ''
+    return result.get('text') or ' '.join(result['words'])
+
+
+async def extract_document_text_async(paths, trace=None):
+    """
+    Extract the text of a multi-page menu, OCR'ing its pages in parallel.
+
+    Args:
+        paths: File paths of PDFs and images, in reading order
+        trace: Optional list collecting the stage records of the request
+
+    Returns:
+        Text of all pages in reading order, or an empty string if no text
+        was found
+    """
+    loop = asyncio.get_running_loop()
+    preprocess_executor, ocr_executor, _ = get_pipeline_executors()
+
+    pages = await loop.run_in_executor(preprocess_executor, list_menu_pages, paths)
+    texts = await asyncio.gather(*(
+        _run_stage(ocr_executor, "ocr", extract_page_text, path, page_index, trace=trace)
+        for path, page_index in pages
+    ))
+
+    # The LLM chunks long text and merges sections that continue onto the next page
+    return '\n\n'.join(text for text in texts if text)
+
+
+async def structure_menu_text_async(raw_text, use_llm=True, menu_id=None, trace=None):
+    """
+    Structure extracted text on the model worker.
+
+    Args:
+        raw_text: Text extracted from the image
+        use_llm: Whether to use the LLM at all
+        menu_id: Optional menu ID for incremental re-structuring
+        trace: Optional list collecting the stage records of the request
+
+    Returns:
+        Structured text, or raw_text if the LLM is disabled or fails
+    """
+    _, _, model_executor = get_pipeline_executors()
+    return await _run_stage(model_executor, "structuring", _structure_text, raw_text, use_llm, menu_id, trace=trace)
+
+
+async def translate_menu_text_async(processed_text, use_context=True, trace=None):
+    """
+    Translate processed text to Braille and compute its metadata.
+
+    Args:
+        processed_text: Text to translate
+        use_context: Whether to use AI for context enhancement
+        trace: Optional list collecting the stage records of the request
+
+    Returns:
+        Tuple of (result from text_to_braille, metadata dictionary)
+    """
+    preprocess_executor, _, model_executor = get_pipeline_executors()
+
+    # Context enhancement runs BART, so it goes to the model worker; plain
+    # translation doesn't have to wait behind LLM calls
+    executor = model_executor if use_context else preprocess_executor
+    braille_result = await _run_stage(executor, "braille", text_to_braille, processed_text, use_context, trace=trace)
+    return braille_result, braille_result.get('metadata')
+
+
+def convert_menu_image_fast(image):
+    """
+    Convert a menu image with OCR and Braille translation only.
+
+    The lightweight mode for when AI text processing and context
+    enhancement are both off: the stages run one after another in the
+    calling thread, without executors, worker processes or any model. The
+    metadata is the one text_to_braille computes, so it isn't counted again.
+
+    Args:
+        image: PIL Image or numpy array
+
+    Returns:
+        Dictionary shaped like process_menu_image_async's result
+    """
+    trace = []
+    try:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+
+        with stage_timer("preprocess", trace):
+            preprocessed_img = preprocess_image(image)
+        with stage_timer("ocr", trace):
+            result = extract_text_and_layout(preprocessed_img)
+
+        if not result.get('words', []):
+            return {
+                'raw_text': '',
+                'error': "No text was extracted from the image.",
+                'trace': trace,
+                'success': False
+            }
+        raw_text = result.get('text') or ' '.join(result['words'])
+
+        with stage_timer("braille", trace):
+            braille_result = text_to_braille(raw_text, use_context=False)
+        if not braille_result['success']:
+            return {
+                'raw_text': raw_text,
+                'processed_text': raw_text,
+                'error': "Braille translation failed.",
+                'trace': trace,
+                'success': False
+            }
+
+        return {
+            'raw_text': raw_text,
+            'processed_text': raw_text,
+            'braille_text': braille_result['formatted_braille'],
+            'metadata': braille_result['metadata'],
+            'trace': trace,
+            'success': True
+        }
+    except Exception as e:
+        return {
+            'raw_text': '',
+            'error': f"Error processing image: {str(e)}",
+            'trace': trace,
+            'success': False
+        }
+
+
+async def _process_menu(extraction, use_llm, use_context, menu_id, trace):
+    """Structure and translate the text from an extraction coroutine."""
+    try:
+        raw_text = await extraction
+        if not raw_text:
+            return {
+                'raw_text': '',
+                'error': "No text was extracted from the image.",
+                'trace': trace,
+                'success': False
+            }
+
+        processed_text = await structure_menu_text_async(raw_text, use_llm, menu_id, trace)
+        braille_result, metadata = await translate_menu_text_async(processed_text, use_context, trace)
+
+        if not braille_result['success']:
+            return {
+                'raw_text': raw_text,
+                'processed_text': processed_text,
+                'error': "Braille translation failed.",
+                'trace': trace,
+                'success': False
+            }
+
+        return {
+            'raw_text': raw_text,
+            'processed_text': processed_text,
+            'braille_text': braille_result['formatted_braille'],
+            'metadata': metadata,
+            'trace': trace,
+            'success': True
+        }
+    except Exception as e:
+        return {
+            'raw_text': '',
+            'error': f"Error processing image: {str(e)}",
+            'trace': trace,
+            'success': False
+        }
+
+
+async def process_menu_image_async(image, use_llm=True, use_context=True, menu_id=None):
+    """
+    Run the full menu pipeline for one image.
+
+    Each stage waits in its own executor, so while one request is on the
+    model worker other requests can be preprocessed and OCR'd.
+
+    Args:
+        image: PIL Image or numpy array
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+        menu_id: Optional menu ID for incremental re-structuring
+
+    Returns:
+        Dictionary with the raw, processed and Braille text, metadata and
+        the stage records under 'trace'
+    """
+    trace = []
+    return await _process_menu(extract_menu_text_async(image, trace), use_llm, use_context, menu_id, trace)
+
+
+async def process_menu_document_async(paths, use_llm=True, use_context=True, menu_id=None):
+    """
+    Run the full menu pipeline for a multi-page menu.
+
+    The pages of all files are OCR'd in parallel and combined into one
+    structured menu.
+
+    Args:
+        paths: File paths of PDFs and images, in reading order
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+        menu_id: Optional menu ID for incremental re-structuring
+
+    Returns:
+        Dictionary from process_menu_image_async
+    """
+    trace = []
+    return await _process_menu(extract_document_text_async(paths, trace), use_llm, use_context, menu_id, trace)
+
+
+async def process_menu_images_async(images, use_llm=True, use_context=True):
+    """
+    Run the pipeline for several images concurrently.
+
+    Args:
+        images: Iterable of PIL Images or numpy arrays
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+
+    Returns:
+        List of results from process_menu_image_async, in input order
+    """
+    return await asyncio.gather(*(
+        process_menu_image_async(image, use_llm, use_context) for image in images
+    ))
+
+
+def run_menu_pipeline(image, use_llm=True, use_context=True, menu_id=None, profile=False):
+    """
+    Run the full menu pipeline for one image from synchronous code.
+
+    Args:
+        image: PIL Image or numpy array
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+        menu_id: Optional menu ID for incremental re-structuring
+        profile: Whether to profile this run regardless of PROFILE_SAMPLE_RATE
+
+    Returns:
+        Dictionary from process_menu_image_async, with the profile report
+        path under 'profile' if the run was profiled
+    """
+    with profiled("process_image", force=profile) as profile_info:
+        if not use_llm and not use_context:
+            # No stage needs a model, so the lightweight mode skips the executors
+            result = convert_menu_image_fast(image)
+        else:
+            result = asyncio.run(process_menu_image_async(image, use_llm, use_context, menu_id))
+    if profile_info is not None:
+        result['profile'] = profile_info['report']
+    return result
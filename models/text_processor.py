@@ -1,23 +1,119 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-import torch
+from threading import Thread
+import os
+import re
 import json
+import time
+import difflib
+
+from utils.menu_cache import get_menu_cache, make_cache_key, hash_menu_text
+from utils.metrics import stage_timer
+from models.fake_llm import FAKE_MODEL_ID, FakeTextPipeline
 
 # Model ID for a smaller model suitable for Spaces
 MODEL_ID = "meta-llama/Meta-Llama-3-8B-Instruct"
 FALLBACK_MODEL_ID = "mistralai/Mistral-7B-Instruct-v0.2"
 
+# "hf" loads the models above; "fake" uses the deterministic stand-in from
+# models/fake_llm.py, for load tests without a GPU
+LLM_BACKEND = os.environ.get("MENU_LLM_BACKEND", "hf")
+
+# Bump whenever the structuring prompt changes so cached results are not reused
+PROMPT_VERSION = "2"
+
+# Token limits for a single LLM call
+MAX_NEW_TOKENS = 1024
+# The tokenizers don't always report their context window, so it is listed here
+CONTEXT_WINDOWS = {
+    MODEL_ID: 8192,
+    FALLBACK_MODEL_ID: 32768
+}
+# The structured JSON is roughly twice as long as the OCR text it comes from,
+# so larger inputs are chunked to keep each answer within MAX_NEW_TOKENS
+MAX_INPUT_TOKENS = int(os.environ.get("MENU_LLM_MAX_INPUT_TOKENS", 480))
+
+SYSTEM_PROMPT = """You are an AI assistant that helps structure menu text from OCR.
+Your task is to clean up the text, correct obvious OCR errors, and structure it properly.
+Identify menu sections, items, and prices.
+Format your response as JSON with menu sections, items, and prices."""
+
+USER_PROMPT_TEMPLATE = """Here is the raw text extracted from a menu image:
+
+{raw_text}
+{context_hint}
+Please clean and structure this menu text. Format your response as JSON with the following structure:
+{{
+    "menu_sections": [
+        {{
+            "section_name": "Section name (e.g., Appetizers, Main Course, etc.)",
+            "items": [
+                {{
+                    "name": "Item name",
+                    "description": "Item description if available",
+                    "price": "Price if available"
+                }}
+            ]
+        }}
+    ]
+}}"""
+
+# Number of menus sent to the LLM in one batched call by process_menu_texts
+LLM_BATCH_SIZE = int(os.environ.get("MENU_LLM_BATCH_SIZE", 4))
+
+# Region size used when re-structuring menus incrementally
+REGION_MIN_LINES = 4
+REGION_MAX_LINES = 12
+
+# Small draft models for speculative (assisted) decoding; they must share the main model's tokenizer
+DRAFT_MODEL_IDS = {
+    MODEL_ID: "meta-llama/Llama-3.2-1B-Instruct",
+    FALLBACK_MODEL_ID: None
+}
+
+# Generation settings per decoding mode
+DECODING_MODES = {
+    # Original behaviour: low-temperature sampling
+    "sample": {
+        "do_sample": True,
+        "temperature": 0.3,
+        "top_p": 0.95,
+        "repetition_penalty": 1.15
+    },
+    # Deterministic output, so identical menus always structure identically
+    "greedy": {
+        "do_sample": False,
+        "repetition_penalty": 1.15
+    },
+    # Greedy output verified against tokens proposed by the draft model
+    "speculative": {
+        "do_sample": False,
+        "repetition_penalty": 1.15
+    }
+}
+DEFAULT_DECODING = os.environ.get("MENU_LLM_DECODING", "sample")
+
 # Initialize with None - will be loaded on first use
 tokenizer = None
 text_generation_pipeline = None
+loaded_model_id = None
+draft_model = None
 
 def get_text_pipeline():
     """
     Initialize or return the text generation pipeline.
     Uses smaller models that work well on Spaces.
     """
-    global tokenizer, text_generation_pipeline
+    global tokenizer, text_generation_pipeline, loaded_model_id
+    
+    if text_generation_pipeline is None and LLM_BACKEND == "fake":
+        text_generation_pipeline = FakeTextPipeline()
+        tokenizer = text_generation_pipeline.tokenizer
+        loaded_model_id = FAKE_MODEL_ID
     
     if text_generation_pipeline is None:
+        # Imported here so paths that never call the LLM don't load torch and transformers
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+        
         try:
             # Try to load primary model
             tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
@@ -35,12 +131,9 @@ def get_text_pipeline():
                 "text-generation",
                 model=model,
                 tokenizer=tokenizer,
-                max_new_tokens=1024,
-                do_sample=True,
-                temperature=0.3,
-                top_p=0.95,
-                repetition_penalty=1.15
+                max_new_tokens=MAX_NEW_TOKENS
             )
+            loaded_model_id = MODEL_ID
             
         except Exception as e:
             print(f"Error loading primary model: {str(e)}")
@@ -60,121 +153,925 @@ def get_text_pipeline():
                     "text-generation",
                     model=model,
                     tokenizer=tokenizer,
-                    max_new_tokens=1024,
-                    do_sample=True,
-                    temperature=0.3,
-                    top_p=0.95,
-                    repetition_penalty=1.15
+                    max_new_tokens=MAX_NEW_TOKENS
                 )
+                loaded_model_id = FALLBACK_MODEL_ID
             except Exception as e2:
                 print(f"Error loading fallback model: {str(e2)}")
                 return None
     
     return text_generation_pipeline
 
-def process_menu_text(raw_text):
+def get_draft_model():
     """
-    Process raw OCR text using LLM to improve structure and readability.
+    Initialize or return the draft model used for speculative decoding.
+    
+    Returns:
+        The draft model, or None if the loaded model has no compatible draft model
+    """
+    global draft_model
+    
+    if draft_model is None:
+        draft_model_id = DRAFT_MODEL_IDS.get(loaded_model_id)
+        if draft_model_id is None:
+            return None
+        
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM
+            
+            draft_model = AutoModelForCausalLM.from_pretrained(
+                draft_model_id,
+                device_map="auto",
+                torch_dtype=torch.float16
+            )
+        except Exception as e:
+            print(f"Error loading draft model: {str(e)}")
+            # Don't retry on every call
+            DRAFT_MODEL_IDS[loaded_model_id] = None
+            return None
+    
+    return draft_model
+
+def get_generation_kwargs(decoding=None):
+    """
+    Get the generation arguments for a decoding mode.
+    
+    Args:
+        decoding: One of DECODING_MODES ("sample", "greedy" or "speculative");
+            defaults to DEFAULT_DECODING
+        
+    Returns:
+        Keyword arguments to pass to the text generation pipeline
+    """
+    decoding = decoding or DEFAULT_DECODING
+    if decoding not in DECODING_MODES:
+        raise ValueError(f"Unknown decoding mode: {decoding}")
+    
+    kwargs = dict(DECODING_MODES[decoding])
+    
+    if decoding == "speculative":
+        assistant = get_draft_model()
+        if assistant is not None:
+            kwargs["assistant_model"] = assistant
+        else:
+            print("No draft model available, using greedy decoding")
+    
+    return kwargs
+
+def menu_data_to_text(menu_data):
+    """
+    Render structured menu data as plain text.
+    
+    Args:
+        menu_data: Dictionary with a 'menu_sections' list
+        
+    Returns:
+        Structured menu text
+    """
+    structured_text = ""
+    for section in menu_data.get('menu_sections', []):
+        structured_text += f"{section.get('section_name', 'Menu Items')}\n"
+        structured_text += "-" * len(section.get('section_name', 'Menu Items')) + "\n\n"
+        
+        for item in section.get('items', []):
+            structured_text += f"{item.get('name', '')}"
+            if item.get('price'):
+                structured_text += f" - {item.get('price')}"
+            structured_text += "\n"
+            
+            if item.get('description'):
+                structured_text += f"  {item.get('description')}\n"
+            
+            structured_text += "\n"
+        
+        structured_text += "\n"
+    
+    return structured_text
+
+def cache_decoding_mode(decoding=None):
+    """
+    Return the decoding mode a structured menu is cached under.
+    
+    Sampled and greedy output differ, so they are cached separately;
+    speculative decoding produces exactly the greedy output and shares
+    its entries.
+    
+    Args:
+        decoding: Decoding mode, see DECODING_MODES; defaults to DEFAULT_DECODING
+        
+    Returns:
+        Decoding mode name for make_cache_key
+    """
+    decoding = decoding or DEFAULT_DECODING
+    return "greedy" if decoding == "speculative" else decoding
+
+def cached_model_ids():
+    """
+    Return the models whose cached results can be used without loading the LLM.
+    
+    Returns:
+        The loaded model's ID, or every model the configured backend may load
+    """
+    if loaded_model_id:
+        return [loaded_model_id]
+    if LLM_BACKEND == "fake":
+        return [FAKE_MODEL_ID]
+    return [MODEL_ID, FALLBACK_MODEL_ID]
+
+def get_cached_menu_data(raw_text, decoding=None):
+    """
+    Look up previously structured menu data for this OCR text.
+    
+    Checks the model that is already loaded, or every candidate model
+    if none is loaded yet, so a cache hit never requires loading the LLM.
+    
+    Args:
+        raw_text: Raw text extracted from menu image
+        decoding: Decoding mode, see DECODING_MODES
+        
+    Returns:
+        Cached menu_data dictionary, or None on a miss
+    """
+    cache = get_menu_cache()
+    if cache is None:
+        return None
+    
+    for model_id in cached_model_ids():
+        try:
+            menu_data = cache.get(make_cache_key(raw_text, model_id, PROMPT_VERSION, cache_decoding_mode(decoding)))
+        except Exception as e:
+            print(f"Menu cache lookup error: {str(e)}")
+            return None
+        if menu_data is not None:
+            return menu_data
+    
+    return None
+
+def store_cached_menu_data(raw_text, menu_data, decoding=None):
+    """Store structured menu data for the currently loaded model and the decoding mode."""
+    cache = get_menu_cache()
+    if cache is None or loaded_model_id is None:
+        return
+    
+    try:
+        cache.set(make_cache_key(raw_text, loaded_model_id, PROMPT_VERSION, cache_decoding_mode(decoding)), menu_data)
+    except Exception as e:
+        print(f"Menu cache store error: {str(e)}")
+
+def has_chat_template():
+    """Check whether the loaded tokenizer provides a chat template."""
+    return tokenizer is not None and bool(getattr(tokenizer, 'chat_template', None))
+
+def build_menu_prompt(raw_text, context_section=None):
+    """
+    Build the structuring prompt for a piece of menu text.
+    
+    Uses the loaded tokenizer's chat template so the prompt matches the
+    format the model was trained on.
+    
+    Args:
+        raw_text: Raw text extracted from menu image
+        context_section: Name of the section the text continues, if any
+        
+    Returns:
+        Prompt string for the text generation pipeline
+    """
+    context_hint = ""
+    if context_section:
+        context_hint = (
+            f'\nThese lines continue the menu section "{context_section}". '
+            "Use that section name for items that appear before any new section heading.\n"
+        )
+    
+    user_prompt = USER_PROMPT_TEMPLATE.format(raw_text=raw_text, context_hint=context_hint)
+    
+    if not has_chat_template():
+        return f"{SYSTEM_PROMPT}\n\n{user_prompt}\n"
+    
+    messages = [
+        {'role': 'system', 'content': SYSTEM_PROMPT},
+        {'role': 'user', 'content': user_prompt}
+    ]
+    
+    try:
+        return tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    except Exception:
+        # Some templates (e.g. Mistral's) reject a system turn, so fold it into the user turn
+        messages = [{'role': 'user', 'content': f"{SYSTEM_PROMPT}\n\n{user_prompt}"}]
+        return tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+def count_tokens(text):
+    """Count tokens with the loaded tokenizer, or estimate if none is loaded."""
+    if tokenizer is None:
+        return len(text) // 4
+    return len(tokenizer(text, add_special_tokens=False)['input_ids'])
+
+def get_input_token_budget():
+    """
+    Get the number of OCR text tokens that fit in a single prompt.
+    
+    Returns:
+        MAX_INPUT_TOKENS, reduced if the model's context window can't hold
+        the prompt, the text and MAX_NEW_TOKENS of output
+    """
+    context_window = CONTEXT_WINDOWS.get(loaded_model_id, 4096)
+    prompt_overhead = count_tokens(build_menu_prompt(""))
+    return max(1, min(MAX_INPUT_TOKENS, context_window - MAX_NEW_TOKENS - prompt_overhead))
+
+def truncate_to_tokens(text, max_tokens):
+    """Truncate text to at most max_tokens tokens."""
+    if tokenizer is None:
+        return text[:max_tokens * 4]
+    input_ids = tokenizer(text, add_special_tokens=False)['input_ids']
+    return tokenizer.decode(input_ids[:max_tokens])
+
+def chunk_menu_text(raw_text, max_tokens):
+    """
+    Split menu text into chunks that fit the prompt token budget.
+    
+    Chunks follow region boundaries (see split_menu_regions); regions that
+    are too large are split by line, and single lines that are still too
+    large are truncated.
+    
+    Args:
+        raw_text: Raw text extracted from menu image
+        max_tokens: Token budget per chunk
+        
+    Returns:
+        List of text chunks, in menu order
+    """
+    if count_tokens(raw_text) <= max_tokens:
+        return [raw_text]
+    
+    pieces = []
+    for region in split_menu_regions(raw_text):
+        if count_tokens(region) <= max_tokens:
+            pieces.append(region)
+        else:
+            pieces.extend(truncate_to_tokens(line, max_tokens) for line in region.split('\n'))
+    
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append('\n'.join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    
+    if current:
+        chunks.append('\n'.join(current))
+    
+    return chunks
+
+def new_usage():
+    """Create an empty LLM usage record."""
+    return {
+        'llm_calls': 0,
+        'prompt_tokens': 0,
+        'generated_tokens': 0,
+        'latency': 0.0
+    }
+
+def record_usage(usage, prompt, response, latency):
+    """Add one LLM call to a usage record."""
+    if usage is None:
+        return
+    usage['llm_calls'] += 1
+    usage['prompt_tokens'] += count_tokens(prompt)
+    usage['generated_tokens'] += count_tokens(response)
+    usage['latency'] += latency
+
+def log_usage(usage):
+    """Print a usage record so prompt sizes and costs can be tuned."""
+    if usage['llm_calls']:
+        print(
+            f"LLM usage: {usage['llm_calls']} calls, {usage['prompt_tokens']} prompt tokens, "
+            f"{usage['generated_tokens']} generated tokens, {usage['latency']:.2f}s"
+        )
+
+def generate_menu_response(pipeline, text, context_section=None, decoding=None, usage=None, streamer=None):
+    """
+    Run the LLM on one piece of menu text.
+    
+    Args:
+        pipeline: Text generation pipeline
+        text: Menu text that fits the prompt token budget
+        context_section: Name of the section the text continues, if any
+        decoding: Decoding mode, see DECODING_MODES
+        usage: Optional usage record to update
+        streamer: Optional streamer that receives the generated text
+        
+    Returns:
+        Generated text
+    """
+    prompt = build_menu_prompt(text, context_section)
+    generation_kwargs = get_generation_kwargs(decoding)
+    if streamer is not None:
+        generation_kwargs['streamer'] = streamer
+    
+    start = time.perf_counter()
+    with stage_timer("llm"):
+        response = pipeline(
+            prompt,
+            return_full_text=False,
+            # Chat templates already add the special tokens
+            add_special_tokens=not has_chat_template(),
+            **generation_kwargs
+        )[0]['generated_text']
+    record_usage(usage, prompt, response, time.perf_counter() - start)
+    
+    return response
+
+def structure_menu_text(pipeline, text, context_section=None, decoding=None, usage=None):
+    """
+    Structure menu text of any length, chunking it to fit the token budget.
+    
+    Args:
+        pipeline: Text generation pipeline
+        text: Menu text
+        context_section: Name of the section the text continues, if any
+        decoding: Decoding mode, see DECODING_MODES
+        usage: Optional usage record to update
+        
+    Returns:
+        List of section dictionaries
+        
+    Raises:
+        ValueError: If an LLM response can't be parsed as JSON
+    """
+    sections = []
+    
+    for chunk in chunk_menu_text(text, get_input_token_budget()):
+        if sections:
+            context_section = sections[-1].get('section_name')
+        
+        menu_data = parse_menu_response(
+            generate_menu_response(pipeline, chunk, context_section, decoding, usage)
+        )
+        if menu_data is None:
+            raise ValueError("Failed to parse LLM response as JSON")
+        
+        sections.extend(menu_data.get('menu_sections', []))
+    
+    return sections
+
+def menu_result(raw_text, menu_data, use_cache=True, usage=None, decoding=None):
+    """
+    Build a successful processing result, caching the menu if requested.
+    
+    Args:
+        raw_text: Raw text the menu was structured from
+        menu_data: Structured menu data
+        use_cache: Whether to store the menu in the cache
+        usage: Optional usage record to include
+        decoding: Decoding mode the menu was structured with
+        
+    Returns:
+        Processed and structured menu text
+    """
+    if use_cache:
+        store_cached_menu_data(raw_text, menu_data, decoding)
+    
+    return {
+        'structured_text': menu_data_to_text(menu_data),
+        'menu_data': menu_data,
+        'success': True,
+        'cached': False,
+        'usage': usage or new_usage()
+    }
+
+def menu_failure(raw_text, error, usage=None):
+    """Build a failed processing result that falls back to the raw text."""
+    return {
+        'structured_text': raw_text,
+        'menu_sections': [],
+        'success': False,
+        'error': error,
+        'usage': usage or new_usage()
+    }
+
+def parse_menu_response(response):
+    """
+    Extract the menu JSON from an LLM response.
+    
+    Args:
+        response: Generated text
+        
+    Returns:
+        Parsed menu_data dictionary, or None if no JSON object was found
+    """
+    response_text = response.strip()
+    
+    # Find JSON in the response
+    json_start = response_text.find('{')
+    json_end = response_text.rfind('}') + 1
+    
+    if json_start >= 0 and json_end > json_start:
+        return json.loads(response_text[json_start:json_end])
+    
+    return None
+
+def split_menu_regions(text, min_lines=REGION_MIN_LINES, max_lines=REGION_MAX_LINES):
+    """
+    Split menu text into regions that can be structured independently.
+    
+    Paragraphs (blocks separated by blank lines) are grouped until a region
+    has at least min_lines lines, and no region grows past max_lines.
+    
+    Args:
+        text: Menu text with one OCR line per line
+        min_lines: Minimum number of lines per region
+        max_lines: Maximum number of lines per region
+        
+    Returns:
+        List of region strings
+    """
+    regions = []
+    current = []
+    
+    for paragraph in re.split(r'\n\s*\n', text):
+        lines = [line.strip() for line in paragraph.split('\n') if line.strip()]
+        
+        # Long paragraphs are split into fixed-size pieces
+        for start in range(0, len(lines), max_lines):
+            piece = lines[start:start + max_lines]
+            
+            if current and len(current) + len(piece) > max_lines:
+                regions.append(current)
+                current = []
+            
+            current.extend(piece)
+            
+            if len(current) >= min_lines:
+                regions.append(current)
+                current = []
+    
+    if current:
+        regions.append(current)
+    
+    return ['\n'.join(region) for region in regions]
+
+def merge_menu_sections(sections):
+    """
+    Merge adjacent sections that share a name.
+    
+    Args:
+        sections: List of section dictionaries
+        
+    Returns:
+        New list of sections with continuations folded into one section
+    """
+    merged = []
+    
+    for section in sections:
+        name = section.get('section_name', 'Menu Items')
+        if merged and merged[-1].get('section_name', 'Menu Items').casefold() == name.casefold():
+            merged[-1]['items'] = merged[-1].get('items', []) + section.get('items', [])
+        else:
+            merged.append(dict(section, items=list(section.get('items', []))))
+    
+    return merged
+
+def diff_menu_regions(previous_regions, region_hashes):
+    """
+    Carry over the sections of regions that are unchanged since the last run.
+    
+    Args:
+        previous_regions: Stored regions, each with 'hash' and 'sections'
+        region_hashes: Hashes of the current regions, in order
+        
+    Returns:
+        List with the previous sections of each unchanged region and None
+        for each region that has to be structured again
+    """
+    region_sections = [None] * len(region_hashes)
+    matcher = difflib.SequenceMatcher(
+        None, [region['hash'] for region in previous_regions], region_hashes, autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for offset in range(i2 - i1):
+                region_sections[j1 + offset] = previous_regions[i1 + offset]['sections']
+    
+    return region_sections
+
+def process_menu_text_incremental(raw_text, menu_id, decoding=None):
+    """
+    Re-structure only the parts of a menu that changed since the last run.
+    
+    The text is split into regions and diffed against the regions stored for
+    menu_id. Unchanged regions reuse their previous sections; only changed
+    regions are sent to the LLM, and the results are spliced back together.
     
     Args:
         raw_text: Raw text extracted from menu image
+        menu_id: Identifier of the menu (e.g. restaurant ID)
+        decoding: Decoding mode, see DECODING_MODES
         
     Returns:
         Processed and structured menu text
     """
+    cache = get_menu_cache()
+    regions = split_menu_regions(raw_text)
+    region_hashes = [hash_menu_text(region) for region in regions]
+    
+    decoding_mode = cache_decoding_mode(decoding)
+    
+    # Previous regions are only reusable if they came from the same prompt,
+    # model and decoding mode, the parts make_cache_key keys entries on
+    previous_regions = []
+    previous = cache.get_version(menu_id) if cache is not None else None
+    model_id = None
+    if (previous and previous.get('prompt_version') == PROMPT_VERSION
+            and previous.get('decoding') == decoding_mode
+            and previous.get('model_id') in cached_model_ids()):
+        previous_regions = previous.get('regions', [])
+        model_id = previous.get('model_id')
+    
+    region_sections = diff_menu_regions(previous_regions, region_hashes)
+    changed = [i for i, sections in enumerate(region_sections) if sections is None]
+    usage = new_usage()
+    
+    if changed:
+        pipeline = get_text_pipeline()
+        
+        if pipeline is None:
+            return menu_failure(raw_text, "LLM model not available")
+        
+        # Before the LLM was loaded any candidate model matched; if the one
+        # that loaded isn't the one the previous regions came from, none of
+        # them can be reused
+        if model_id is not None and model_id != loaded_model_id:
+            region_sections = [None] * len(regions)
+            changed = list(range(len(regions)))
+        model_id = loaded_model_id
+        
+        # Structure changed regions in order so each one knows the section it continues
+        for i in changed:
+            context_section = None
+            for sections in reversed(region_sections[:i]):
+                if sections:
+                    context_section = sections[-1].get('section_name')
+                    break
+            
+            try:
+                region_sections[i] = structure_menu_text(
+                    pipeline, regions[i], context_section, decoding, usage
+                )
+            except Exception as e:
+                log_usage(usage)
+                return menu_failure(raw_text, str(e), usage)
+        
+        log_usage(usage)
+    
+    if cache is not None:
+        try:
+            cache.set_version(menu_id, {
+                'model_id': model_id,
+                'prompt_version': PROMPT_VERSION,
+                'decoding': decoding_mode,
+                'regions': [
+                    {'hash': region_hash, 'sections': sections}
+                    for region_hash, sections in zip(region_hashes, region_sections)
+                ]
+            })
+        except Exception as e:
+            print(f"Menu cache store error: {str(e)}")
+    
+    menu_data = {
+        'menu_sections': merge_menu_sections(
+            [section for sections in region_sections for section in sections]
+        )
+    }
+    
+    result = menu_result(raw_text, menu_data, use_cache=False, usage=usage)
+    result.update({
+        'cached': not changed,
+        'regions_total': len(regions),
+        'regions_restructured': len(changed)
+    })
+    return result
+
+def process_menu_text(raw_text, use_cache=True, menu_id=None, decoding=None):
+    """
+    Process raw OCR text using LLM to improve structure and readability.
+    
+    Args:
+        raw_text: Raw text extracted from menu image
+        use_cache: Whether to reuse previously structured results
+        menu_id: Optional menu identifier; when given, only the regions that
+            changed since the last run for this menu are re-structured
+        decoding: Decoding mode, see DECODING_MODES
+        
+    Returns:
+        Processed and structured menu text, with LLM token counts and
+        latency under 'usage'
+    """
+    if menu_id:
+        return process_menu_text_incremental(raw_text, menu_id, decoding)
+    
+    if use_cache:
+        menu_data = get_cached_menu_data(raw_text, decoding)
+        if menu_data is not None:
+            result = menu_result(raw_text, menu_data, use_cache=False)
+            result['cached'] = True
+            return result
+    
     # Get the pipeline
     pipeline = get_text_pipeline()
     
     if pipeline is None:
         # Fallback to simple processing if model not available
-        return {
-            'structured_text': raw_text,
-            'menu_sections': [],
-            'success': False,
-            'error': "LLM model not available"
-        }
-    
-    # Construct prompt for the LLM
-    prompt = f"""<|system|>
-You are an AI assistant that helps structure menu text from OCR.
-Your task is to clean up the text, correct obvious OCR errors, and structure it properly.
-Identify menu sections, items, and prices.
-Format your response as JSON with menu sections, items, and prices.
-<|user|>
-Here is the raw text extracted from a menu image:
+        return menu_failure(raw_text, "LLM model not available")
+    
+    usage = new_usage()
+    
+    try:
+        # Generate the structured menu, one chunk at a time if the text is long
+        sections = structure_menu_text(pipeline, raw_text, decoding=decoding, usage=usage)
+        menu_data = {'menu_sections': merge_menu_sections(sections)}
+        result = menu_result(raw_text, menu_data, use_cache, usage, decoding)
+    except Exception as e:
+        result = menu_failure(raw_text, str(e), usage)
+    
+    log_usage(usage)
+    return result
 
-{raw_text}
+def generate_menu_responses(pipeline, texts, decoding=None, usage=None):
+    """
+    Run the LLM on several pieces of menu text in one batched call.
+    
+    Args:
+        pipeline: Text generation pipeline
+        texts: Menu texts that each fit the prompt token budget
+        decoding: Decoding mode, see DECODING_MODES
+        usage: Optional usage record to update
+        
+    Returns:
+        List of generated texts, in input order
+    """
+    # Decoder-only models must be padded on the left to generate in a batch
+    batch_tokenizer = pipeline.tokenizer
+    if batch_tokenizer.pad_token_id is None:
+        batch_tokenizer.pad_token_id = batch_tokenizer.eos_token_id
+    batch_tokenizer.padding_side = 'left'
+    
+    prompts = [build_menu_prompt(text) for text in texts]
+    
+    start = time.perf_counter()
+    with stage_timer("llm"):
+        outputs = pipeline(
+            prompts,
+            batch_size=len(prompts),
+            return_full_text=False,
+            add_special_tokens=not has_chat_template(),
+            **get_generation_kwargs(decoding)
+        )
+    latency = time.perf_counter() - start
+    
+    responses = [output[0]['generated_text'] for output in outputs]
+    for prompt, response in zip(prompts, responses):
+        record_usage(usage, prompt, response, latency / len(prompts))
+    
+    return responses
 
-Please clean and structure this menu text. Format your response as JSON with the following structure:
-{{
-    "menu_sections": [
-        {{
-            "section_name": "Section name (e.g., Appetizers, Main Course, etc.)",
-            "items": [
-                {{
-                    "name": "Item name",
-                    "description": "Item description if available",
-                    "price": "Price if available"
-                }}
-            ]
-        }}
-    ]
-}}
-<|assistant|>
-"""
+def process_menu_texts(raw_texts, use_cache=True, decoding=None, batch_size=LLM_BATCH_SIZE):
+    """
+    Process several menus, batching their LLM calls.
     
-    try:
-        # Generate response from LLM
-        response = pipeline(prompt, return_full_text=False)[0]['generated_text']
+    Menus that fit in a single prompt are generated batch_size at a time.
+    Cached menus, menus that need chunking and speculative decoding (which
+    doesn't support batches) go through process_menu_text one by one.
+    
+    Args:
+        raw_texts: List of raw texts extracted from menu images
+        use_cache: Whether to reuse previously structured results
+        decoding: Decoding mode, see DECODING_MODES
+        batch_size: Maximum number of menus per LLM call
+        
+    Returns:
+        List of results as returned by process_menu_text, in input order
+    """
+    results = [None] * len(raw_texts)
+    uncached = []
+    pending = []
+    
+    for index, raw_text in enumerate(raw_texts):
+        if use_cache and get_cached_menu_data(raw_text, decoding) is not None:
+            results[index] = process_menu_text(raw_text, use_cache, decoding=decoding)
+        else:
+            uncached.append(index)
+    
+    # Only load the LLM if some menu actually needs it
+    pipeline = get_text_pipeline() if uncached else None
+    speculative = (decoding or DEFAULT_DECODING) == "speculative"
+    
+    for index in uncached:
+        if pipeline is None:
+            results[index] = menu_failure(raw_texts[index], "LLM model not available")
+        elif speculative or count_tokens(raw_texts[index]) > get_input_token_budget():
+            results[index] = process_menu_text(raw_texts[index], use_cache, decoding=decoding)
+        else:
+            pending.append(index)
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        usage = new_usage()
+        
+        try:
+            responses = generate_menu_responses(pipeline, [raw_texts[index] for index in batch], decoding, usage)
+        except Exception as e:
+            for index in batch:
+                results[index] = menu_failure(raw_texts[index], str(e))
+            continue
         
-        # Extract JSON from response
-        response_text = response.strip()
+        for index, response in zip(batch, responses):
+            item_usage = new_usage()
+            record_usage(item_usage, build_menu_prompt(raw_texts[index]), response, usage['latency'] / len(batch))
+            try:
+                menu_data = parse_menu_response(response)
+                if menu_data is None:
+                    raise ValueError("Failed to parse LLM response as JSON")
+                menu_data = {'menu_sections': merge_menu_sections(menu_data.get('menu_sections', []))}
+                results[index] = menu_result(raw_texts[index], menu_data, use_cache, item_usage, decoding)
+            except Exception as e:
+                results[index] = menu_failure(raw_texts[index], str(e), item_usage)
         
-        # Find JSON in the response
-        json_start = response_text.find('{')
-        json_end = response_text.rfind('}') + 1
+        log_usage(usage)
+    
+    return results
+
+def parse_partial_menu_json(text):
+    """
+    Parse the complete part of a JSON document that is still being generated.
+    
+    The text is cut after the last closed object or array and the brackets
+    that are still open are closed, so finished sections and items can be
+    shown before generation completes.
+    
+    Args:
+        text: Generated text so far
         
-        if json_start >= 0 and json_end > json_start:
-            json_str = response_text[json_start:json_end]
-            menu_data = json.loads(json_str)
+    Returns:
+        Parsed menu_data dictionary, or None if nothing complete was generated yet
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+    
+    closers = []
+    in_string = False
+    escape = False
+    last_complete = None
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char == '{':
+            closers.append('}')
+        elif char == '[':
+            closers.append(']')
+        elif char in '}]':
+            if not closers:
+                break
+            closers.pop()
+            last_complete = (i, list(closers))
+            if not closers:
+                break
+    
+    if last_complete is None:
+        return None
+    
+    end, open_closers = last_complete
+    try:
+        menu_data = json.loads(text[start:end + 1] + ''.join(reversed(open_closers)))
+    except ValueError:
+        return None
+    
+    return menu_data if isinstance(menu_data, dict) else None
+
+def process_menu_text_stream(raw_text, use_cache=True, decoding=None, executor=None):
+    """
+    Process raw OCR text with the LLM, yielding partial results while it generates.
+    
+    Args:
+        raw_text: Raw text extracted from menu image
+        use_cache: Whether to reuse previously structured results
+        decoding: Decoding mode, see DECODING_MODES
+        executor: Optional executor to generate on, e.g. the pipeline's model
+            worker so streamed requests queue with other model calls; a new
+            thread is used if None. The stream must not be consumed on a
+            thread of executor itself
+        
+    Yields:
+        Result dictionaries shaped like process_menu_text's, with an extra
+        'done' flag; the last one yielded has 'done' set to True
+    """
+    if use_cache:
+        menu_data = get_cached_menu_data(raw_text, decoding)
+        if menu_data is not None:
+            result = menu_result(raw_text, menu_data, use_cache=False)
+            result.update({'cached': True, 'done': True})
+            yield result
+            return
+    
+    pipeline = get_text_pipeline()
+    
+    if pipeline is None:
+        result = menu_failure(raw_text, "LLM model not available")
+        result['done'] = True
+        yield result
+        return
+    
+    from transformers import TextIteratorStreamer
+    
+    usage = new_usage()
+    sections = []
+    
+    try:
+        for chunk in chunk_menu_text(raw_text, get_input_token_budget()):
+            context_section = sections[-1].get('section_name') if sections else None
+            streamer = TextIteratorStreamer(pipeline.tokenizer, skip_prompt=True, skip_special_tokens=True)
+            responses = []
+            errors = []
+            
+            def generate():
+                try:
+                    responses.append(generate_menu_response(
+                        pipeline, chunk, context_section, decoding, usage, streamer
+                    ))
+                except Exception as e:
+                    errors.append(e)
+                    # Unblock the consumer if generation failed before finishing the stream
+                    streamer.end()
             
-            # Reconstruct structured text
-            structured_text = ""
-            for section in menu_data.get('menu_sections', []):
-                structured_text += f"{section.get('section_name', 'Menu Items')}\n"
-                structured_text += "-" * len(section.get('section_name', 'Menu Items')) + "\n\n"
+            if executor is None:
+                thread = Thread(target=generate, daemon=True)
+                thread.start()
+                wait = thread.join
+            else:
+                wait = executor.submit(generate).result
+            
+            response = ""
+            last_text = ""
+            for text in streamer:
+                response += text
+                
+                # Only re-parse when an object or array may have just been completed
+                if '}' not in text and ']' not in text:
+                    continue
                 
-                for item in section.get('items', []):
-                    structured_text += f"{item.get('name', '')}"
-                    if item.get('price'):
-                        structured_text += f" - {item.get('price')}"
-                    structured_text += "\n"
-                    
-                    if item.get('description'):
-                        structured_text += f"  {item.get('description')}\n"
-                    
-                    structured_text += "\n"
+                menu_data = parse_partial_menu_json(response)
+                if menu_data is None:
+                    continue
                 
-                structured_text += "\n"
+                partial_data = {
+                    'menu_sections': merge_menu_sections(sections + menu_data.get('menu_sections', []))
+                }
+                structured_text = menu_data_to_text(partial_data)
+                if structured_text != last_text:
+                    last_text = structured_text
+                    yield {
+                        'structured_text': structured_text,
+                        'menu_data': partial_data,
+                        'success': True,
+                        'cached': False,
+                        'usage': usage,
+                        'done': False
+                    }
             
-            return {
-                'structured_text': structured_text,
-                'menu_data': menu_data,
-                'success': True
-            }
-        else:
-            # Fallback to simple processing
-            return {
-                'structured_text': raw_text,
-                'menu_sections': [],
-                'success': False,
-                'error': "Failed to parse LLM response as JSON"
-            }
+            wait()
+            
+            if errors:
+                raise errors[0]
+            
+            menu_data = parse_menu_response(responses[0])
+            if menu_data is None:
+                raise ValueError("Failed to parse LLM response as JSON")
             
+            sections.extend(menu_data.get('menu_sections', []))
+        
+        result = menu_result(raw_text, {'menu_sections': merge_menu_sections(sections)}, use_cache, usage, decoding)
     except Exception as e:
-        return {
-            'structured_text': raw_text,
-            'menu_sections': [],
-            'success': False,
-            'error': str(e)
-        }
+        result = menu_failure(raw_text, str(e), usage)
+    
+    log_usage(usage)
+    result['done'] = True
+    yield result
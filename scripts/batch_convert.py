@@ -0,0 +1,48 @@
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.batch_converter import BATCH_FORMATS, convert_batch
+from models.text_processor import LLM_BATCH_SIZE
+from utils.pdf_generator import PDF_LAYOUTS
+
+
+def print_progress(finished, total):
+    """Print batch progress on one line."""
+    print(f"\r{finished}/{total} menus", end="", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a folder or ZIP of menu images to Braille.")
+    parser.add_argument("source", help="Directory or ZIP file of menu images")
+    parser.add_argument("output", help="Directory for the outputs and manifest.jsonl")
+    parser.add_argument("--formats", nargs="+", default=list(BATCH_FORMATS), choices=list(BATCH_FORMATS))
+    parser.add_argument("--layout", default="sequential", choices=list(PDF_LAYOUTS))
+    parser.add_argument("--batch-size", type=int, default=LLM_BATCH_SIZE, help="Menus per LLM call")
+    parser.add_argument("--no-llm", action="store_true", help="Skip AI text processing")
+    parser.add_argument("--no-context", action="store_true", help="Skip AI context enhancement")
+    parser.add_argument("--restart", action="store_true", help="Ignore the existing manifest and convert everything")
+    args = parser.parse_args()
+
+    result = convert_batch(
+        args.source,
+        args.output,
+        formats=args.formats,
+        layout=args.layout,
+        use_llm=not args.no_llm,
+        use_context=not args.no_context,
+        batch_size=args.batch_size,
+        resume=not args.restart,
+        progress=print_progress
+    )
+
+    print()
+    print(
+        f"{result['done']} converted, {result['failed']} failed, "
+        f"{result['skipped']} already done, {result['total']} total"
+    )
+    print(f"Manifest: {result['manifest']}")
+    sys.exit(0 if result['success'] else 1)
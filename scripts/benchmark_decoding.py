@@ -0,0 +1,82 @@
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import text_processor
+from models.text_processor import (
+    DECODING_MODES,
+    generate_menu_response,
+    get_text_pipeline,
+    new_usage
+)
+
+SAMPLE_MENU = """STARTERS
+Garlic Bread 4.50
+Toasted ciabatta with garlic butter
+Soup of the Day 5.95
+
+MAINS
+Margherita Pizza 11.00
+Tomato, mozzarella, fresh basil
+Grilled Salmon 16.50
+Served with seasonal vegetables and lemon butter
+Beef Burger 13.25
+Cheddar, pickles, brioche bun, fries
+
+DESSERTS
+Chocolate Brownie 6.00
+Vanilla ice cream
+Lemon Tart 5.50"""
+
+
+def benchmark_decoding(modes, runs=3, menu_text=SAMPLE_MENU):
+    """
+    Measure generation speed for each decoding mode.
+
+    Args:
+        modes: List of decoding modes to benchmark
+        runs: Number of timed runs per mode
+        menu_text: Menu text to structure
+
+    Returns:
+        Dictionary mapping each mode to its average tokens/sec and latency
+    """
+    pipeline = get_text_pipeline()
+    if pipeline is None:
+        print("LLM model not available")
+        return {}
+
+    print(f"Model: {text_processor.loaded_model_id}")
+    results = {}
+
+    for mode in modes:
+        # Warm-up run so model loading and kernel compilation are not timed
+        generate_menu_response(pipeline, menu_text, decoding=mode)
+
+        usage = new_usage()
+        for _ in range(runs):
+            generate_menu_response(pipeline, menu_text, decoding=mode, usage=usage)
+
+        results[mode] = {
+            'tokens_per_sec': usage['generated_tokens'] / usage['latency'] if usage['latency'] else 0.0,
+            'latency': usage['latency'] / runs,
+            'tokens': usage['generated_tokens'] / runs
+        }
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LLM decoding modes for menu structuring.")
+    parser.add_argument("--modes", nargs="+", default=list(DECODING_MODES), choices=list(DECODING_MODES))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = benchmark_decoding(args.modes, args.runs)
+
+    print(f"{'mode':<12} {'tokens/sec':>10} {'latency (s)':>12} {'tokens':>8}")
+    for mode, stats in results.items():
+        print(f"{mode:<12} {stats['tokens_per_sec']:>10.1f} {stats['latency']:>12.2f} {stats['tokens']:>8.0f}")
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.braille_translator import text_to_grade1_braille, format_braille_text
+from utils.pdf_generator import PDF_ENGINES, PDF_LAYOUTS, PdfRenderer, pdf_size_report
+
+SAMPLE_SECTION = """Starters
+--------
+
+Garlic Bread - 4.50
+  Toasted ciabatta with garlic butter
+
+Soup of the Day - 5.95
+  Ask your server for today's soup
+
+"""
+
+
+def make_menu(sections):
+    """Build a synthetic menu with the given number of sections."""
+    original_text = SAMPLE_SECTION * sections
+    braille_text = format_braille_text(text_to_grade1_braille(original_text))
+    return original_text, braille_text
+
+
+def benchmark_pdf(builder, original_text, braille_text, runs):
+    """
+    Time a PDF builder.
+
+    Args:
+        builder: PDF builder function
+        original_text: Original text content
+        braille_text: Braille translation
+        runs: Number of timed runs
+
+    Returns:
+        Tuple of (first call seconds, average seconds of the following calls,
+        size report from pdf_size_report)
+    """
+    start = time.perf_counter()
+    buffer = builder(original_text, braille_text, "Menu in Braille")
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        builder(original_text, braille_text, "Menu in Braille")
+    average = (time.perf_counter() - start) / runs
+
+    return first, average, pdf_size_report(buffer.getvalue())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Braille PDF generation.")
+    parser.add_argument("--sections", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the parallel builders")
+    parser.add_argument("--no-optimize", action="store_true", help="Disable the size-optimized output mode")
+    args = parser.parse_args()
+    optimize = not args.no_optimize
+
+    # Rendering is measured without the PDF cache; the last row shows cache hits
+    builders = [
+        (f"{layout}/{engine}", PdfRenderer(layout, engine, use_cache=False, workers=1, optimize=optimize).render)
+        for layout in PDF_LAYOUTS
+        for engine in PDF_ENGINES
+    ] + [
+        (f"{layout}/parallel", PdfRenderer(layout, "canvas", use_cache=False, workers=args.workers, optimize=optimize).render)
+        for layout in ("sequential", "comparison")
+    ] + [
+        (f"{layout}/tactile", PdfRenderer(layout, "canvas", use_cache=False, workers=1, tactile=True, optimize=optimize).render)
+        for layout in PDF_LAYOUTS
+    ] + [
+        ("comparison/cached", PdfRenderer("comparison", "canvas", optimize=optimize).render)
+    ]
+
+    print(
+        f"{'layout':<20} {'sections':>8} {'pages':>6} {'first (ms)':>11} {'avg (ms)':>9} "
+        f"{'size (KB)':>10} {'page (B)':>9} {'shared (KB)':>12}"
+    )
+    for name, builder in builders:
+        for sections in args.sections:
+            original_text, braille_text = make_menu(sections)
+            first, average, report = benchmark_pdf(builder, original_text, braille_text, args.runs)
+            page_average = sum(report['page_bytes']) / report['page_count']
+            print(
+                f"{name:<20} {sections:>8} {report['page_count']:>6} {first * 1000:>11.1f} {average * 1000:>9.1f} "
+                f"{report['total_bytes'] / 1024:>10.1f} {page_average:>9.0f} {report['shared_bytes'] / 1024:>12.1f}"
+            )
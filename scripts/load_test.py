@@ -0,0 +1,380 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A concurrency level counts as saturated when it adds less than this
+# fraction of throughput over the previous level
+SATURATION_GAIN = 0.1
+
+PERCENTILES = (50, 95, 99)
+
+SECTIONS = ["STARTERS", "SOUPS", "SALADS", "MAINS", "PASTA", "GRILL", "SIDES", "DESSERTS", "DRINKS"]
+DISHES = [
+    "Garlic Bread", "Tomato Soup", "Caesar Salad", "Margherita Pizza", "Grilled Salmon", "Beef Burger",
+    "Chicken Curry", "Mushroom Risotto", "Fish and Chips", "Lamb Chops", "Vegetable Lasagne", "Steak Frites",
+    "Spaghetti Carbonara", "Falafel Wrap", "Chocolate Brownie", "Lemon Tart", "Apple Crumble", "Espresso",
+    "Fresh Orange Juice", "Sparkling Water"
+]
+DESCRIPTIONS = [
+    "Served with seasonal vegetables", "Toasted ciabatta with garlic butter", "Tomato, mozzarella, fresh basil",
+    "Cheddar, pickles, brioche bun, fries", "With vanilla ice cream", "Slow cooked with herbs and spices",
+    "Made fresh every morning", "With a side of mixed leaves"
+]
+
+
+def synthetic_menu_text(index, seed=0):
+    """
+    Write a random menu; the same index and seed always give the same menu.
+
+    Every request of a run gets a different menu, so the structuring cache
+    doesn't hide the LLM.
+
+    Args:
+        index: Request number
+        seed: Seed of the run
+
+    Returns:
+        Menu text with upper-case section headings and one price per item
+    """
+    rng = random.Random(f"{seed}-{index}")
+    lines = []
+    for section in rng.sample(SECTIONS, rng.randint(2, 4)):
+        lines.append(section)
+        for dish in rng.sample(DISHES, rng.randint(3, 6)):
+            lines.append(f"{dish} {rng.randint(3, 30)}.{rng.choice(['00', '50', '95'])}")
+            if rng.random() < 0.5:
+                lines.append(rng.choice(DESCRIPTIONS))
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def load_font(size=28):
+    """Load a TrueType font for the menu images, falling back to Pillow's default."""
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow before 10.1 has only a small bitmap font
+            return ImageFont.load_default()
+
+
+def synthetic_menu_image(text, font, width=1000, line_height=40, margin=50):
+    """
+    Render menu text as a scanned-looking image.
+
+    Args:
+        text: Menu text
+        font: Font from load_font
+        width: Image width in pixels
+        line_height: Height of one line in pixels
+        margin: Page margin in pixels
+
+    Returns:
+        RGB PIL Image
+    """
+    lines = text.split("\n")
+    image = Image.new("RGB", (width, 2 * margin + line_height * len(lines)), "white")
+    draw = ImageDraw.Draw(image)
+    for number, line in enumerate(lines):
+        draw.text((margin, margin + number * line_height), line, fill="black", font=font)
+    return image
+
+
+def percentile(values, q):
+    """Return the q-th percentile of values by the nearest-rank method, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def stage_totals(trace):
+    """Add up the wall time of each stage of one request."""
+    totals = {}
+    for record in trace or []:
+        totals[record['stage']] = totals.get(record['stage'], 0.0) + record['wall_seconds']
+    return totals
+
+
+def pipeline_target(use_llm, use_context):
+    """
+    Build a request function that runs the pipeline in this process.
+
+    Returns:
+        Function that converts a PIL Image and returns the pipeline result
+    """
+    # Imported here so the LLM backend can be chosen before the models load
+    from models.menu_pipeline import run_menu_pipeline
+
+    def send(image):
+        return run_menu_pipeline(image, use_llm, use_context)
+
+    return send
+
+
+def multipart_body(fields, files, boundary):
+    """
+    Encode form fields and files as multipart/form-data.
+
+    Args:
+        fields: Dictionary of field names and string values
+        files: Dictionary of field names and (file name, bytes, content type)
+        boundary: Boundary string between the parts
+
+    Returns:
+        Request body bytes
+    """
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8'))
+    for name, (filename, data, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + data + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts)
+
+
+def api_target(url, use_llm, use_context, timeout=600):
+    """
+    Build a request function that posts images to a running API server.
+
+    Args:
+        url: Base URL of the server started with api.py
+        use_llm: Whether to use AI for text processing
+        use_context: Whether to use AI for context enhancement
+        timeout: Seconds to wait for one response
+
+    Returns:
+        Function that converts a PIL Image and returns the response JSON
+    """
+    endpoint = url.rstrip("/") + "/v1/menus/image"
+    boundary = "braille-menu-load-test"
+    fields = {'use_llm': str(use_llm).lower(), 'use_context': str(use_context).lower()}
+
+    def send(image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        body = multipart_body(fields, {'image': ("menu.png", buffer.getvalue(), "image/png")}, boundary)
+        request = urllib.request.Request(
+            endpoint,
+            data=body,
+            headers={'Content-Type': f"multipart/form-data; boundary={boundary}"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 422:
+                # The pipeline ran but couldn't convert the menu; the body has the trace
+                return json.load(e)
+            return {'error': f"HTTP {e.code}", 'success': False}
+
+    return send
+
+
+def run_level(send, concurrency, requests, seed, font, first_index=0):
+    """
+    Send requests from concurrency closed-loop clients.
+
+    Every client sends its next request as soon as the previous one has
+    been answered. Menu images are drawn before each request is timed.
+
+    Args:
+        send: Function from pipeline_target or api_target
+        concurrency: Number of concurrent clients
+        requests: Total number of requests
+        seed: Seed for the menus
+        font: Font for the menu images
+        first_index: Number of the first menu, so levels don't repeat menus
+
+    Returns:
+        Dictionary with the throughput, errors and latency percentiles, in
+        seconds, of the whole request and of each stage
+    """
+    next_index = iter(range(first_index, first_index + requests))
+    index_lock = threading.Lock()
+    samples = []
+
+    def client():
+        while True:
+            with index_lock:
+                index = next(next_index, None)
+            if index is None:
+                return
+            image = synthetic_menu_image(synthetic_menu_text(index, seed), font)
+
+            start = time.perf_counter()
+            try:
+                result = send(image)
+            except Exception as e:
+                result = {'error': str(e), 'success': False}
+            samples.append((time.perf_counter() - start, result))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, result in samples if result.get('success')]
+    errors = [result.get('error', "unknown error") for _, result in samples if not result.get('success')]
+    stages = {}
+    for _, result in samples:
+        if result.get('success'):
+            for stage, seconds in stage_totals(result.get('trace')).items():
+                stages.setdefault(stage, []).append(seconds)
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'elapsed_seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'latency': {f"p{q}": percentile(latencies, q) for q in PERCENTILES},
+        'stages': {
+            stage: {f"p{q}": percentile(values, q) for q in PERCENTILES}
+            for stage, values in sorted(stages.items())
+        }
+    }
+
+
+def find_saturation(levels, min_gain=SATURATION_GAIN):
+    """
+    Find the concurrency level after which throughput stops growing.
+
+    Args:
+        levels: Results of run_level, by increasing concurrency
+        min_gain: Smallest relative throughput gain that counts as growth
+
+    Returns:
+        Result of the saturated level, or None if throughput still grew at
+        the highest level
+    """
+    for previous, current in zip(levels, levels[1:]):
+        if current['throughput'] < previous['throughput'] * (1 + min_gain):
+            return previous
+    return None
+
+
+def format_ms(seconds):
+    """Format seconds as milliseconds for the report."""
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_level(level):
+    """Print the latencies of one concurrency level."""
+    print(
+        f"\nConcurrency {level['concurrency']}: {level['requests']} requests in "
+        f"{level['elapsed_seconds']:.1f} s, {level['throughput']:.2f} menus/s, {level['errors']} errors"
+    )
+    if level['first_error']:
+        print(f"  first error: {level['first_error']}")
+
+    header = "".join(f"{f'p{q} (ms)':>10}" for q in PERCENTILES)
+    print(f"  {'stage':<14}{header}")
+    rows = [("request", level['latency'])] + list(level['stages'].items())
+    for name, stats in rows:
+        print(f"  {name:<14}" + "".join(f"{format_ms(stats[f'p{q}']):>10}" for q in PERCENTILES))
+
+
+def print_summary(levels):
+    """Print throughput and latency per concurrency level and the saturation point."""
+    print(f"\n{'concurrency':>11} {'menus/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for level in levels:
+        latency = level['latency']
+        print(
+            f"{level['concurrency']:>11} {level['throughput']:>8.2f} {format_ms(latency['p50']):>9} "
+            f"{format_ms(latency['p95']):>9} {format_ms(latency['p99']):>9} {level['errors']:>7}"
+        )
+
+    saturated = find_saturation(levels)
+    if saturated is None:
+        print(f"\nThroughput still grows at concurrency {levels[-1]['concurrency']}; try higher levels.")
+        return
+
+    print(
+        f"\nThroughput levels off at concurrency {saturated['concurrency']} "
+        f"({saturated['throughput']:.2f} menus/s); more concurrent requests only add latency."
+    )
+    slowest = max(saturated['stages'].items(), key=lambda item: item[1]['p50'] or 0, default=None)
+    if slowest is not None:
+        print(f"Slowest stage at that level: {slowest[0]} (p50 {format_ms(slowest[1]['p50'])} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test the menu pipeline with synthetic menu images.",
+        epilog="For --url, start the server with MENU_LLM_BACKEND=fake to test without the LLM."
+    )
+    parser.add_argument("--url", help="Base URL of a running API server; runs the pipeline in this process if omitted")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8], help="Concurrency levels to test")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests sent first, so model loading isn't measured")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the synthetic menus (random by default)")
+    parser.add_argument("--no-llm", action="store_true", help="Skip AI text processing")
+    parser.add_argument("--context", action="store_true", help="Use AI context enhancement (loads BART)")
+    parser.add_argument("--real-llm", action="store_true", help="Load the real LLM instead of the fake backend")
+    parser.add_argument("--llm-latency", type=float, help="Seconds the fake LLM takes per call")
+    parser.add_argument("--llm-token-latency", type=float, help="Seconds the fake LLM takes per generated token")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    use_llm = not args.no_llm
+    font = load_font()
+
+    with tempfile.TemporaryDirectory(prefix="braille_menu_load_test_") as work_dir:
+        if args.url:
+            send = api_target(args.url, use_llm, args.context)
+            print(f"Target: {args.url}")
+        else:
+            # Set before the models are imported, and inherited by the OCR workers
+            if not args.real_llm:
+                os.environ["MENU_LLM_BACKEND"] = "fake"
+            if args.llm_latency is not None:
+                os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+            if args.llm_token_latency is not None:
+                os.environ["FAKE_LLM_TOKEN_LATENCY"] = str(args.llm_token_latency)
+            # A fresh structuring cache, so earlier runs can't answer for the LLM
+            os.environ["MENU_CACHE_PATH"] = os.path.join(work_dir, "menu_cache.sqlite3")
+            send = pipeline_target(use_llm, args.context)
+            print(f"Target: pipeline in this process, {'real' if args.real_llm else 'fake'} LLM")
+        print(f"Menu seed: {seed}")
+
+        if args.warmup:
+            run_level(send, 1, args.warmup, seed, font, first_index=-args.warmup)
+
+        levels = []
+        first_index = 0
+        for concurrency in args.concurrency:
+            level = run_level(send, concurrency, args.requests, seed, font, first_index)
+            first_index += args.requests
+            print_level(level)
+            levels.append(level)
+
+    print_summary(levels)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'seed': seed, 'levels': levels, 'saturation': find_saturation(levels)}, f, indent=2)
+        print(f"Results: {args.json}")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# The modules are imported from the repository root, as app.py and api.py do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import text_processor
+from models.fake_llm import FAKE_MODEL_ID, FakeTextPipeline
+from utils.menu_cache import MenuCache
+
+MENU_TEXTS = [
+    "SOUPS\nTomato 3.50\nWith fresh basil\nLeek 4.00\nDESSERTS\nCake 5.00",
+    "DRINKS\nCoffee 2.00\nTea 1.80\nHouse blend",
+    "Bread 1.00"
+]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """Structure menus with the fake LLM, without delays and with a menu cache of the test's own."""
+    pipeline = FakeTextPipeline(latency=0, token_latency=0)
+    cache = MenuCache(path=str(tmp_path / "menu_cache.sqlite3"))
+    monkeypatch.setattr(text_processor, "text_generation_pipeline", pipeline)
+    monkeypatch.setattr(text_processor, "tokenizer", pipeline.tokenizer)
+    monkeypatch.setattr(text_processor, "loaded_model_id", FAKE_MODEL_ID)
+    monkeypatch.setattr(text_processor, "get_menu_cache", lambda: cache)
+    return pipeline
@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+
+import pytest
+
+from utils.artifact_store import ArtifactStore, artifact_key, safe_filename
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(root=str(tmp_path / "artifacts"), max_bytes=0, max_age_seconds=0)
+
+
+def write_text(text):
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return write
+
+
+def stored_files(store):
+    return sorted(name for _, _, files in os.walk(store.root) for name in files)
+
+
+def test_key_depends_on_every_part():
+    assert artifact_key("pdf", "a") == artifact_key("pdf", "a")
+    assert artifact_key("pdf", "a") != artifact_key("brf", "a")
+    assert artifact_key("pdf", "ab", "c") != artifact_key("pdf", "a", "bc")
+
+
+def test_safe_filename():
+    assert safe_filename("Café Menu / 2024!", "pdf") == "caf_menu_2024.pdf"
+    assert safe_filename("///", "brf") == "menu.brf"
+
+
+def test_put_stores_the_file_under_its_key(store):
+    key = artifact_key("txt", "menu")
+
+    path = store.put(key, "menu.txt", write_text("hello"))
+
+    assert open(path, encoding='utf-8').read() == "hello"
+    assert store.get(key, "menu.txt") == path
+    assert store.get(artifact_key("txt", "other"), "menu.txt") is None
+
+
+def test_failed_write_leaves_nothing_behind(store):
+    key = artifact_key("txt", "menu")
+
+    def fail(path):
+        write_text("partial")(path)
+        raise RuntimeError("broken")
+
+    with pytest.raises(RuntimeError):
+        store.put(key, "menu.txt", fail)
+
+    assert store.get(key, "menu.txt") is None
+    assert stored_files(store) == []
+
+
+def test_get_or_create_writes_once(store):
+    key = artifact_key("txt", "menu")
+    calls = []
+
+    def write(path):
+        calls.append(path)
+        time.sleep(0.05)
+        write_text("hello")(path)
+
+    threads = [threading.Thread(target=store.get_or_create, args=(key, "menu.txt", write)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert stored_files(store) == ["menu.txt"]
+
+
+def test_evict_removes_expired_entries(store):
+    old = store.put(artifact_key("old"), "old.txt", write_text("old"))
+    new = store.put(artifact_key("new"), "new.txt", write_text("new"))
+    os.utime(old, (time.time() - 100, time.time() - 100))
+    store.max_age_seconds = 50
+
+    assert store.evict() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+
+def test_evict_trims_least_recently_used_entries(store):
+    paths = []
+    for index in range(4):
+        path = store.put(artifact_key(index), f"{index}.txt", write_text("x" * 100))
+        os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+        paths.append(path)
+    # Reading an entry makes it the most recently used
+    store.get(artifact_key(0), "0.txt")
+    store.max_bytes = 250
+
+    assert store.evict() == 2
+    assert [os.path.exists(path) for path in paths] == [True, False, False, True]
@@ -0,0 +1,83 @@
+from utils.brf_generator import (
+    LINE_END,
+    PAGE_END,
+    brf_page_number,
+    create_brf,
+    paginate_brf,
+    unicode_braille_to_brf,
+    wrap_brf_line
+)
+
+
+def test_unicode_braille_maps_to_ascii_braille():
+    # Cells for a, b, c, the number sign and a space
+    assert unicode_braille_to_brf("⠁⠃⠉⠼ \n") == "ABC# \n"
+
+
+def test_non_braille_characters_are_dropped():
+    assert unicode_braille_to_brf("⠁x⠃") == "AB"
+
+
+def test_short_line_is_kept():
+    assert wrap_brf_line("AB CD", 40) == ["AB CD"]
+
+
+def test_line_wraps_at_word_boundaries():
+    assert wrap_brf_line("AAA BBB CCC", 7) == ["AAA BBB", "CCC"]
+
+
+def test_long_word_is_split():
+    assert wrap_brf_line("X " + "A" * 10, 4) == ["X", "AAAA", "AAAA", "AA"]
+
+
+def test_wrapped_lines_fit():
+    line = " ".join("W" * (i % 9 + 1) for i in range(200))
+
+    lines = wrap_brf_line(line, 40)
+
+    assert all(len(wrapped) <= 40 for wrapped in lines)
+    assert " ".join(lines).split() == line.split()
+
+
+def test_empty_line_stays_one_empty_line():
+    assert wrap_brf_line("", 40) == [""]
+
+
+def test_page_numbers():
+    assert brf_page_number(1) == "#A"
+    assert brf_page_number(10) == "#AJ"
+    assert brf_page_number(12) == "#AB"
+
+
+def test_pages_are_filled_and_numbered():
+    lines = [f"L{i}" for i in range(10)]
+
+    pages = list(paginate_brf(lines, cells_per_line=10, lines_per_page=4))
+
+    assert len(pages) == 4
+    assert all(len(page) == 4 for page in pages)
+    assert pages[0] == ["L0", "L1", "L2", "#A".rjust(10)]
+    # The last page is padded so its number sits on the last line
+    assert pages[-1] == ["L9", "", "", "#D".rjust(10)]
+
+
+def test_pages_without_numbers():
+    pages = list(paginate_brf(["A", "B", "C"], lines_per_page=2, page_numbers=False))
+
+    assert pages == [["A", "B"], ["C"]]
+
+
+def test_blank_lines_at_the_top_of_a_page_are_skipped():
+    pages = list(paginate_brf(["A", "B", "", "C"], lines_per_page=2, page_numbers=False))
+
+    assert pages == [["A", "B"], ["C"]]
+
+
+def test_document_layout():
+    braille = "⠁⠃\n\n\n\n⠉"
+
+    data = create_brf(braille, "⠁", cells_per_line=10, lines_per_page=6).getvalue()
+
+    # One page: the centered title, a blank line, the text with the blank
+    # lines collapsed and the page number
+    assert data == LINE_END.join([b"    A", b"", b"AB", b"", b"C", b"        #A"]) + LINE_END + PAGE_END
@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("pytesseract")
+
+from models.document_ai import join_words_into_text
+
+
+def test_words_on_one_line_are_joined_with_spaces():
+    words = ["Tomato", "Soup", "3.50"]
+    word_lines = [(1, 1, 1)] * 3
+
+    assert join_words_into_text(words, word_lines) == "Tomato Soup 3.50"
+
+
+def test_new_line_starts_a_new_text_line():
+    words = ["Tomato", "Soup", "Served", "hot"]
+    word_lines = [(1, 1, 1), (1, 1, 1), (1, 1, 2), (1, 1, 2)]
+
+    assert join_words_into_text(words, word_lines) == "Tomato Soup\nServed hot"
+
+
+def test_new_paragraph_or_block_is_separated_by_a_blank_line():
+    words = ["SOUPS", "Tomato", "DESSERTS"]
+    word_lines = [(1, 1, 1), (1, 2, 1), (2, 1, 1)]
+
+    assert join_words_into_text(words, word_lines) == "SOUPS\n\nTomato\n\nDESSERTS"
+
+
+def test_no_words_give_empty_text():
+    assert join_words_into_text([], []) == ""
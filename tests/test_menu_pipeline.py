@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+
+from conftest import MENU_TEXTS
+from models.braille_translator import text_to_braille
+from models.menu_pipeline import structure_menu_text_async, translate_menu_text_async
+from models.text_processor import process_menu_text
+
+
+def test_text_stages_structure_and_translate(fake_llm):
+    async def run():
+        trace = []
+        processed_text = await structure_menu_text_async(MENU_TEXTS[0], trace=trace)
+        braille_result, metadata = await translate_menu_text_async(processed_text, use_context=False, trace=trace)
+        return processed_text, braille_result, metadata, trace
+
+    processed_text, braille_result, metadata, trace = asyncio.run(run())
+
+    assert processed_text == process_menu_text(MENU_TEXTS[0], use_cache=False)['structured_text']
+    assert braille_result['formatted_braille'] == text_to_braille(processed_text, use_context=False)['formatted_braille']
+    assert metadata == braille_result['metadata']
+    assert [record['stage'] for record in trace if record['stage'] == "structuring"] == ["structuring"]
+
+
+def test_structuring_without_the_llm_keeps_the_text(fake_llm):
+    assert asyncio.run(structure_menu_text_async(MENU_TEXTS[0], use_llm=False)) == MENU_TEXTS[0]
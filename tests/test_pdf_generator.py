@@ -0,0 +1,205 @@
+import io
+import threading
+
+import pytest
+
+PdfReader = pytest.importorskip("pypdf").PdfReader
+
+from reportlab import rl_config
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from models.braille_translator import text_to_braille
+from utils.pdf_generator import (
+    BRAILLE_DOT_POSITIONS,
+    FRAME_WIDTH,
+    PDF_LAYOUTS,
+    TACTILE_CELL_PITCH,
+    TACTILE_DOT_DIAMETER,
+    TACTILE_LINE_PITCH,
+    PdfRenderer,
+    TactileBraille,
+    _sequential_pages,
+    _stream_encoding,
+    get_pdf_resources
+)
+
+MENU_TEXT = "\n".join(f"Dish {i} with a long description of the sauce {i % 10}.50" for i in range(120))
+
+
+@pytest.fixture(scope="module")
+def braille_text():
+    return text_to_braille(MENU_TEXT, use_context=False)['formatted_braille']
+
+
+def page_texts(pdf):
+    return [page.extract_text() for page in PdfReader(pdf).pages]
+
+
+@pytest.mark.parametrize("layout", PDF_LAYOUTS)
+def test_parallel_render_matches_serial_render(layout, braille_text):
+    serial = PdfRenderer(layout, "canvas", use_cache=False, workers=1).render(MENU_TEXT, braille_text, "Menu")
+    parallel = PdfRenderer(layout, "canvas", use_cache=False, workers=3, min_pages=1).render(
+        MENU_TEXT, braille_text, "Menu"
+    )
+
+    serial_pages = page_texts(serial)
+    assert len(serial_pages) > 3
+    assert page_texts(parallel) == serial_pages
+    assert PdfReader(parallel).metadata.title == "Menu"
+
+
+def test_render_to_path_matches_render_to_memory(tmp_path, braille_text):
+    renderer = PdfRenderer("sequential", "canvas", use_cache=False, workers=1)
+    path = tmp_path / "menu.pdf"
+
+    renderer.render(MENU_TEXT, braille_text, "Menu", output=str(path))
+
+    assert page_texts(str(path)) == page_texts(renderer.render(MENU_TEXT, braille_text, "Menu"))
+
+
+def test_failed_render_raises_without_error_pdf(tmp_path, monkeypatch):
+    renderer = PdfRenderer("sequential", "canvas", use_cache=False, error_pdf=False)
+
+    def fail(*args):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(renderer, "_render", fail)
+    with pytest.raises(RuntimeError):
+        renderer.render("Soup", "⠎⠕⠥⠏", "Menu", output=str(tmp_path / "menu.pdf"))
+
+
+def test_optimized_streams_are_binary(braille_text):
+    optimized = PdfRenderer("sequential", "canvas", use_cache=False, workers=1, optimize=True)
+    plain = PdfRenderer("sequential", "canvas", use_cache=False, workers=1, optimize=False)
+
+    assert b"ASCII85Decode" not in optimized.render(MENU_TEXT, braille_text, "Menu").getvalue()
+    assert b"ASCII85Decode" in plain.render(MENU_TEXT, braille_text, "Menu").getvalue()
+
+
+def test_tactile_dots_have_physical_braille_dimensions():
+    left_column = BRAILLE_DOT_POSITIONS[:3]
+    right_column = BRAILLE_DOT_POSITIONS[3:]
+
+    # Dots 1-2-3 and 4-5-6 are 2.5 mm apart, both down a column and across
+    for column in (left_column, right_column):
+        for upper, lower in zip(column, column[1:]):
+            assert upper[1] - lower[1] == pytest.approx(2.5 * mm)
+    for left, right in zip(left_column, right_column):
+        assert right[0] - left[0] == pytest.approx(2.5 * mm)
+    assert TACTILE_DOT_DIAMETER == pytest.approx(1.5 * mm)
+    # Neighbouring cells' dots are further apart than the dots of one cell
+    assert TACTILE_CELL_PITCH - (right_column[0][0] - left_column[0][0]) > 2.5 * mm
+
+
+def test_tactile_lines_use_the_tactile_pitch(braille_text):
+    pages = list(_sequential_pages(MENU_TEXT, braille_text, "Menu", get_pdf_resources(), tactile=True))
+    braille_font = get_pdf_resources()['braille_font']
+    braille_lines = [line for lines, _ in pages for line in lines if line[2] == braille_font]
+
+    assert braille_lines
+    for x, y, font, size, leading, text in braille_lines:
+        assert leading == pytest.approx(TACTILE_LINE_PITCH)
+        assert len(text) * TACTILE_CELL_PITCH <= FRAME_WIDTH
+
+
+def test_braille_line_detection_checks_every_character():
+    tactile = TactileBraille(canvas.Canvas(io.BytesIO()), "Braille")
+
+    assert tactile.is_braille_line("Braille", "⠁⠃")
+    assert tactile.is_braille_line("Braille", "$⠁⠃")
+    assert not tactile.is_braille_line("Braille", "Soup 3.50")
+    assert not tactile.is_braille_line("Helvetica", "⠁⠃")
+
+
+def test_tactile_line_keeps_print_characters():
+    output = io.BytesIO()
+    pdf_canvas = canvas.Canvas(output)
+    tactile = TactileBraille(pdf_canvas, "Braille")
+
+    tactile.draw_line(72, 700, "$⠁ ⠃7")
+    pdf_canvas.showPage()
+    pdf_canvas.save()
+
+    output.seek(0)
+    page = PdfReader(output).pages[0]
+    assert page.extract_text().split() == ["$", "7"]
+    assert sorted(page['/Resources']['/XObject']) == ["/FormXob.B1", "/FormXob.B3"]
+
+
+@pytest.mark.parametrize("layout", PDF_LAYOUTS)
+def test_tactile_render_matches_between_serial_and_parallel(layout):
+    # Shorter than MENU_TEXT, since extracting text from dot forms is slow
+    original_text = "\n".join(MENU_TEXT.split("\n")[:30])
+    braille_text = text_to_braille(original_text, use_context=False)['formatted_braille']
+
+    serial = PdfRenderer(layout, use_cache=False, workers=1, tactile=True, error_pdf=False).render(
+        original_text, braille_text, "Menu"
+    )
+    parallel = PdfRenderer(layout, use_cache=False, workers=3, min_pages=1, tactile=True, error_pdf=False).render(
+        original_text, braille_text, "Menu"
+    )
+
+    assert len(PdfReader(serial).pages) > 1
+    assert page_texts(parallel) == page_texts(serial)
+
+
+@pytest.mark.parametrize("engine", ["platypus", "canvas"])
+@pytest.mark.parametrize("layout", PDF_LAYOUTS)
+def test_title_with_markup_characters_renders(layout, engine):
+    title = "A & <b> Menu"
+    renderer = PdfRenderer(layout, engine, use_cache=False, workers=1, error_pdf=False)
+
+    pdf = renderer.render("Soup 3.50", "⠎⠕⠥⠏ ⠼⠉⠲⠑⠚", title)
+
+    assert title in PdfReader(pdf).pages[0].extract_text()
+
+
+def test_saves_with_the_same_encoding_run_at_once():
+    both_inside = threading.Barrier(2, timeout=5)
+
+    def save():
+        with _stream_encoding(True):
+            # Both threads must be inside at the same time to pass the barrier
+            both_inside.wait()
+            assert rl_config.useA85 == 0
+
+    threads = [threading.Thread(target=save) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not both_inside.broken
+
+
+def test_save_with_another_encoding_waits():
+    default_use_a85 = rl_config.useA85
+    binary_inside = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def binary_save():
+        with _stream_encoding(True):
+            binary_inside.set()
+            release.wait(5)
+            seen.append(("binary", rl_config.useA85))
+
+    def default_save():
+        with _stream_encoding(False):
+            seen.append(("default", rl_config.useA85))
+
+    binary = threading.Thread(target=binary_save)
+    binary.start()
+    binary_inside.wait(5)
+    default = threading.Thread(target=default_save)
+    default.start()
+    default.join(0.2)
+    assert default.is_alive()
+
+    release.set()
+    binary.join()
+    default.join()
+
+    assert seen == [("binary", 0), ("default", default_use_a85)]
+    assert rl_config.useA85 == default_use_a85
@@ -0,0 +1,83 @@
+from utils import session_store
+from utils.session_store import SessionStore
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_store(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "monotonic", clock)
+    return SessionStore(**kwargs), clock
+
+
+def test_put_and_get(monkeypatch):
+    store, _ = make_store(monkeypatch)
+
+    session_id = store.put("Soup 3.50", "⠎⠕⠥⠏", {'word_count': 2})
+    session = store.get(session_id)
+
+    assert session.original_text == "Soup 3.50"
+    assert session.braille_text == "⠎⠕⠥⠏"
+    assert session.metadata == {'word_count': 2}
+    assert store.get("unknown") is None
+    assert store.get(None) is None
+
+
+def test_put_with_session_id_replaces_the_menu(monkeypatch):
+    store, _ = make_store(monkeypatch)
+    session_id = store.put("first", "⠁")
+
+    assert store.put("second", "⠃", session_id=session_id) == session_id
+    assert store.get(session_id).original_text == "second"
+    assert len(store) == 1
+
+
+def test_sessions_expire_after_ttl(monkeypatch):
+    store, clock = make_store(monkeypatch, ttl_seconds=60)
+    session_id = store.put("menu", "⠁")
+
+    clock.now += 59
+    assert store.get(session_id) is not None
+
+    # Reading the session renewed it
+    clock.now += 59
+    assert store.get(session_id) is not None
+
+    clock.now += 61
+    assert store.get(session_id) is None
+    assert len(store) == 0
+
+
+def test_least_recently_used_sessions_are_evicted(monkeypatch):
+    store, clock = make_store(monkeypatch, max_entries=2)
+    first = store.put("first", "⠁")
+    clock.now += 1
+    second = store.put("second", "⠃")
+    clock.now += 1
+    store.get(first)
+    clock.now += 1
+
+    third = store.put("third", "⠉")
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.get(third) is not None
+
+
+def test_delete(monkeypatch):
+    store, _ = make_store(monkeypatch)
+    session_id = store.put("menu", "⠁")
+
+    store.delete(session_id)
+    store.delete(session_id)
+
+    assert store.get(session_id) is None
+
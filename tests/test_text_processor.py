@@ -0,0 +1,168 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import MENU_TEXTS
+from models import text_processor
+from models.text_processor import (
+    cache_decoding_mode,
+    parse_partial_menu_json,
+    process_menu_text,
+    process_menu_text_stream,
+    process_menu_texts
+)
+
+MENU = {
+    'menu_sections': [
+        {
+            'section_name': "Soups",
+            'items': [
+                {'name': "Tomato", 'description': "With basil {fresh}", 'price': "3.50"},
+                {'name': "Leek", 'description': "", 'price': "4.00"}
+            ]
+        }
+    ]
+}
+
+
+def test_complete_document_is_parsed():
+    assert parse_partial_menu_json(json.dumps(MENU)) == MENU
+
+
+def test_text_around_the_document_is_ignored():
+    text = "Here is the menu:\n" + json.dumps(MENU) + "\nEnjoy!"
+
+    assert parse_partial_menu_json(text) == MENU
+
+
+def test_nothing_complete_yet_gives_none():
+    assert parse_partial_menu_json("") is None
+    assert parse_partial_menu_json('{"menu_sections": [{"section_name": "Sou') is None
+
+
+def test_unfinished_item_is_dropped():
+    text = json.dumps(MENU, indent=2)
+    # Cut inside the second item's name
+    partial = text[:text.index('"Leek"') + 3]
+
+    menu_data = parse_partial_menu_json(partial)
+
+    assert menu_data == {
+        'menu_sections': [
+            {'section_name': "Soups", 'items': [MENU['menu_sections'][0]['items'][0]]}
+        ]
+    }
+
+
+def test_brackets_inside_strings_are_not_counted():
+    partial = '{"menu_sections": [{"section_name": "Soups ]}", "items": [{"name": "A}"}, {"name": "B'
+
+    menu_data = parse_partial_menu_json(partial)
+
+    assert menu_data == {'menu_sections': [{'section_name': "Soups ]}", 'items': [{'name': "A}"}]}]}
+
+
+def test_escaped_quotes_are_handled():
+    partial = '{"menu_sections": [{"section_name": "The \\"Best\\"", "items": []}, {"section_name": "X'
+
+    menu_data = parse_partial_menu_json(partial)
+
+    assert menu_data == {'menu_sections': [{'section_name': 'The "Best"', 'items': []}]}
+
+
+def test_every_prefix_parses_to_a_prefix_of_the_menu():
+    text = json.dumps(MENU, indent=2)
+    items_seen = 0
+
+    for end in range(len(text) + 1):
+        menu_data = parse_partial_menu_json(text[:end])
+        if menu_data is None:
+            continue
+        items = [item for section in menu_data.get('menu_sections', []) for item in section.get('items', [])]
+        # Items only ever appear complete and in order
+        assert items == MENU['menu_sections'][0]['items'][:len(items)]
+        assert len(items) >= items_seen
+        items_seen = len(items)
+
+    assert items_seen == 2
+
+
+def test_menu_is_structured(fake_llm):
+    result = process_menu_text(MENU_TEXTS[0], use_cache=False)
+
+    assert result['success']
+    sections = result['menu_data']['menu_sections']
+    assert [section['section_name'] for section in sections] == ["Soups", "Desserts"]
+    assert sections[0]['items'][0] == {'name': "Tomato", 'description': "With fresh basil", 'price': "3.50"}
+    assert "Tomato" in result['structured_text']
+
+
+def test_batched_results_match_single_results(fake_llm):
+    batched = process_menu_texts(MENU_TEXTS, use_cache=False, batch_size=2)
+    single = [process_menu_text(raw_text, use_cache=False) for raw_text in MENU_TEXTS]
+
+    assert [result['menu_data'] for result in batched] == [result['menu_data'] for result in single]
+
+
+def test_stream_ends_with_the_full_result(fake_llm):
+    # The streamer comes from transformers even with the fake LLM
+    pytest.importorskip("transformers")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = list(process_menu_text_stream(MENU_TEXTS[0], use_cache=False, executor=executor))
+
+    assert [result['done'] for result in results] == [False] * (len(results) - 1) + [True]
+    assert len(results) > 1
+    assert results[-1]['menu_data'] == process_menu_text(MENU_TEXTS[0], use_cache=False)['menu_data']
+
+
+def test_cached_menu_is_reused_for_the_same_decoding_mode(fake_llm):
+    assert not process_menu_text(MENU_TEXTS[1], decoding="greedy")['cached']
+    assert process_menu_text(MENU_TEXTS[1], decoding="greedy")['cached']
+    assert not process_menu_text(MENU_TEXTS[1], decoding="sample")['cached']
+    assert process_menu_text(MENU_TEXTS[1], decoding="sample")['cached']
+
+
+def test_speculative_decoding_shares_greedy_cache_entries():
+    assert cache_decoding_mode("speculative") == cache_decoding_mode("greedy")
+    assert cache_decoding_mode("sample") != cache_decoding_mode("greedy")
+
+
+def test_incremental_run_restructures_only_changed_regions(fake_llm):
+    menu_text = MENU_TEXTS[0] + "\n\n" + MENU_TEXTS[1]
+
+    first = process_menu_text(menu_text, menu_id="menu")
+    unchanged = process_menu_text(menu_text, menu_id="menu")
+    edited = process_menu_text(menu_text.replace("Tea 1.80", "Tea 1.90"), menu_id="menu")
+
+    assert first['regions_restructured'] == first['regions_total']
+    assert unchanged['cached'] and unchanged['menu_data'] == first['menu_data']
+    assert 0 < edited['regions_restructured'] < edited['regions_total']
+
+
+def test_incremental_state_is_reused_before_the_fake_model_loads(fake_llm, monkeypatch):
+    process_menu_text(MENU_TEXTS[0], menu_id="menu")
+    monkeypatch.setattr(text_processor, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(text_processor, "loaded_model_id", None)
+
+    assert process_menu_text(MENU_TEXTS[0], menu_id="menu")['cached']
+
+
+def test_incremental_state_is_invalidated_by_the_decoding_mode(fake_llm):
+    process_menu_text(MENU_TEXTS[0], menu_id="menu", decoding="greedy")
+
+    assert process_menu_text(MENU_TEXTS[0], menu_id="menu", decoding="speculative")['cached']
+    assert not process_menu_text(MENU_TEXTS[0], menu_id="menu", decoding="sample")['cached']
+    assert not process_menu_text(MENU_TEXTS[0], menu_id="menu", decoding="greedy")['cached']
+
+
+def test_incremental_state_is_invalidated_by_the_model(fake_llm, monkeypatch):
+    process_menu_text(MENU_TEXTS[0], menu_id="menu")
+    monkeypatch.setattr(text_processor, "loaded_model_id", "other-model")
+
+    result = process_menu_text(MENU_TEXTS[0], menu_id="menu")
+
+    assert not result['cached']
+    assert result['regions_restructured'] == result['regions_total']
+    assert text_processor.get_menu_cache().get_version("menu")['model_id'] == "other-model"
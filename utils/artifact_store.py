@@ -0,0 +1,270 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+# Artifact store settings (can be overridden with environment variables)
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR",
+    os.path.join(tempfile.gettempdir(), "braille_menu_artifacts")
+)
+ARTIFACT_MAX_BYTES = int(os.environ.get("ARTIFACT_MAX_BYTES", 512 * 1024 * 1024))
+ARTIFACT_MAX_AGE_SECONDS = int(os.environ.get("ARTIFACT_MAX_AGE", 3600))
+ARTIFACT_JANITOR_INTERVAL = int(os.environ.get("ARTIFACT_JANITOR_INTERVAL", 60))
+
+# Number of locks that serialize creation of artifacts with the same key
+KEY_LOCK_STRIPES = 64
+
+# Initialize with None - will be created on first use
+artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+
+def artifact_key(*parts):
+    """
+    Build the content address of a generated artifact.
+
+    Args:
+        parts: Strings or other values that fully determine the artifact's
+            content (format, options and input text)
+
+    Returns:
+        Hex digest identifying the artifact
+    """
+    key_source = "\x00".join(str(part) for part in parts)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+def safe_filename(name, extension, default="menu"):
+    """
+    Turn a user-supplied title into a download file name.
+
+    Args:
+        name: Title to base the name on
+        extension: File extension without the dot
+        default: Name to use if nothing usable is left
+
+    Returns:
+        File name containing only letters, digits, '_' and '-'
+    """
+    stem = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_').lower()[:80]
+    return f"{stem or default}.{extension}"
+
+
+class ArtifactStore:
+    """
+    Directory of generated files addressed by the hash of their inputs.
+
+    Every artifact lives in its own directory named after its key, so files
+    can keep a readable download name without colliding with other users'
+    files. Files are written to a temporary name and renamed into place, so
+    readers never see a partial file, and identical requests reuse the
+    existing file. Entries unused for max_age_seconds are removed, and the
+    least recently used entries are removed once the store grows past
+    max_bytes.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, max_bytes=ARTIFACT_MAX_BYTES, max_age_seconds=ARTIFACT_MAX_AGE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._janitor = None
+        self._stop = threading.Event()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key):
+        """Return the directory holding the artifact with the given key."""
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key, filename):
+        """
+        Look up an artifact.
+
+        Args:
+            key: Key from artifact_key
+            filename: Download file name
+
+        Returns:
+            Path of the existing file, or None on a miss
+        """
+        path = os.path.join(self._entry_dir(key), filename)
+        try:
+            # The modification time doubles as the last access time for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, filename, write):
+        """
+        Create an artifact.
+
+        Args:
+            key: Key from artifact_key
+            filename: Download file name
+            write: Function called with a temporary file path to write the
+                content to
+
+        Returns:
+            Path of the stored file
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        path = os.path.join(entry_dir, filename)
+
+        fd, temp_path = tempfile.mkstemp(dir=entry_dir, prefix=".", suffix=".part")
+        os.close(fd)
+        try:
+            write(temp_path)
+            # Concurrent writers of the same key produce the same content, so the last rename wins
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return path
+
+    def get_or_create(self, key, filename, write):
+        """
+        Return the artifact for key, creating it with write on a miss.
+
+        Args:
+            key: Key from artifact_key
+            filename: Download file name
+            write: Function called with a temporary file path to write the
+                content to
+
+        Returns:
+            Path of the stored file
+        """
+        path = self.get(key, filename)
+        if path is not None:
+            return path
+
+        # Requests for the same artifact in this process wait for one writer
+        with self._key_locks[int(key[:8], 16) % KEY_LOCK_STRIPES]:
+            path = self.get(key, filename)
+            if path is None:
+                path = self.put(key, filename, write)
+        return path
+
+    def _entries(self):
+        """List (last used, size, directory) for every stored artifact."""
+        entries = []
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if not entry.is_dir():
+                    continue
+                last_used = 0.0
+                size = 0
+                for item in os.scandir(entry.path):
+                    try:
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    last_used = max(last_used, stat.st_mtime)
+                    size += stat.st_size
+                entries.append((last_used, size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Remove expired artifacts and trim the store to max_bytes.
+
+        Returns:
+            Number of artifacts removed
+        """
+        now = time.time()
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for last_used, size, path in entries:
+            expired = self.max_age_seconds and now - last_used > self.max_age_seconds
+            if not expired and (not self.max_bytes or total <= self.max_bytes):
+                # Entries are oldest first, so everything after this one is kept too
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def start_janitor(self, interval=ARTIFACT_JANITOR_INTERVAL):
+        """Start a daemon thread that calls evict every interval seconds."""
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.evict()
+                except Exception as e:
+                    print(f"Error cleaning artifact store: {str(e)}")
+
+        self._stop.clear()
+        self._janitor = threading.Thread(target=run, name="artifact-janitor", daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self):
+        """Stop the janitor thread."""
+        self._stop.set()
+        if self._janitor is not None:
+            self._janitor.join()
+            self._janitor = None
+
+    def clear(self):
+        """Remove all stored artifacts."""
+        for prefix in os.scandir(self.root):
+            if prefix.is_dir():
+                shutil.rmtree(prefix.path, ignore_errors=True)
+
+
+def get_artifact_store():
+    """Get or initialize the shared artifact store and its janitor."""
+    global artifact_store
+    if artifact_store is None:
+        with _artifact_store_lock:
+            if artifact_store is None:
+                try:
+                    store = ArtifactStore()
+                    store.evict()
+                    store.start_janitor()
+                    artifact_store = store
+                except Exception as e:
+                    print(f"Error opening artifact store: {str(e)}")
+    return artifact_store
+
+
+def store_artifact(key, filename, write):
+    """
+    Get or create a generated download file, unique to its content.
+
+    Args:
+        key: Key from artifact_key
+        filename: Download file name
+        write: Function called with a file path to write the content to;
+            if it raises, the partial file is removed and nothing is stored
+
+    Returns:
+        Path of the file
+    """
+    store = get_artifact_store()
+    if store is None:
+        # Without the store, still give every request its own directory
+        directory = tempfile.mkdtemp(prefix="braille_menu_")
+        path = os.path.join(directory, filename)
+        try:
+            write(path)
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        return path
+    return store.get_or_create(key, filename, write)
@@ -0,0 +1,186 @@
+import io
+
+# North American ASCII Braille: character for each 6-dot cell, indexed by
+# the cell's offset from U+2800 (bit 0 = dot 1 ... bit 5 = dot 6)
+BRF_ASCII = " A1B'K2L@CIF/MSP\"E3H9O6R^DJG>NTQ,*5<-U8V.%[$+X!&;:4\\0Z7(_?W]#Y)="
+
+# Standard embosser page: 40 cells per line, 25 lines per page
+CELLS_PER_LINE = 40
+LINES_PER_PAGE = 25
+
+LINE_END = b'\r\n'
+PAGE_END = b'\x0c'
+
+
+def unicode_braille_to_brf(braille_text):
+    """
+    Convert Unicode Braille to North American ASCII Braille.
+
+    Args:
+        braille_text: Text with Unicode Braille characters
+
+    Returns:
+        ASCII Braille string; dots 7 and 8 are dropped, plain spaces and
+        newlines are kept and any other non-Braille character is skipped
+    """
+    result = []
+    for char in braille_text:
+        code = ord(char) - 0x2800
+        if 0 <= code <= 0xff:
+            result.append(BRF_ASCII[code & 0x3f])
+        elif char in ' \n':
+            result.append(char)
+
+    return ''.join(result)
+
+
+def wrap_brf_line(line, cells_per_line=CELLS_PER_LINE):
+    """
+    Word-wrap one line of ASCII Braille.
+
+    Args:
+        line: ASCII Braille line without newlines
+        cells_per_line: Maximum cells per line
+
+    Returns:
+        List of lines; words longer than a line are split across lines
+    """
+    lines = []
+    current = ''
+
+    for word in line.split():
+        while len(word) > cells_per_line:
+            if current:
+                lines.append(current)
+                current = ''
+            lines.append(word[:cells_per_line])
+            word = word[cells_per_line:]
+
+        if not current:
+            current = word
+        elif len(current) + 1 + len(word) <= cells_per_line:
+            current += ' ' + word
+        else:
+            lines.append(current)
+            current = word
+
+    if current or not lines:
+        lines.append(current)
+
+    return lines
+
+
+def brf_page_number(number):
+    """Return the ASCII Braille page number, e.g. '#AB' for 12."""
+    # Digits 1-9 and 0 are the cells for a-j after a number sign
+    return '#' + ''.join('ABCDEFGHIJ'[int(digit) - 1] for digit in str(number))
+
+
+def paginate_brf(lines, cells_per_line=CELLS_PER_LINE, lines_per_page=LINES_PER_PAGE, page_numbers=True):
+    """
+    Split wrapped lines into embosser pages.
+
+    Args:
+        lines: Iterable of lines no longer than cells_per_line
+        cells_per_line: Cells per line
+        lines_per_page: Lines per page
+        page_numbers: Whether to put the page number right-aligned on the
+            last line of each page
+
+    Yields:
+        Lists of lines, one list per page
+    """
+    body_lines = lines_per_page - 1 if page_numbers else lines_per_page
+    page = []
+    number = 1
+
+    for line in lines:
+        # Blank lines at the top of a page only waste paper
+        if not page and not line:
+            continue
+        page.append(line)
+
+        if len(page) == body_lines:
+            if page_numbers:
+                page.append(brf_page_number(number).rjust(cells_per_line))
+            yield page
+            page = []
+            number += 1
+
+    if page:
+        if page_numbers:
+            page += [''] * (body_lines - len(page))
+            page.append(brf_page_number(number).rjust(cells_per_line))
+        yield page
+
+
+def _brf_lines(braille_text, title, cells_per_line):
+    """Yield the wrapped ASCII Braille lines of the document."""
+    if title:
+        for line in wrap_brf_line(unicode_braille_to_brf(title), cells_per_line):
+            yield line.strip().center(cells_per_line).rstrip()
+        yield ''
+
+    # Runs of blank lines collapse to one; embossed paper is expensive
+    blank = False
+    for line in unicode_braille_to_brf(braille_text).split('\n'):
+        if not line.strip():
+            if not blank:
+                yield ''
+            blank = True
+            continue
+        blank = False
+        yield from wrap_brf_line(line, cells_per_line)
+
+
+def write_brf(output, braille_text, title=None, cells_per_line=CELLS_PER_LINE,
+              lines_per_page=LINES_PER_PAGE, page_numbers=True):
+    """
+    Write a Braille Ready Format (BRF) file for embossers.
+
+    Pages are written one at a time as plain bytes, so memory use does not
+    grow with the document.
+
+    Args:
+        output: File path or writable binary file object
+        braille_text: Unicode Braille text
+        title: Optional Unicode Braille title, centered on the first page
+        cells_per_line: Cells per line
+        lines_per_page: Lines per page
+        page_numbers: Whether to number pages
+
+    Returns:
+        Number of pages written
+    """
+    if isinstance(output, (str, bytes)) or hasattr(output, '__fspath__'):
+        with open(output, 'wb') as f:
+            return write_brf(f, braille_text, title, cells_per_line, lines_per_page, page_numbers)
+
+    pages = 0
+    lines = _brf_lines(braille_text, title, cells_per_line)
+    for page in paginate_brf(lines, cells_per_line, lines_per_page, page_numbers):
+        output.write(LINE_END.join(line.encode('ascii') for line in page) + LINE_END + PAGE_END)
+        pages += 1
+
+    return pages
+
+
+def create_brf(braille_text, title=None, cells_per_line=CELLS_PER_LINE,
+               lines_per_page=LINES_PER_PAGE, page_numbers=True):
+    """
+    Create a BRF document in memory.
+
+    Args:
+        braille_text: Unicode Braille text
+        title: Optional Unicode Braille title
+        cells_per_line: Cells per line
+        lines_per_page: Lines per page
+        page_numbers: Whether to number pages
+
+    Returns:
+        BytesIO object containing the BRF file
+    """
+    buffer = io.BytesIO()
+    write_brf(buffer, braille_text, title, cells_per_line, lines_per_page, page_numbers)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,102 @@
+import os
+
+from PIL import Image
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Resolution used to rasterize PDF pages for OCR (can be overridden with an
+# environment variable)
+PDF_RASTER_DPI = int(os.environ.get("PDF_RASTER_DPI", 300))
+
+# Long side, in pixels, that preprocess_image resizes pages to; pages are not
+# rendered larger than this since the extra pixels would be thrown away
+OCR_TARGET_SIZE = 1000
+
+PDF_POINTS_PER_INCH = 72
+
+
+def is_pdf(path):
+    """Check whether a file is a PDF by its header."""
+    with open(path, 'rb') as f:
+        return f.read(5) == b'%PDF-'
+
+
+def list_menu_pages(paths):
+    """
+    List the pages of the uploaded menu files without rasterizing them.
+
+    Args:
+        paths: File paths of PDFs and images, in reading order
+
+    Returns:
+        List of (path, page index) tuples; the page index is None for images
+    """
+    pages = []
+    for path in paths:
+        if not is_pdf(path):
+            pages.append((path, None))
+            continue
+
+        if pdfium is None:
+            raise RuntimeError("PDF input requires the pypdfium2 package")
+        pdf = pdfium.PdfDocument(path)
+        try:
+            pages.extend((path, index) for index in range(len(pdf)))
+        finally:
+            pdf.close()
+
+    return pages
+
+
+def pdf_render_scale(width, height, dpi=PDF_RASTER_DPI, max_size=OCR_TARGET_SIZE):
+    """
+    Get the scale to render a PDF page at.
+
+    Args:
+        width: Page width in points
+        height: Page height in points
+        dpi: Requested resolution
+        max_size: Largest useful size of the longer side, in pixels
+
+    Returns:
+        Scale factor from points to pixels
+    """
+    return min(dpi / PDF_POINTS_PER_INCH, max_size / max(width, height))
+
+
+def load_menu_page(path, page_index=None, dpi=PDF_RASTER_DPI):
+    """
+    Load one menu page as an image.
+
+    PDF pages are rasterized on demand and the document is closed again
+    straight away, so a caller that handles one page at a time only ever
+    holds one page's raster.
+
+    Args:
+        path: File path of a PDF or image
+        page_index: Page of the PDF to render, or None for an image file
+        dpi: Resolution to rasterize PDF pages at
+
+    Returns:
+        RGB PIL Image
+    """
+    if page_index is None:
+        with Image.open(path) as image:
+            return image.convert("RGB")
+
+    if pdfium is None:
+        raise RuntimeError("PDF input requires the pypdfium2 package")
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[page_index]
+        try:
+            scale = pdf_render_scale(*page.get_size(), dpi=dpi)
+            return page.render(scale=scale).to_pil().convert("RGB")
+        finally:
+            page.close()
+    finally:
+        pdf.close()
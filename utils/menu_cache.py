@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+# Cache settings (can be overridden with environment variables)
+CACHE_PATH = os.environ.get(
+    "MENU_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "braille_menu_cache.sqlite3")
+)
+CACHE_TTL_SECONDS = int(os.environ.get("MENU_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("MENU_CACHE_MAX_ENTRIES", 5000))
+
+# Initialize with None - will be created on first use
+menu_cache = None
+_menu_cache_lock = threading.Lock()
+
+
+def normalize_menu_text(text):
+    """
+    Normalize OCR text so that trivially different scans share a cache entry.
+
+    Args:
+        text: Raw OCR text
+
+    Returns:
+        Case-folded text with all whitespace runs collapsed to single spaces
+    """
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def hash_menu_text(text):
+    """Return a stable hash of the normalized text."""
+    return hashlib.sha256(normalize_menu_text(text).encode('utf-8')).hexdigest()
+
+
+def make_cache_key(raw_text, model_id, prompt_version, decoding):
+    """
+    Build the cache key for a structured menu.
+
+    Args:
+        raw_text: Raw OCR text
+        model_id: ID of the model that structures the text
+        prompt_version: Version of the prompt used for structuring
+        decoding: Decoding mode the text was structured with
+
+    Returns:
+        Hex digest identifying the (text, model, prompt, decoding) combination
+    """
+    key_source = f"{model_id}\x00{prompt_version}\x00{decoding}\x00{normalize_menu_text(raw_text)}"
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+class MenuCache:
+    """
+    SQLite-backed cache of structured menu data.
+
+    Entries survive restarts and can be shared by several worker processes
+    pointing at the same database file. Expired entries are dropped on read
+    and the oldest entries are evicted once the cache grows past max_entries.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS menu_cache (
+                    key TEXT PRIMARY KEY,
+                    menu_data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_menu_cache_accessed ON menu_cache (accessed_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS menu_versions (
+                    menu_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        """Return a connection for the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets readers in other processes work while one process writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Look up structured menu data.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            The cached menu_data dictionary, or None on a miss
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT menu_data, created_at FROM menu_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        menu_data, created_at = row
+        with conn:
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM menu_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE menu_cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+        return json.loads(menu_data)
+
+    def set(self, key, menu_data):
+        """
+        Store structured menu data and evict old entries if needed.
+
+        Args:
+            key: Cache key from make_cache_key
+            menu_data: Parsed menu dictionary returned by the LLM
+        """
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO menu_cache (key, menu_data, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(menu_data), now, now)
+            )
+            self._evict(conn, now)
+
+    def get_version(self, menu_id):
+        """
+        Get the last structured version of a menu.
+
+        Args:
+            menu_id: Caller-chosen identifier of the menu (e.g. restaurant ID)
+
+        Returns:
+            The stored state dictionary, or None if unknown or expired
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT state, updated_at FROM menu_versions WHERE menu_id = ?", (menu_id,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        state, updated_at = row
+        if self.ttl_seconds and time.time() - updated_at > self.ttl_seconds:
+            return None
+
+        return json.loads(state)
+
+    def set_version(self, menu_id, state):
+        """
+        Store the latest structured version of a menu.
+
+        Args:
+            menu_id: Caller-chosen identifier of the menu
+            state: JSON-serializable state dictionary
+        """
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO menu_versions (menu_id, state, updated_at) VALUES (?, ?, ?)",
+                (menu_id, json.dumps(state), now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        """Drop expired entries and trim the cache to max_entries."""
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM menu_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute("DELETE FROM menu_versions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+        if self.max_entries:
+            conn.execute(
+                """
+                DELETE FROM menu_cache WHERE key IN (
+                    SELECT key FROM menu_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            conn.execute(
+                """
+                DELETE FROM menu_versions WHERE menu_id IN (
+                    SELECT menu_id FROM menu_versions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """Remove all cached entries."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM menu_cache")
+            conn.execute("DELETE FROM menu_versions")
+
+
+def get_menu_cache():
+    """Get or initialize the shared menu cache."""
+    global menu_cache
+    if menu_cache is None:
+        with _menu_cache_lock:
+            if menu_cache is None:
+                try:
+                    menu_cache = MenuCache()
+                except Exception as e:
+                    print(f"Error opening menu cache: {str(e)}")
+    return menu_cache
@@ -0,0 +1,271 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    # Not available on Windows; memory changes are then reported as 0
+    PAGE_SIZE = 0
+
+# Upper bounds of the stage latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_PREFIX = "braille_menu"
+
+# Port for the Prometheus endpoint of the Gradio app; 0 disables it
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+# Stage records of the executor call in progress on this thread, see run_timed
+_stage_collector = contextvars.ContextVar("stage_collector", default=None)
+
+# Initialize with None - will be created on first use
+metrics_registry = None
+_metrics_registry_lock = threading.Lock()
+
+
+def current_rss_bytes():
+    """Return the current resident memory of this process in bytes, or 0 where it can't be read."""
+    try:
+        # The second field of statm is the resident set size in pages (Linux only)
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class MetricsRegistry:
+    """
+    Aggregated wall time, CPU time, memory growth and errors per pipeline stage.
+
+    Memory growth is the change in resident memory of the process across
+    one stage call, so it is attributed to the stage that caused it; stages
+    running concurrently in the same process share each other's growth.
+    The registry keeps the largest growth seen per stage.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, record):
+        """Add one stage record from stage_timer."""
+        with self._lock:
+            stats = self._stages.get(record['stage'])
+            if stats is None:
+                stats = self._stages[record['stage']] = {
+                    'count': 0,
+                    'errors': 0,
+                    'wall_seconds': 0.0,
+                    'cpu_seconds': 0.0,
+                    'max_rss_delta_bytes': 0,
+                    'buckets': [0] * len(self.buckets)
+                }
+
+            stats['count'] += 1
+            stats['errors'] += int(record.get('error', False))
+            stats['wall_seconds'] += record['wall_seconds']
+            stats['cpu_seconds'] += record['cpu_seconds'] or 0.0
+            if record['rss_delta_bytes'] is not None:
+                stats['max_rss_delta_bytes'] = max(stats['max_rss_delta_bytes'], record['rss_delta_bytes'])
+            index = bisect.bisect_left(self.buckets, record['wall_seconds'])
+            if index < len(self.buckets):
+                stats['buckets'][index] += 1
+
+    def snapshot(self):
+        """Return a copy of the statistics of every stage."""
+        with self._lock:
+            return {stage: dict(stats, buckets=list(stats['buckets'])) for stage, stats in self._stages.items()}
+
+    def render_prometheus(self):
+        """
+        Render the statistics in the Prometheus text exposition format.
+
+        Returns:
+            Metrics text
+        """
+        stages = sorted(self.snapshot().items())
+        name = f"{METRICS_PREFIX}_stage"
+        lines = [
+            f"# HELP {name}_seconds Wall time of pipeline stages.",
+            f"# TYPE {name}_seconds histogram"
+        ]
+        for stage, stats in stages:
+            cumulative = 0
+            for bound, count in zip(self.buckets, stats['buckets']):
+                cumulative += count
+                lines.append(f'{name}_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{name}_seconds_sum{{stage="{stage}"}} {stats["wall_seconds"]:.6f}')
+            lines.append(f'{name}_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+        metrics = (
+            ("cpu_seconds_total", "counter", "CPU time of pipeline stages.", 'cpu_seconds', "{:.6f}"),
+            ("max_rss_delta_bytes", "gauge", "Largest growth in resident memory during one stage call.",
+             'max_rss_delta_bytes', "{}"),
+            ("errors_total", "counter", "Pipeline stages that raised an error.", 'errors', "{}")
+        )
+        for suffix, metric_type, help_text, key, value_format in metrics:
+            lines.append(f"# HELP {name}_{suffix} {help_text}")
+            lines.append(f"# TYPE {name}_{suffix} {metric_type}")
+            for stage, stats in stages:
+                lines.append(f'{name}_{suffix}{{stage="{stage}"}} ' + value_format.format(stats[key]))
+
+        return "\n".join(lines) + "\n"
+
+
+def get_metrics():
+    """Get or initialize the process-wide metrics registry."""
+    global metrics_registry
+    if metrics_registry is None:
+        with _metrics_registry_lock:
+            if metrics_registry is None:
+                metrics_registry = MetricsRegistry()
+    return metrics_registry
+
+
+def record_stages(records, trace=None):
+    """
+    Add stage records to the metrics and optionally to a request trace.
+
+    Args:
+        records: Stage records from stage_timer or run_timed
+        trace: Optional list collecting the records of one request
+    """
+    registry = get_metrics()
+    for record in records:
+        registry.observe(record)
+    if trace is not None:
+        trace.extend(records)
+
+
+@contextmanager
+def stage_timer(stage, trace=None):
+    """
+    Measure wall time, CPU time and memory growth of a pipeline stage.
+
+    Inside run_timed the record is returned to the caller of run_timed;
+    otherwise it is added to the metrics straight away.
+
+    Args:
+        stage: Stage name, e.g. "ocr"
+        trace: Optional list collecting the records of one request
+    """
+    record = {'stage': stage, 'error': False}
+    start_wall = time.perf_counter()
+    # Thread time excludes the work of concurrent requests
+    start_cpu = time.thread_time()
+    start_thread = threading.get_ident()
+    start_rss = current_rss_bytes()
+    try:
+        yield record
+    except Exception:
+        record['error'] = True
+        raise
+    finally:
+        record['wall_seconds'] = time.perf_counter() - start_wall
+        # A generator consumed from a thread pool can resume on another
+        # thread, and then its CPU time can't be measured this way
+        same_thread = threading.get_ident() == start_thread
+        record['cpu_seconds'] = time.thread_time() - start_cpu if same_thread else None
+        record['rss_delta_bytes'] = current_rss_bytes() - start_rss
+
+        collector = _stage_collector.get()
+        if collector is not None:
+            collector.append(record)
+        else:
+            record_stages([record], trace)
+
+
+def run_timed(stage, function, *args):
+    """
+    Call a function as a measured stage inside an executor worker.
+
+    Module-level, so it can be sent to process pools. Stages measured with
+    stage_timer while the function runs are collected as well and returned
+    with the result, so the caller can add them to its request trace and
+    records from process workers reach the main process's metrics.
+
+    Args:
+        stage: Stage name
+        function: Function to call
+        args: Arguments for function
+
+    Returns:
+        Tuple of (function result, list of stage records, nested stages first)
+    """
+    records = []
+    token = _stage_collector.set(records)
+    try:
+        with stage_timer(stage):
+            result = function(*args)
+    finally:
+        _stage_collector.reset(token)
+    return result, records
+
+
+def format_trace(trace):
+    """
+    Format the stage records of one request as a Markdown table.
+
+    Args:
+        trace: List of stage records
+
+    Returns:
+        Markdown table, or an empty string if there are no records
+    """
+    if not trace:
+        return ""
+
+    lines = [
+        "| Stage | Wall (ms) | CPU (ms) | RSS change (MB) |",
+        "| --- | ---: | ---: | ---: |"
+    ]
+    for record in trace:
+        stage = record['stage'] + (" (error)" if record.get('error') else "")
+        cpu = "-" if record['cpu_seconds'] is None else f"{record['cpu_seconds'] * 1000:.1f}"
+        rss = "-" if record['rss_delta_bytes'] is None else f"{record['rss_delta_bytes'] / (1024 * 1024):+.1f}"
+        lines.append(f"| {stage} | {record['wall_seconds'] * 1000:.1f} | {cpu} | {rss} |")
+    return "\n".join(lines)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the metrics text on /metrics."""
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """
+    Serve /metrics for Prometheus from a daemon thread.
+
+    Args:
+        port: Port to listen on
+        host: Interface to listen on
+
+    Returns:
+        The server, or None if port is 0
+    """
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
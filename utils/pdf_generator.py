@@ -1,777 +1,1404 @@
 import os
-import tempfile
+import threading
+from reportlab import rl_config
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import simpleSplit
 import io
+import math
+import hashlib
+import multiprocessing
+from contextlib import contextmanager
+from functools import partial
+from itertools import repeat
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-# Try to register a font that supports Braille Unicode characters
 try:
-    # Check for common Braille fonts
-    font_paths = [
-        "DejaVuSans.ttf",  # Common on Linux
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/System/Library/Fonts/Arial Unicode.ttf",  # Mac
-        "C:\\Windows\\Fonts\\arial.ttf"  # Windows
-    ]
-    
-    font_registered = False
-    for font_path in font_paths:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+from utils.metrics import stage_timer
+
+# Fonts that support Braille Unicode characters, in order of preference
+font_paths = [
+    "DejaVuSans.ttf",  # Common on Linux
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Arial Unicode.ttf",  # Mac
+    "C:\\Windows\\Fonts\\arial.ttf"  # Windows
+]
+
+# Unicode font that supports Braille, registered on first use
+DEJAVU_FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+# Fonts and paragraph styles shared by all documents; created once per process
+_pdf_resources = None
+_pdf_resources_lock = threading.Lock()
+
+
+def _register_braille_font():
+    """Register the DejaVu font once and return the font name to use for Braille."""
+    if 'DejaVu' in pdfmetrics.getRegisteredFontNames():
+        return 'DejaVu'
+    
+    for font_path in [DEJAVU_FONT_PATH] + font_paths:
         if os.path.exists(font_path):
-            pdfmetrics.registerFont(TTFont('BrailleFont', font_path))
-            font_registered = True
-            break
+            try:
+                # The parsed font is reused by every document; each document embeds its own subset
+                pdfmetrics.registerFont(TTFont('DejaVu', font_path))
+                return 'DejaVu'
+            except Exception as e:
+                print(f"Error registering font {font_path}: {str(e)}")
     
-    if not font_registered:
-        # Use default font if none of the above are found
-        print("No suitable font found for Braille. Using default font.")
-except Exception as e:
-    print(f"Error registering font: {str(e)}")
+    # Fallback to default font if DejaVu is not available
+    return 'Helvetica'
 
-def create_braille_pdf(original_text, braille_text, title="Menu in Braille"):
+
+def get_pdf_resources():
     """
-    Create a PDF file with original text and its Braille translation.
+    Get the fonts and paragraph styles used to build PDFs.
+    
+    Fonts are registered and styles are built on the first call only,
+    so later documents skip re-parsing the TTF file and rebuilding styles.
+    
+    Returns:
+        Dictionary with the Braille font name and paragraph styles
+    """
+    global _pdf_resources
+    
+    if _pdf_resources is None:
+        with _pdf_resources_lock:
+            if _pdf_resources is None:
+                braille_font = _register_braille_font()
+                styles = getSampleStyleSheet()
+                
+                _pdf_resources = {
+                    'braille_font': braille_font,
+                    'title_style': styles['Title'],
+                    'heading_style': styles['Heading2'],
+                    'normal_style': styles['Normal'],
+                    # Braille text in the sequential layout
+                    'braille_style': ParagraphStyle(
+                        'Braille',
+                        parent=styles['Normal'],
+                        fontName=braille_font,
+                        fontSize=14,
+                        leading=18,
+                        spaceAfter=12
+                    ),
+                    # Table cells in the side-by-side layout
+                    'comparison_normal_style': ParagraphStyle(
+                        'ComparisonNormal',
+                        fontName='Helvetica',
+                        fontSize=10,
+                        leading=12,
+                        wordWrap='CJK'
+                    ),
+                    'comparison_braille_style': ParagraphStyle(
+                        'ComparisonBraille',
+                        fontName=braille_font,
+                        fontSize=10,
+                        leading=12,
+                        wordWrap='CJK'
+                    )
+                }
+    
+    return _pdf_resources
+
+
+# Rendering engines: "platypus" lays out Paragraph flowables, "canvas" draws
+# precomputed lines directly and is much faster for long documents
+PDF_ENGINES = ("platypus", "canvas")
+DEFAULT_PDF_ENGINE = os.environ.get("PDF_ENGINE", "platypus")
+
+# Page geometry shared by the canvas renderers
+PAGE_WIDTH, PAGE_HEIGHT = letter
+PAGE_MARGIN = 72
+FRAME_WIDTH = PAGE_WIDTH - 2 * PAGE_MARGIN
+
+# Tactile Braille has fixed physical dimensions whatever the print size, so
+# the dots stay apart and readable on swell paper: 2.5 mm between the dots
+# of a cell, 1.5 mm dots, 6.2 mm from cell to cell and 10 mm from line to line
+TACTILE_DOT_SPACING = 2.5 * mm
+TACTILE_DOT_DIAMETER = 1.5 * mm
+TACTILE_CELL_PITCH = 6.2 * mm
+TACTILE_LINE_PITCH = 10 * mm
+TACTILE_CELL_HEIGHT = 2 * TACTILE_DOT_SPACING + TACTILE_DOT_DIAMETER
+# Size of the print characters drawn in place of cells in tactile lines
+TACTILE_PRINT_SIZE = 14
+
+# Tactile dot centers from the bottom-left corner of a cell, for dots 1-6;
+# bit n of a cell's offset from U+2800 raises dot n + 1
+BRAILLE_DOT_POSITIONS = tuple(
+    (
+        (TACTILE_CELL_PITCH - TACTILE_DOT_SPACING) / 2 + column * TACTILE_DOT_SPACING,
+        TACTILE_CELL_HEIGHT - TACTILE_DOT_DIAMETER / 2 - row * TACTILE_DOT_SPACING
+    )
+    for column in (0, 1)
+    for row in (0, 1, 2)
+)
+
+
+def is_braille_char(char):
+    """Check whether a character is a Unicode Braille cell."""
+    return '\u2800' <= char <= '\u28ff'
+
+
+def braille_line_metrics(braille_font, size, leading, tactile=False):
+    """
+    Get the geometry of Braille lines.
     
     Args:
-        original_text: Original text content
-        braille_text: Braille translation
-        title: PDF title
+        braille_font: Braille font name
+        size: Print font size
+        leading: Print line spacing
+        tactile: Whether the lines are drawn as tactile dots
         
     Returns:
-        BytesIO object containing the PDF
+        Tuple of (cell width, size, leading); tactile lines use the fixed
+        cell pitch, cell height and line pitch instead of the font metrics
     """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Register a Unicode font that supports Braille
-        pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text with Unicode support
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='DejaVu',  # Use DejaVu font which supports Unicode Braille
-            fontSize=14,
-            leading=18,
-            spaceAfter=12
-        )
-        
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Add original text section
-        content.append(Paragraph("Original Text", heading_style))
-        content.append(Spacer(1, 6))
-        
-        # Split original text by lines and add each as a paragraph
-        for line in original_text.split('\n'):
-            if line.strip():
-                content.append(Paragraph(line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'), normal_style))
-            else:
-                content.append(Spacer(1, 12))
-        
-        content.append(Spacer(1, 24))
-        
-        # Add Braille section
-        content.append(Paragraph("Braille Translation", heading_style))
-        content.append(Spacer(1, 6))
-        
-        # Split Braille text by lines and add each as a paragraph
-        for line in braille_text.split('\n'):
-            if line.strip():
-                content.append(Paragraph(line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'), braille_style))
-            else:
-                content.append(Spacer(1, 12))
-        
-        # Build the PDF
-        doc.build(content)
-        
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf: {str(e)}")
-        # Create a simple PDF with error message
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
-
-
-def create_braille_pdf_working(original_text, braille_text, title="Menu in Braille"):
+    if tactile:
+        return TACTILE_CELL_PITCH, TACTILE_CELL_HEIGHT, TACTILE_LINE_PITCH
+    return pdfmetrics.stringWidth('\u283f', braille_font, size), size, leading
+
+
+def wrap_braille_line(line, cells_per_line):
     """
-    Create a PDF file with original text and its Braille translation.
+    Wrap a line of Braille cells to a fixed number of cells.
+    
+    Lines are broken at blank cells or spaces where possible, and
+    hard-wrapped otherwise.
     
     Args:
-        original_text: Original text content
-        braille_text: Braille translation
-        title: PDF title
+        line: Line of Braille text
+        cells_per_line: Maximum number of cells per line
         
     Returns:
-        BytesIO object containing the PDF
+        List of wrapped lines
     """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
+    lines = []
+    
+    while len(line) > cells_per_line:
+        # Break after the last blank cell that fits
+        break_at = max(line.rfind('\u2800', 0, cells_per_line + 1), line.rfind(' ', 0, cells_per_line + 1))
+        if break_at <= 0:
+            break_at = cells_per_line
+        
+        lines.append(line[:break_at])
+        line = line[break_at:].lstrip('\u2800 ')
+    
+    lines.append(line)
+    return lines
+
+
+def wrap_text_line(line, font, size, width):
+    """Wrap a line of text to a width, skipping the word-by-word split for lines that fit."""
+    if pdfmetrics.stringWidth(line, font, size) <= width:
+        return [line]
+    return simpleSplit(line, font, size, width)
+
+
+def clip_text_line(line, font, size, width, ellipsis="..."):
+    """Cut a line of text to fit a width, ending it with an ellipsis if anything was removed."""
+    if pdfmetrics.stringWidth(line, font, size) <= width:
+        return line
+    
+    width -= pdfmetrics.stringWidth(ellipsis, font, size)
+    while line and pdfmetrics.stringWidth(line, font, size) > width:
+        line = line[:-1]
+    return line.rstrip() + ellipsis
+
+
+def _sequential_flow(original_text, braille_text, title, resources, tactile=False):
+    """
+    Lay out the sequential document as a stream of lines and spaces.
+    
+    With tactile, the Braille lines get the tactile cell and line pitch.
+    
+    Yields:
+        ('space', height) or ('line', x, font, size, leading, text) tuples,
+        where an x of None centers the line
+    """
+    braille_font = resources['braille_font']
+    
+    # Title
+    for line in simpleSplit(title, 'Helvetica-Bold', 18, FRAME_WIDTH):
+        yield ('line', None, 'Helvetica-Bold', 18, 22, line)
+    yield ('space', 18)
+    
+    # Original text section
+    yield ('space', 12)
+    yield ('line', PAGE_MARGIN, 'Helvetica-Bold', 14, 18, "Original Text")
+    yield ('space', 12)
+    
+    for line in original_text.split('\n'):
+        if line.strip():
+            for part in wrap_text_line(line, 'Helvetica', 10, FRAME_WIDTH):
+                yield ('line', PAGE_MARGIN, 'Helvetica', 10, 12, part)
+        else:
+            yield ('space', 12)
+    
+    yield ('space', 24)
+    
+    # Braille section; every cell has the same width so wrapping is a fixed cell count
+    yield ('space', 12)
+    yield ('line', PAGE_MARGIN, 'Helvetica-Bold', 14, 18, "Braille Translation")
+    yield ('space', 12)
+    
+    cell_width, size, leading = braille_line_metrics(braille_font, 14, 18, tactile)
+    cells_per_line = max(1, int(FRAME_WIDTH // cell_width))
+    for line in braille_text.split('\n'):
+        if line.strip():
+            for part in wrap_braille_line(line, cells_per_line):
+                yield ('line', PAGE_MARGIN, braille_font, size, leading, part)
+            yield ('space', 12)
+        else:
+            yield ('space', 12)
+
+
+def paginate_flow(flow, top=PAGE_HEIGHT - PAGE_MARGIN, bottom=PAGE_MARGIN):
+    """
+    Assign the lines of a flow to pages.
+    
+    Args:
+        flow: Iterable of ('space', height) and ('line', x, font, size, leading, text) tuples
+        top: Y coordinate of the top of the text area
+        bottom: Y coordinate of the bottom of the text area
         
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='Helvetica',  # Use standard font to avoid issues
-            fontSize=14,
-            leading=18,
-            spaceAfter=12
+    Yields:
+        Lists of (x, y, font, size, leading, text) baseline positions, one list per page
+    """
+    page = []
+    y = top
+    
+    for item in flow:
+        if item[0] == 'space':
+            # Spaces at the top of a page are dropped
+            if page:
+                y -= item[1]
+            continue
+        
+        _, x, font, size, leading, text = item
+        if page and y - leading < bottom:
+            yield page
+            page = []
+            y = top
+        
+        if x is None:
+            x = (PAGE_WIDTH - pdfmetrics.stringWidth(text, font, size)) / 2
+        
+        page.append((x, y - size, font, size, leading, text))
+        y -= leading
+    
+    if page:
+        yield page
+
+
+def draw_page(pdf_canvas, page, graphics=None, tactile=None):
+    """
+    Draw one paginated page and finish it.
+    
+    Args:
+        pdf_canvas: Canvas to draw on
+        page: List of (x, y, font, size, leading, text) lines
+        graphics: Optional list of ('fill', x, y, width, height, color) and
+            ('stroke', x1, y1, x2, y2, line_width, color) operations drawn
+            underneath the text
+        tactile: Optional TactileBraille that draws the Braille lines as dots
+    """
+    if graphics:
+        _draw_graphics(pdf_canvas, graphics)
+    
+    text_object = pdf_canvas.beginText()
+    current_font = None
+    cursor = None
+    dot_lines = []
+    
+    for x, y, font, size, leading, text in page:
+        if tactile is not None and tactile.is_braille_line(font, text):
+            dot_lines.append((x, y, text))
+            continue
+        
+        if (font, size, leading) != current_font:
+            text_object.setFont(font, size, leading)
+            current_font = (font, size, leading)
+        
+        # Consecutive lines need no positioning at all; other lines use a short relative move
+        if cursor is None:
+            text_object.setTextOrigin(x, y)
+        elif abs(cursor[0] - x) > 0.01 or abs(cursor[1] - y) > 0.01:
+            text_object.moveCursor(x - cursor[0], cursor[1] - y)
+        
+        # textLine doesn't measure the string, unlike textOut
+        text_object.textLine(text)
+        cursor = (x, y - leading)
+    
+    pdf_canvas.drawText(text_object)
+    
+    for x, y, text in dot_lines:
+        tactile.draw_line(x, y, text)
+    
+    pdf_canvas.showPage()
+
+
+class TactileBraille:
+    """
+    Draws Braille cells as filled vector dots instead of font glyphs.
+    
+    Dots, cells and lines have the fixed physical dimensions of the
+    TACTILE_* settings; the layouts reserve TACTILE_CELL_PITCH per cell and
+    TACTILE_LINE_PITCH per line for them. Each dot pattern is drawn once
+    into a form XObject, so a page only references at most 64 cached forms
+    no matter how many cells it holds.
+    """
+    
+    def __init__(self, pdf_canvas, braille_font):
+        self.canvas = pdf_canvas
+        self.braille_font = braille_font
+        # Character -> form name, or None for cells without dots
+        self._forms = {}
+    
+    def is_braille_line(self, font, text):
+        """Check whether a laid-out line contains Braille that should be drawn as dots."""
+        # The Braille font may be a fallback shared with plain text, so check the text too
+        return font == self.braille_font and any(is_braille_char(char) for char in text)
+    
+    def _form_name(self, char):
+        """Get the form drawing one cell, defining it on first use."""
+        if char in self._forms:
+            return self._forms[char]
+        
+        pattern = (ord(char) - 0x2800) & 0x3f
+        name = None
+        
+        # Forms are shared by every cell with the same dots, e.g. with and without dots 7-8
+        if pattern:
+            name = f"B{pattern}"
+            if name not in self._forms.values():
+                self.canvas.beginForm(name, 0, 0, TACTILE_CELL_PITCH, TACTILE_CELL_HEIGHT)
+                path = self.canvas.beginPath()
+                for dot, (x, y) in enumerate(BRAILLE_DOT_POSITIONS):
+                    if pattern & (1 << dot):
+                        path.circle(x, y, TACTILE_DOT_DIAMETER / 2)
+                self.canvas.drawPath(path, stroke=0, fill=1)
+                self.canvas.endForm()
+        
+        self._forms[char] = name
+        return name
+    
+    def draw_line(self, x, y, text):
+        """
+        Draw a line of Braille cells starting at (x, y) on the baseline.
+        
+        Every character takes one cell. Blank cells and spaces only advance
+        the position, other characters outside the Braille block are printed
+        centered in their cell, and dots 7 and 8 are not drawn.
+        """
+        self.canvas.saveState()
+        self.canvas.translate(x, y)
+        
+        # Moves are accumulated so blank cells don't emit any operators
+        advance = 0
+        for char in text:
+            if is_braille_char(char):
+                name = self._form_name(char)
+                if name is not None:
+                    if advance:
+                        self.canvas.translate(advance, 0)
+                        advance = 0
+                    self.canvas.doForm(name)
+            elif not char.isspace():
+                self.canvas.setFont('Helvetica', TACTILE_PRINT_SIZE)
+                self.canvas.drawCentredString(advance + TACTILE_CELL_PITCH / 2, 0, char)
+            advance += TACTILE_CELL_PITCH
+        
+        self.canvas.restoreState()
+
+
+def _draw_graphics(pdf_canvas, graphics):
+    """
+    Draw fills, forms and strokes, batching fills and strokes that share a
+    style into one path.
+    """
+    fills = {}
+    forms = []
+    strokes = {}
+    
+    for op in graphics:
+        if op[0] == 'fill':
+            _, x, y, width, height, color = op
+            fills.setdefault(color, []).append((x, y, width, height))
+        elif op[0] == 'form':
+            forms.append(op[1:])
+        else:
+            _, x1, y1, x2, y2, line_width, color = op
+            strokes.setdefault((line_width, color), []).append((x1, y1, x2, y2))
+    
+    for color, rects in fills.items():
+        path = pdf_canvas.beginPath()
+        for rect in rects:
+            path.rect(*rect)
+        pdf_canvas.setFillColor(color)
+        pdf_canvas.drawPath(path, stroke=0, fill=1)
+    
+    for name, x, y in forms:
+        # Page furniture is defined once per document and reused on every page
+        if not pdf_canvas.hasForm(name):
+            _define_furniture_form(pdf_canvas, name)
+        pdf_canvas.saveState()
+        pdf_canvas.translate(x, y)
+        pdf_canvas.doForm(name)
+        pdf_canvas.restoreState()
+    
+    for (line_width, color), segments in strokes.items():
+        path = pdf_canvas.beginPath()
+        for x1, y1, x2, y2 in segments:
+            path.moveTo(x1, y1)
+            path.lineTo(x2, y2)
+        pdf_canvas.setLineWidth(line_width)
+        pdf_canvas.setStrokeColor(color)
+        pdf_canvas.drawPath(path, stroke=1, fill=0)
+    
+    pdf_canvas.setFillColor(colors.black)
+
+
+# Side-by-side table geometry, matching the Platypus comparison layout
+COMPARISON_COLUMN_WIDTH = (FRAME_WIDTH - 24) / 2
+COMPARISON_TABLE_X = PAGE_MARGIN + 12
+CELL_PADDING_X = 6
+CELL_PADDING_Y = 3
+COMPARISON_LEADING = 12
+COMPARISON_HEADER_HEIGHT = 12 * 1.2 + CELL_PADDING_Y + 8
+COMPARISON_HEADER_FORM = "ComparisonHeader"
+
+
+def _draw_comparison_header(pdf_canvas, x, y):
+    """Draw the comparison table header row with its bottom-left corner at (x, y)."""
+    pdf_canvas.setFillColor(colors.lightgrey)
+    pdf_canvas.rect(x, y, 2 * COMPARISON_COLUMN_WIDTH, COMPARISON_HEADER_HEIGHT, stroke=0, fill=1)
+    pdf_canvas.setFillColor(colors.black)
+    
+    baseline = y + COMPARISON_HEADER_HEIGHT - CELL_PADDING_Y - 12
+    pdf_canvas.setFont('Helvetica-Bold', 12)
+    for column, label in enumerate(("Original Text", "Braille Translation")):
+        pdf_canvas.drawCentredString(x + (column + 0.5) * COMPARISON_COLUMN_WIDTH, baseline, label)
+
+
+def _define_furniture_form(pdf_canvas, name):
+    """Define a page furniture form XObject on the canvas."""
+    if name != COMPARISON_HEADER_FORM:
+        raise ValueError(f"Unknown page furniture form: {name}")
+    
+    pdf_canvas.beginForm(name, 0, 0, 2 * COMPARISON_COLUMN_WIDTH, COMPARISON_HEADER_HEIGHT)
+    _draw_comparison_header(pdf_canvas, 0, 0)
+    pdf_canvas.endForm()
+
+
+class _ComparisonLayout:
+    """
+    Page-by-page layout of the side-by-side comparison table.
+    
+    Every row height is known from the number of wrapped lines, so rows are
+    placed in a single pass and page breaks simply close the table on one
+    page and repeat its header on the next. With header_form, every header
+    row references one shared form XObject instead of repeating its drawing
+    operators. With tactile, the Braille column gets the tactile cell and
+    line pitch, so its lines are spaced differently from the print column.
+    """
+    
+    def __init__(self, resources, top=PAGE_HEIGHT - PAGE_MARGIN, bottom=PAGE_MARGIN, header_form=False,
+                 tactile=False):
+        self.braille_font = resources['braille_font']
+        self.header_form = header_form
+        self.top = top
+        self.bottom = bottom
+        self.text_width = COMPARISON_COLUMN_WIDTH - 2 * CELL_PADDING_X
+        cell_width, self.braille_size, self.braille_leading = braille_line_metrics(
+            self.braille_font, 10, COMPARISON_LEADING, tactile
+        )
+        self.cells_per_line = max(1, int(self.text_width // cell_width))
+        # Most lines of each column in a row that still fits on a page under the header
+        row_space = top - bottom - COMPARISON_HEADER_HEIGHT - 2 * CELL_PADDING_Y
+        self.max_row_lines = max(1, int(row_space // COMPARISON_LEADING))
+        self.max_braille_row_lines = max(1, int(row_space // self.braille_leading))
+        self.finished = []
+        self._start_page()
+    
+    def _start_page(self):
+        self.graphics = []
+        self.lines = []
+        self.y = self.top
+        self.row_edges = None
+    
+    def finish_page(self):
+        """Close the current page; finished pages are collected in self.finished."""
+        self._close_table()
+        if self.lines or self.graphics:
+            self.finished.append((self.lines, self.graphics))
+        self._start_page()
+    
+    def space(self, height):
+        # Spaces at the top of a page are dropped
+        if self.lines:
+            self.y = max(self.bottom, self.y - height)
+    
+    def text(self, x, font, size, leading, text, keep_with=0):
+        """Add a line of text, moving to a new page if it and keep_with points don't fit."""
+        if self.lines and self.y - leading - keep_with < self.bottom:
+            self.finish_page()
+        if x is None:
+            x = (PAGE_WIDTH - pdfmetrics.stringWidth(text, font, size)) / 2
+        self.lines.append((x, self.y - size, font, size, leading, text))
+        self.y -= leading
+    
+    def _open_table(self):
+        """Draw the header row at the current position."""
+        y = self.y
+        if self.header_form:
+            self.graphics.append(('form', COMPARISON_HEADER_FORM, COMPARISON_TABLE_X, y - COMPARISON_HEADER_HEIGHT))
+        else:
+            self.graphics.append((
+                'fill', COMPARISON_TABLE_X, y - COMPARISON_HEADER_HEIGHT,
+                2 * COMPARISON_COLUMN_WIDTH, COMPARISON_HEADER_HEIGHT, colors.lightgrey
+            ))
+            baseline = y - CELL_PADDING_Y - 12
+            for column, label in enumerate(("Original Text", "Braille Translation")):
+                label_width = pdfmetrics.stringWidth(label, 'Helvetica-Bold', 12)
+                x = COMPARISON_TABLE_X + column * COMPARISON_COLUMN_WIDTH + (COMPARISON_COLUMN_WIDTH - label_width) / 2
+                self.lines.append((x, baseline, 'Helvetica-Bold', 12, COMPARISON_LEADING, label))
+        
+        self.row_edges = [y, y - COMPARISON_HEADER_HEIGHT]
+        self.y = y - COMPARISON_HEADER_HEIGHT
+    
+    def _close_table(self):
+        """Draw the grid and box around the rows placed on this page."""
+        if self.row_edges is None:
+            return
+        
+        top, bottom = self.row_edges[0], self.row_edges[-1]
+        left = COMPARISON_TABLE_X
+        middle = left + COMPARISON_COLUMN_WIDTH
+        right = left + 2 * COMPARISON_COLUMN_WIDTH
+        
+        for edge in self.row_edges[1:-1]:
+            self.graphics.append(('stroke', left, edge, right, edge, 0.5, colors.grey))
+        self.graphics.append(('stroke', middle, top, middle, bottom, 0.5, colors.grey))
+        for x1, y1, x2, y2 in ((left, top, right, top), (right, top, right, bottom),
+                               (right, bottom, left, bottom), (left, bottom, left, top)):
+            self.graphics.append(('stroke', x1, y1, x2, y2, 1, colors.black))
+        
+        self.row_edges = None
+    
+    def row(self, original_line, braille_line, shaded, clip=False):
+        """
+        Add one table row, splitting it across pages if it is taller than a page.
+        
+        With clip, each cell is cut to a single line instead of wrapped.
+        """
+        if clip:
+            left = [clip_text_line(original_line, 'Helvetica', 10, self.text_width)] if original_line else []
+            right = [braille_line[:self.cells_per_line]] if braille_line else []
+        else:
+            left = wrap_text_line(original_line, 'Helvetica', 10, self.text_width) if original_line else []
+            right = wrap_braille_line(braille_line, self.cells_per_line) if braille_line else []
+        chunk_count = max(
+            math.ceil(len(left) / self.max_row_lines), math.ceil(len(right) / self.max_braille_row_lines), 1
         )
         
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Add original text section
-        content.append(Paragraph("Original Text", heading_style))
-        content.append(Spacer(1, 6))
-        
-        # Split original text by lines and add each as a paragraph
-        for line in original_text.split('\n'):
-            if line.strip():
-                content.append(Paragraph(line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'), normal_style))
-            else:
-                content.append(Spacer(1, 12))
-        
-        content.append(Spacer(1, 24))
-        
-        # Add Braille section
-        content.append(Paragraph("Braille Translation", heading_style))
-        content.append(Spacer(1, 6))
+        for chunk in range(chunk_count):
+            chunk_left = left[chunk * self.max_row_lines:(chunk + 1) * self.max_row_lines]
+            chunk_right = right[chunk * self.max_braille_row_lines:(chunk + 1) * self.max_braille_row_lines]
+            height = max(
+                len(chunk_left) * COMPARISON_LEADING, len(chunk_right) * self.braille_leading, COMPARISON_LEADING
+            ) + 2 * CELL_PADDING_Y
+            
+            if self.row_edges is not None and self.y - height < self.bottom:
+                self.finish_page()
+            if self.row_edges is None:
+                if self.lines and self.y - COMPARISON_HEADER_HEIGHT - height < self.bottom:
+                    self.finish_page()
+                self._open_table()
+            
+            if shaded:
+                self.graphics.append((
+                    'fill', COMPARISON_TABLE_X, self.y - height,
+                    2 * COMPARISON_COLUMN_WIDTH, height, colors.whitesmoke
+                ))
+            
+            columns = (
+                (chunk_left, 'Helvetica', 10, COMPARISON_LEADING),
+                (chunk_right, self.braille_font, self.braille_size, self.braille_leading)
+            )
+            for column, (cell_lines, font, size, leading) in enumerate(columns):
+                x = COMPARISON_TABLE_X + column * COMPARISON_COLUMN_WIDTH + CELL_PADDING_X
+                baseline = self.y - CELL_PADDING_Y - size
+                for i, text in enumerate(cell_lines):
+                    self.lines.append((x, baseline - i * leading, font, size, leading, text))
+            
+            self.y -= height
+            self.row_edges.append(self.y)
+    
+    def end_table(self):
+        self._close_table()
+
+
+def _comparison_pages(original_text, braille_text, title, resources, optimize=False, tactile=False):
+    """
+    Lay out the side-by-side comparison document.
+    
+    Yields:
+        (lines, graphics) tuples, one per page, as accepted by draw_page
+    """
+    layout = _ComparisonLayout(resources, header_form=optimize, tactile=tactile)
+    
+    for line in simpleSplit(title, 'Helvetica-Bold', 18, FRAME_WIDTH):
+        layout.text(None, 'Helvetica-Bold', 18, 22, line)
+    layout.space(18)
+    
+    # One table per paragraph, pairing lines by position
+    orig_paragraphs = original_text.split('\n\n')
+    braille_paragraphs = braille_text.split('\n\n')
+    max_paragraphs = max(len(orig_paragraphs), len(braille_paragraphs))
+    orig_paragraphs += [''] * (max_paragraphs - len(orig_paragraphs))
+    braille_paragraphs += [''] * (max_paragraphs - len(braille_paragraphs))
+    
+    for i in range(max_paragraphs):
+        if i > 0:
+            layout.space(20)
+        
+        # Keep the heading with the table header and first row
+        layout.space(12)
+        layout.text(
+            PAGE_MARGIN, 'Helvetica-Bold', 14, 18, f"Section {i+1}",
+            keep_with=(
+                14 + COMPARISON_HEADER_HEIGHT + max(COMPARISON_LEADING, layout.braille_leading)
+                + 2 * CELL_PADDING_Y
+            )
+        )
+        layout.space(14)
         
-        # Split Braille text by lines and add each as a paragraph
-        for line in braille_text.split('\n'):
-            if line.strip():
-                content.append(Paragraph(line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'), braille_style))
-            else:
-                content.append(Spacer(1, 12))
+        orig_lines = orig_paragraphs[i].split('\n')
+        braille_lines = braille_paragraphs[i].split('\n')
+        max_lines = max(len(orig_lines), len(braille_lines))
+        orig_lines += [''] * (max_lines - len(orig_lines))
+        braille_lines += [''] * (max_lines - len(braille_lines))
         
-        # Build the PDF
-        doc.build(content)
+        for j in range(max_lines):
+            layout.row(orig_lines[j], braille_lines[j], shaded=j % 2 == 1)
+            
+            # Hand over pages as soon as they are complete
+            while layout.finished:
+                yield layout.finished.pop(0)
         
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf: {str(e)}")
-        raise
+        layout.end_table()
+    
+    layout.finish_page()
+    while layout.finished:
+        yield layout.finished.pop(0)
 
 
-def create_braille_pdf1(original_text, braille_text, title="Menu in Braille"):
+def _sequential_pages(original_text, braille_text, title, resources, optimize=False, tactile=False):
     """
-    Create a PDF file with original text and its Braille translation.
+    Lay out the sequential document.
     
-    Args:
-        original_text: Original text content
-        braille_text: Braille translation
-        title: PDF title
-        
-    Returns:
-        BytesIO object containing the PDF
+    Yields:
+        (lines, graphics) tuples, one per page, as accepted by draw_page
     """
-    # Create a BytesIO object to store the PDF
-    buffer = io.BytesIO()
+    for page in paginate_flow(_sequential_flow(original_text, braille_text, title, resources, tactile)):
+        yield page, None
+
+
+SINGLE_LINE_ROWS_PER_TABLE = 10
+
+
+def _single_line_pages(original_text, braille_text, title, resources, optimize=False, tactile=False):
+    """
+    Lay out the single-line comparison document: tables of up to ten line
+    pairs, one printed line per cell.
     
-    # Create the PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
+    Yields:
+        (lines, graphics) tuples, one per page, as accepted by draw_page
+    """
+    layout = _ComparisonLayout(resources, header_form=optimize, tactile=tactile)
     
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Create a custom style for Braille text
-    braille_style = ParagraphStyle(
-        'Braille',
-        parent=normal_style,
-        fontName='BrailleFont' if font_registered else 'Helvetica',
-        fontSize=14,
-        leading=18,
-        spaceAfter=12
-    )
+    for line in simpleSplit(title, 'Helvetica-Bold', 18, FRAME_WIDTH):
+        layout.text(None, 'Helvetica-Bold', 18, 22, line)
+    layout.space(18)
     
-    # Create the content
+    orig_lines = original_text.split('\n')
+    braille_lines = braille_text.split('\n')
+    max_lines = max(len(orig_lines), len(braille_lines))
+    orig_lines += [''] * (max_lines - len(orig_lines))
+    braille_lines += [''] * (max_lines - len(braille_lines))
+    
+    for j in range(max_lines):
+        layout.row(orig_lines[j], braille_lines[j], shaded=False, clip=True)
+        
+        if (j + 1) % SINGLE_LINE_ROWS_PER_TABLE == 0:
+            layout.end_table()
+            layout.space(12)
+        
+        while layout.finished:
+            yield layout.finished.pop(0)
+    
+    layout.finish_page()
+    while layout.finished:
+        yield layout.finished.pop(0)
+
+
+def _pdf_output(output):
+    """Get the target to render into: the caller's path or file, or a new buffer."""
+    return output if output is not None else io.BytesIO()
+
+
+def _pdf_result(buffer, output):
+    """Return the rendered PDF, rewinding the buffer if one was created."""
+    if output is not None:
+        return output
+    buffer.seek(0)
+    return buffer
+
+
+def _escape(text):
+    """Escape text for use in a Paragraph."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _sequential_story(original_text, braille_text, title, resources, doc):
+    """Build the Platypus flowables for the sequential layout."""
     content = []
     
     # Add title
-    content.append(Paragraph(title, title_style))
+    content.append(Paragraph(_escape(title), resources['title_style']))
     content.append(Spacer(1, 12))
     
     # Add original text section
-    content.append(Paragraph("Original Text", heading_style))
+    content.append(Paragraph("Original Text", resources['heading_style']))
     content.append(Spacer(1, 6))
     
     # Split original text by lines and add each as a paragraph
     for line in original_text.split('\n'):
         if line.strip():
-            content.append(Paragraph(line, normal_style))
+            content.append(Paragraph(_escape(line), resources['normal_style']))
         else:
             content.append(Spacer(1, 12))
     
     content.append(Spacer(1, 24))
     
     # Add Braille section
-    content.append(Paragraph("Braille Translation", heading_style))
+    content.append(Paragraph("Braille Translation", resources['heading_style']))
     content.append(Spacer(1, 6))
     
     # Split Braille text by lines and add each as a paragraph
     for line in braille_text.split('\n'):
         if line.strip():
-            content.append(Paragraph(line, braille_style))
+            content.append(Paragraph(_escape(line), resources['braille_style']))
         else:
             content.append(Spacer(1, 12))
     
-    # Build the PDF
-    doc.build(content)
-    
-    # Reset buffer position to the beginning
-    buffer.seek(0)
-    return buffer
+    return content
 
 
-def create_braille_pdf_with_comparison(original_text, braille_text, title="Menu in Braille"):
-    """
-    Create a PDF file with side-by-side comparison of original text and Braille.
+def _comparison_story(original_text, braille_text, title, resources, doc):
+    """Build the Platypus flowables for the side-by-side layout."""
+    content = []
     
-    Args:
-        original_text: Original text content
-        braille_text: Braille translation
-        title: PDF title
+    # Add title
+    content.append(Paragraph(_escape(title), resources['title_style']))
+    content.append(Spacer(1, 12))
+    
+    # Split text into paragraphs
+    orig_paragraphs = original_text.split('\n\n')
+    braille_paragraphs = braille_text.split('\n\n')
+    
+    # Ensure both lists have the same length
+    max_paragraphs = max(len(orig_paragraphs), len(braille_paragraphs))
+    orig_paragraphs = orig_paragraphs + [''] * (max_paragraphs - len(orig_paragraphs))
+    braille_paragraphs = braille_paragraphs + [''] * (max_paragraphs - len(braille_paragraphs))
+    
+    # Fixed width columns; row heights follow the wrapped cell contents
+    col_width = (doc.width - 24) / 2
+    
+    # Process each paragraph separately
+    for i in range(max_paragraphs):
+        # Create section header for each paragraph
+        if i > 0:
+            content.append(Spacer(1, 20))
         
-    Returns:
-        BytesIO object containing the PDF
-    """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
+        content.append(Paragraph(f"Section {i+1}", resources['heading_style']))
+        content.append(Spacer(1, 8))
         
-        # Register a Unicode font that supports Braille
-        try:
-            pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-            braille_font = 'DejaVu'
-        except:
-            # Fallback to default font if DejaVu is not available
-            braille_font = 'Helvetica'
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
+        # Create a table for this paragraph
+        data = [["Original Text", "Braille Translation"]]
         
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = ParagraphStyle(
-            'Normal',
-            fontName='Helvetica',
-            fontSize=10,
-            leading=12,
-            wordWrap='CJK'
-        )
-        braille_style = ParagraphStyle(
-            'Braille',
-            fontName=braille_font,
-            fontSize=10,
-            leading=12,
-            wordWrap='CJK'
-        )
+        # Split paragraph into lines
+        orig_lines = orig_paragraphs[i].split('\n')
+        braille_lines = braille_paragraphs[i].split('\n')
         
-        # Create the content
-        content = []
+        # Ensure both line lists have the same length
+        max_lines = max(len(orig_lines), len(braille_lines))
+        orig_lines = orig_lines + [''] * (max_lines - len(orig_lines))
+        braille_lines = braille_lines + [''] * (max_lines - len(braille_lines))
         
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
+        for j in range(max_lines):
+            data.append([
+                Paragraph(_escape(orig_lines[j]), resources['comparison_normal_style']),
+                Paragraph(_escape(braille_lines[j]), resources['comparison_braille_style'])
+            ])
         
-        # Split text into paragraphs
-        orig_paragraphs = original_text.split('\n\n')
-        braille_paragraphs = braille_text.split('\n\n')
+        table = Table(data, colWidths=[col_width, col_width], repeatRows=1)
         
-        # Ensure both lists have the same length
-        max_paragraphs = max(len(orig_paragraphs), len(braille_paragraphs))
-        orig_paragraphs = orig_paragraphs + [''] * (max_paragraphs - len(orig_paragraphs))
-        braille_paragraphs = braille_paragraphs + [''] * (max_paragraphs - len(braille_paragraphs))
+        # Style the table
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
+            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (1, 0), 8),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke])
+        ]))
         
-        # Process each paragraph separately
-        for i in range(max_paragraphs):
-            # Create section header for each paragraph
-            if i > 0:
-                content.append(Spacer(1, 20))
-            
-            content.append(Paragraph(f"Section {i+1}", heading_style))
-            content.append(Spacer(1, 8))
-            
-            # Create a table for this paragraph
-            data = [["Original Text", "Braille Translation"]]
-            
-            # Split paragraph into lines
-            orig_lines = orig_paragraphs[i].split('\n')
-            braille_lines = braille_paragraphs[i].split('\n')
-            
-            # Ensure both line lists have the same length
-            max_lines = max(len(orig_lines), len(braille_lines))
-            orig_lines = orig_lines + [''] * (max_lines - len(orig_lines))
-            braille_lines = braille_lines + [''] * (max_lines - len(braille_lines))
-            
-            # Process each line
-            for j in range(max_lines):
-                # Escape special characters
-                orig = orig_lines[j].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                braille = braille_lines[j].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                
-                # Create paragraphs with proper wrapping
-                orig_para = Paragraph(orig, normal_style)
-                braille_para = Paragraph(braille, braille_style)
-                
-                data.append([orig_para, braille_para])
-            
-            # Create a table with fixed width columns and automatic row heights
-            available_width = doc.width - 24  # Account for margins
-            col_width = available_width / 2
-            
-            table = Table(data, colWidths=[col_width, col_width], repeatRows=1)
-            
-            # Style the table
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
-                ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke])
-            ]))
-            
-            content.append(table)
+        content.append(table)
+    
+    return content
+
+
+def _single_line_story(original_text, braille_text, title, resources, doc):
+    """Build the Platypus flowables for the single-line comparison layout."""
+    braille_font = resources['braille_font']
+    content = []
+    
+    # Add title
+    content.append(Paragraph(_escape(title), resources['title_style']))
+    content.append(Spacer(1, 12))
+    
+    # Process text line by line
+    orig_lines = original_text.split('\n')
+    braille_lines = braille_text.split('\n')
+    
+    # Make sure both lists have the same length
+    max_len = max(len(orig_lines), len(braille_lines))
+    orig_lines = orig_lines + [''] * (max_len - len(orig_lines))
+    braille_lines = braille_lines + [''] * (max_len - len(braille_lines))
+    
+    col_width = doc.width / 2 - 12
+    text_width = col_width - 2 * CELL_PADDING_X
+    cells_per_line = max(1, int(text_width // pdfmetrics.stringWidth('\u283f', braille_font, 10)))
+    
+    # Break content into small tables so no table has to be split across pages
+    for chunk_start in range(0, max_len, SINGLE_LINE_ROWS_PER_TABLE):
+        chunk_end = min(chunk_start + SINGLE_LINE_ROWS_PER_TABLE, max_len)
         
-        # Build the PDF
-        doc.build(content)
+        table_data = [["Original Text", "Braille Translation"]]
+        for i in range(chunk_start, chunk_end):
+            # Cut each cell to one line so rows never overflow their column
+            table_data.append([
+                clip_text_line(orig_lines[i], 'Helvetica', 10, text_width),
+                braille_lines[i][:cells_per_line]
+            ])
+        
+        table = Table(table_data, colWidths=[col_width, col_width])
+        table.setStyle(TableStyle([
+            ('FONT', (0, 0), (1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (1, 0), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('LINEABOVE', (0, 1), (-1, -1), 1, colors.black),
+            ('FONT', (0, 1), (0, -1), 'Helvetica'),
+            ('FONT', (1, 1), (1, -1), braille_font)
+        ]))
         
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf_with_comparison: {str(e)}")
-        # Create a simple PDF with error message
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
+        content.append(table)
+        content.append(Spacer(1, 12))
+    
+    return content
+
+
+# Layouts: original text then Braille, side-by-side tables per paragraph, or
+# side-by-side tables with one printed line per cell
+PDF_LAYOUTS = ("sequential", "comparison", "single_line")
+
+_PLATYPUS_STORIES = {
+    "sequential": _sequential_story,
+    "comparison": _comparison_story,
+    "single_line": _single_line_story
+}
+
+_CANVAS_PAGES = {
+    "sequential": _sequential_pages,
+    "comparison": _comparison_pages,
+    "single_line": _single_line_pages
+}
+
+# Rendered PDF cache size (can be overridden with an environment variable)
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
 
+# Initialize with None - will be created on first use
+pdf_cache = None
+_pdf_cache_lock = threading.Lock()
 
-def create_braille_pdf_with_comparison_single_line(original_text, braille_text, title="Menu in Braille"):
+
+def pdf_cache_key(layout, engine, title, original_text, braille_text, tactile=False, optimize=False):
     """
-    Create a PDF file with side-by-side comparison of original text and Braille.
+    Build the cache key for a rendered PDF.
     
     Args:
+        layout: Layout name
+        engine: Engine name
+        title: PDF title
         original_text: Original text content
         braille_text: Braille translation
-        title: PDF title
+        tactile: Whether Braille is drawn as tactile dots
+        optimize: Whether the size-optimized output mode is used
         
     Returns:
-        BytesIO object containing the PDF
+        Hex digest identifying the rendered document
     """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Register a Unicode font that supports Braille
-        pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text with Unicode support
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='DejaVu',  # Use DejaVu font which supports Unicode Braille
-            fontSize=14,
-            leading=18
-        )
-        
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Process text line by line
-        orig_lines = original_text.split('\n')
-        braille_lines = braille_text.split('\n')
-        
-        # Make sure both lists have the same length
-        max_len = max(len(orig_lines), len(braille_lines))
-        orig_lines = orig_lines + [''] * (max_len - len(orig_lines))
-        braille_lines = braille_lines + [''] * (max_len - len(braille_lines))
+    mode = engine + ("+tactile" if tactile else "") + ("+optimized" if optimize else "")
+    key_source = "\x00".join((layout, mode, title, original_text, braille_text))
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """
+    In-memory LRU cache of rendered PDF bytes.
+    
+    The cache is bounded by the total size of the stored PDFs; the least
+    recently used documents are evicted first.
+    """
+    
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Look up a rendered PDF.
         
-        # Break content into smaller chunks (10 lines per table)
-        chunk_size = 10
-        for chunk_start in range(0, max_len, chunk_size):
-            chunk_end = min(chunk_start + chunk_size, max_len)
+        Args:
+            key: Cache key from pdf_cache_key
             
-            # Create a table for this chunk
-            table_data = [["Original Text", "Braille Translation"]]
-            
-            for i in range(chunk_start, chunk_end):
-                orig = orig_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                braille = braille_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                
-                # Limit the length of each cell to prevent overflow
-                if len(orig) > 100:
-                    orig = orig[:97] + "..."
-                if len(braille) > 100:
-                    braille = braille[:97] + "..."
-                
-                table_data.append([orig, braille])
+        Returns:
+            The PDF bytes, or None on a miss
+        """
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+            return pdf_bytes
+    
+    def set(self, key, pdf_bytes):
+        """
+        Store a rendered PDF and evict old entries if needed.
+        
+        Args:
+            key: Cache key from pdf_cache_key
+            pdf_bytes: Rendered PDF
+        """
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
             
-            # Create the table
-            table = Table(table_data, colWidths=[doc.width/2-12, doc.width/2-12])
-            table.setStyle(TableStyle([
-                ('FONT', (0, 0), (0, 0), 'Helvetica-Bold'),
-                ('FONT', (1, 0), (1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-                ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('GRID', (0, 0), (1, 0), 1, colors.black),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('LINEABOVE', (0, 1), (-1, -1), 1, colors.black),
-                ('FONT', (0, 1), (0, -1), 'Helvetica'),
-                ('FONT', (1, 1), (1, -1), 'DejaVu')
-            ]))
+            self._entries[key] = pdf_bytes
+            self._size += len(pdf_bytes)
             
-            content.append(table)
-            content.append(Spacer(1, 12))
-        
-        # Build the PDF
-        doc.build(content)
-        
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf_with_comparison: {str(e)}")
-        # Create a simple PDF with error message
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self):
+        """Remove all cached PDFs."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def get_pdf_cache():
+    """Get or initialize the shared rendered PDF cache."""
+    global pdf_cache
+    if pdf_cache is None:
+        with _pdf_cache_lock:
+            if pdf_cache is None:
+                pdf_cache = PdfCache()
+    return pdf_cache
+
+
+# Parallel rendering settings (can be overridden with environment variables)
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 40))
+
+# Initialize with None - will be created on first use
+render_pool = None
+_render_pool_lock = threading.Lock()
+
 
+def get_render_pool():
+    """Get or initialize the process pool used for parallel PDF rendering."""
+    global render_pool
+    if render_pool is None:
+        with _render_pool_lock:
+            if render_pool is None:
+                # Spawned workers don't inherit model weights or server threads from the app process
+                render_pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return render_pool
 
-def create_braille_pdf_with_comparison_slow(original_text, braille_text, title="Menu in Braille"):
+
+# Size-optimized output mode (can be overridden with an environment variable)
+PDF_OPTIMIZE = os.environ.get("PDF_OPTIMIZE", "1") != "0"
+
+# ASCII85 setting of documents saved without the optimized mode
+_DEFAULT_USE_A85 = rl_config.useA85
+_stream_encoding_condition = threading.Condition()
+# Saves in progress, which all use the current rl_config.useA85, and saves
+# waiting for each useA85 value
+_stream_encoding_saves = 0
+_stream_encoding_waiting = {}
+
+
+@contextmanager
+def _stream_encoding(binary):
     """
-    Create a PDF file with side-by-side comparison of original text and Braille.
+    Set how compressed streams are written while one document is saved.
+    
+    ReportLab only reads this from the global rl_config, while the document
+    is saved. Binary streams avoid ASCII85, which makes every stream about
+    25% larger and only matters for 7-bit transports. Any number of saves
+    with the same encoding run at once; a save that needs the other encoding
+    waits until they are done, and saves arriving meanwhile queue behind it
+    so neither encoding is starved.
     
     Args:
-        original_text: Original text content
-        braille_text: Braille translation
-        title: PDF title
-        
-    Returns:
-        BytesIO object containing the PDF
+        binary: Whether to write raw binary streams instead of ASCII85 text
     """
+    global _stream_encoding_saves
+    use_a85 = 0 if binary else _DEFAULT_USE_A85
+    
+    with _stream_encoding_condition:
+        _stream_encoding_waiting[use_a85] = _stream_encoding_waiting.get(use_a85, 0) + 1
+        while _stream_encoding_saves and (
+            rl_config.useA85 != use_a85
+            or any(count for value, count in _stream_encoding_waiting.items() if value != use_a85)
+        ):
+            _stream_encoding_condition.wait()
+        _stream_encoding_waiting[use_a85] -= 1
+        rl_config.useA85 = use_a85
+        _stream_encoding_saves += 1
+    
     try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Register a Unicode font that supports Braille
-        pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text with Unicode support
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='DejaVu',  # Use DejaVu font which supports Unicode Braille
-            fontSize=14,
-            leading=18
-        )
-        
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Process text line by line
-        orig_lines = original_text.split('\n')
-        braille_lines = braille_text.split('\n')
-        
-        # Make sure both lists have the same length
-        max_len = max(len(orig_lines), len(braille_lines))
-        orig_lines = orig_lines + [''] * (max_len - len(orig_lines))
-        braille_lines = braille_lines + [''] * (max_len - len(braille_lines))
+        yield
+    finally:
+        with _stream_encoding_condition:
+            _stream_encoding_saves -= 1
+            if not _stream_encoding_saves:
+                rl_config.useA85 = _DEFAULT_USE_A85
+                _stream_encoding_condition.notify_all()
+
+
+class _EncodedCanvas(canvas.Canvas):
+    """Canvas that saves its document with the stream encoding of _stream_encoding."""
+    
+    def __init__(self, *args, binary_streams=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.binary_streams = binary_streams
+    
+    def save(self):
+        with _stream_encoding(self.binary_streams):
+            super().save()
+
+
+def pdf_size_report(pdf):
+    """
+    Report how the bytes of a PDF are spent.
+    
+    Args:
+        pdf: PDF bytes or a file path or binary file object
         
-        # Break content into smaller chunks (10 lines per table)
-        chunk_size = 10
-        for chunk_start in range(0, max_len, chunk_size):
-            chunk_end = min(chunk_start + chunk_size, max_len)
+    Returns:
+        Dictionary with the total size, the size of each page's content
+        stream objects as written to the file, and the size of everything else (fonts, forms, metadata
+        and cross-reference table) shared by the pages
+    """
+    if PdfReader is None:
+        raise ImportError("pypdf is required for PDF size reports")
+    
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, 'rb') as f:
+            data = f.read()
+    elif isinstance(pdf, bytes):
+        data = pdf
+    else:
+        data = pdf.read()
+    reader = PdfReader(io.BytesIO(data))
+    
+    # Each object spans from its offset to the start of the next one
+    offsets = sorted(
+        (offset, idnum) for objects in reader.xref.values() for idnum, offset in objects.items()
+    )
+    ends = [offset for offset, _ in offsets[1:]] + [data.rfind(b'endobj') + len(b'endobj')]
+    object_bytes = {idnum: end - offset for (offset, idnum), end in zip(offsets, ends)}
+    
+    page_bytes = []
+    for page in reader.pages:
+        contents = page.get('/Contents')
+        if contents is None:
+            page_bytes.append(0)
+            continue
+        refs = contents.get_object() if isinstance(contents.get_object(), list) else [contents]
+        page_bytes.append(sum(object_bytes.get(ref.idnum, 0) for ref in refs))
+    
+    total_bytes = len(data)
+    
+    return {
+        'total_bytes': total_bytes,
+        'page_count': len(page_bytes),
+        'page_bytes': page_bytes,
+        'shared_bytes': total_bytes - sum(page_bytes),
+        'average_page_bytes': total_bytes / len(page_bytes) if page_bytes else 0
+    }
+
+
+def _render_pages(output, pages, title, braille_chars='', tactile=False, optimize=False):
+    """
+    Draw laid-out pages into a new PDF.
+    
+    Args:
+        output: File path or writable file object
+        pages: List of (lines, graphics) page tuples
+        title: PDF title
+        braille_chars: Characters to assign Braille font codes to before
+            drawing, in this order
+        tactile: Whether to draw Braille as vector dots
+        optimize: Whether to write compressed binary streams
+    """
+    resources = get_pdf_resources()
+    
+    pdf_canvas = _EncodedCanvas(
+        output, pagesize=letter, pageCompression=1 if optimize else None, binary_streams=optimize
+    )
+    pdf_canvas.setTitle(title)
+    
+    # Every page range assigns the same codes in the same order, so all of
+    # them embed an identical font subset that the merge can share
+    if braille_chars and not tactile and resources['braille_font'] not in pdfmetrics.standardFonts:
+        pdfmetrics.getFont(resources['braille_font']).splitString(braille_chars, pdf_canvas._doc)
+    
+    dots = TactileBraille(pdf_canvas, resources['braille_font']) if tactile else None
+    
+    for lines, graphics in pages:
+        draw_page(pdf_canvas, lines, graphics, dots)
+    
+    pdf_canvas.save()
+
+
+def _render_page_range(pages, title, braille_chars, tactile, optimize):
+    """Render a range of pages in a worker process and return the PDF bytes."""
+    buffer = io.BytesIO()
+    _render_pages(buffer, pages, title, braille_chars, tactile, optimize)
+    return buffer.getvalue()
+
+
+class PdfRenderer:
+    """
+    Renders Braille PDFs in one of PDF_LAYOUTS with one of PDF_ENGINES.
+    
+    Fonts and styles come from get_pdf_resources, so every document shares
+    them. The canvas engine renders long documents in parallel page ranges
+    and can draw Braille as tactile dots. PDFs rendered into memory are kept
+    in the shared PdfCache, so the same menu with the same title and layout
+    is only rendered once; PDFs written to a given output are streamed
+    straight to it, since callers that keep files (e.g. the artifact store)
+    do their own caching.
+    """
+    
+    def __init__(self, layout="sequential", engine=None, use_cache=True, workers=None, min_pages=None, tactile=False,
+                 optimize=None, error_pdf=True):
+        """
+        Args:
+            layout: Layout name, one of PDF_LAYOUTS
+            engine: Rendering engine, one of PDF_ENGINES; defaults to DEFAULT_PDF_ENGINE,
+                or to "canvas" in tactile mode
+            use_cache: Whether to look up and store PDFs rendered into memory in
+                the shared cache
+            workers: Worker processes for parallel canvas rendering; defaults to PDF_WORKERS
+            min_pages: Smallest document rendered in parallel; defaults to PARALLEL_MIN_PAGES
+            tactile: Whether to draw Braille as vector dots (e.g. for swell paper)
+                instead of font glyphs; requires the canvas engine
+            optimize: Whether to produce the smallest file: compressed binary
+                streams and, with the canvas engine, repeated table headers
+                drawn from one shared form. Defaults to PDF_OPTIMIZE
+            error_pdf: Whether a failed render produces a PDF showing the error
+                instead of raising; callers that keep the file (e.g. in the
+                artifact store) pass False so failures are never stored
+        """
+        engine = engine or ("canvas" if tactile else DEFAULT_PDF_ENGINE)
+        if layout not in PDF_LAYOUTS:
+            raise ValueError(f"Unknown PDF layout: {layout}")
+        if engine not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF engine: {engine}")
+        if tactile and engine != "canvas":
+            raise ValueError("Tactile Braille requires the canvas engine")
+        
+        self.layout = layout
+        self.engine = engine
+        self.tactile = tactile
+        self.optimize = PDF_OPTIMIZE if optimize is None else optimize
+        self.cache = get_pdf_cache() if use_cache else None
+        self.workers = workers or PDF_WORKERS
+        self.min_pages = PARALLEL_MIN_PAGES if min_pages is None else min_pages
+        self.error_pdf = error_pdf
+    
+    def cache_key(self, original_text, braille_text, title="Menu in Braille"):
+        """Return the key identifying the PDF this renderer produces for the given content."""
+        return pdf_cache_key(self.layout, self.engine, title, original_text, braille_text, self.tactile, self.optimize)
+    
+    def render(self, original_text, braille_text, title="Menu in Braille", output=None):
+        """
+        Render a PDF with original text and its Braille translation.
+        
+        Args:
+            original_text: Original text content
+            braille_text: Braille translation
+            title: PDF title
+            output: Optional file path or writable file object to write the PDF to;
+                the PDF is rendered straight into it, bypassing the cache
             
-            # Create a table for this chunk
-            table_data = [["Original Text", "Braille Translation"]]
+        Returns:
+            BytesIO object containing the PDF, or output if it was given
             
-            for i in range(chunk_start, chunk_end):
-                orig = orig_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                braille = braille_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                
-                # Limit the length of each cell to prevent overflow
-                if len(orig) > 100:
-                    orig = orig[:97] + "..."
-                if len(braille) > 100:
-                    braille = braille[:97] + "..."
-                
-                table_data.append([orig, braille])
+        Raises:
+            Exception: If rendering fails and error_pdf is False
+        """
+        try:
+            if self.cache is None or output is not None:
+                buffer = _pdf_output(output)
+                with stage_timer("pdf"):
+                    self._render(buffer, original_text, braille_text, title)
+                return _pdf_result(buffer, output)
             
-            # Create the table
-            table = Table(table_data, colWidths=[doc.width/2-12, doc.width/2-12])
-            table.setStyle(TableStyle([
-                ('FONT', (0, 0), (0, 0), 'Helvetica-Bold'),
-                ('FONT', (1, 0), (1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-                ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('GRID', (0, 0), (1, 0), 1, colors.black),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('LINEABOVE', (0, 1), (-1, -1), 1, colors.black),
-                ('FONT', (0, 1), (0, -1), 'Helvetica'),
-                ('FONT', (1, 1), (1, -1), 'DejaVu')
-            ]))
+            key = self.cache_key(original_text, braille_text, title)
+            pdf_bytes = self.cache.get(key)
             
-            content.append(table)
-            content.append(Spacer(1, 12))
-        
-        # Build the PDF
-        doc.build(content)
+            if pdf_bytes is None:
+                buffer = io.BytesIO()
+                with stage_timer("pdf"):
+                    self._render(buffer, original_text, braille_text, title)
+                pdf_bytes = buffer.getvalue()
+                self.cache.set(key, pdf_bytes)
+            
+            return io.BytesIO(pdf_bytes)
+        except Exception as e:
+            print(f"Error rendering {self.layout} PDF: {str(e)}")
+            if not self.error_pdf:
+                raise
+            # Create a simple PDF with error message
+            simple_buffer = _pdf_output(output)
+            doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
+            content = [Paragraph(_escape(f"Error creating PDF: {str(e)}"), get_pdf_resources()['normal_style'])]
+            doc.build(content, canvasmaker=_EncodedCanvas)
+            return _pdf_result(simple_buffer, output)
+    
+    def _render(self, output, original_text, braille_text, title):
+        """Render the document into output with the configured engine."""
+        resources = get_pdf_resources()
+        
+        if self.engine == "platypus":
+            doc = SimpleDocTemplate(
+                output,
+                pagesize=letter,
+                rightMargin=PAGE_MARGIN,
+                leftMargin=PAGE_MARGIN,
+                topMargin=PAGE_MARGIN,
+                bottomMargin=PAGE_MARGIN,
+                title=title,
+                pageCompression=1 if self.optimize else None
+            )
+            story = _PLATYPUS_STORIES[self.layout](original_text, braille_text, title, resources, doc)
+            doc.build(story, canvasmaker=partial(_EncodedCanvas, binary_streams=self.optimize))
+            return
+        
+        pages = _CANVAS_PAGES[self.layout](original_text, braille_text, title, resources, self.optimize, self.tactile)
+        
+        if self.workers < 2 or PdfWriter is None:
+            # Pages are laid out lazily and drawn one at a time
+            _render_pages(output, pages, title, tactile=self.tactile, optimize=self.optimize)
+            return
+        
+        pages = list(pages)
+        if len(pages) < self.min_pages:
+            # Starting workers costs more than it saves for short documents
+            _render_pages(output, pages, title, tactile=self.tactile, optimize=self.optimize)
+            return
+        
+        self._render_parallel(output, pages, braille_text, title)
+    
+    def _render_parallel(self, output, pages, braille_text, title):
+        """
+        Draw contiguous page ranges in worker processes and concatenate them.
+        """
+        # Braille font characters in first-use order, shared by every page range
+        braille_chars = ''.join(dict.fromkeys(braille_text.replace('\n', '')))
+        
+        ranges = min(self.workers, len(pages))
+        range_size = math.ceil(len(pages) / ranges)
+        page_ranges = [pages[i:i + range_size] for i in range(0, len(pages), range_size)]
+        
+        # map returns results in submission order, so page order is deterministic
+        parts = get_render_pool().map(
+            _render_page_range, page_ranges, repeat(title), repeat(braille_chars), repeat(self.tactile),
+            repeat(self.optimize)
+        )
         
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf_with_comparison: {str(e)}")
-        # Create a simple PDF with error message
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(PdfReader(io.BytesIO(part)))
+        writer.add_metadata({'/Title': title})
+        # Both removals are on by default; their keyword names differ between pypdf versions
+        writer.compress_identical_objects()
+        writer.write(output)
 
 
-def create_braille_pdf_with_comparison_wrong(original_text, braille_text, title="Menu in Braille"):
+def create_braille_pdf(original_text, braille_text, title="Menu in Braille", engine=None, output=None):
     """
-    Create a PDF file with side-by-side comparison of original text and Braille.
+    Create a PDF file with original text and its Braille translation.
     
     Args:
         original_text: Original text content
         braille_text: Braille translation
         title: PDF title
+        engine: Rendering engine, one of PDF_ENGINES; defaults to DEFAULT_PDF_ENGINE
+        output: Optional file path or writable file object to write the PDF to
         
     Returns:
-        BytesIO object containing the PDF
+        BytesIO object containing the PDF, or output if it was given
     """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Register a Unicode font that supports Braille
-        pdfmetrics.registerFont(TTFont('DejaVu', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'))
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text with Unicode support
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='DejaVu',  # Use DejaVu font which supports Unicode Braille
-            fontSize=14,
-            leading=18
-        )
-        
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Create a simpler table structure
-        table_data = [["Original Text", "Braille Translation"]]
-        
-        # Process text line by line
-        orig_lines = original_text.split('\n')
-        braille_lines = braille_text.split('\n')
-        
-        # Make sure both lists have the same length
-        max_len = max(len(orig_lines), len(braille_lines))
-        orig_lines = orig_lines + [''] * (max_len - len(orig_lines))
-        braille_lines = braille_lines + [''] * (max_len - len(braille_lines))
-        
-        # Add each line pair to the table
-        for i in range(max_len):
-            orig = orig_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            braille = braille_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            
-            # Create paragraphs with appropriate styles
-            orig_para = Paragraph(orig, normal_style)
-            braille_para = Paragraph(braille, braille_style)
-            
-            table_data.append([orig_para, braille_para])
-        
-        # Create the table
-        table = Table(table_data, colWidths=[doc.width/2-12, doc.width/2-12])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONT', (1, 0), (1, 0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (1, 0), 1, colors.black),
-            ('BOX', (0, 0), (-1, -1), 1, colors.black),
-            ('LINEABOVE', (0, 1), (-1, -1), 1, colors.black)
-        ]))
-        
-        content.append(table)
-        
-        # Build the PDF
-        doc.build(content)
-        
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf_with_comparison: {str(e)}")
-        # Create a simple PDF with error message
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
+    return PdfRenderer("sequential", engine).render(original_text, braille_text, title, output)
 
 
-def create_braille_pdf_with_comparison_working(original_text, braille_text, title="Menu in Braille"):
+def create_braille_pdf_with_comparison(original_text, braille_text, title="Menu in Braille", engine=None, output=None):
     """
     Create a PDF file with side-by-side comparison of original text and Braille.
     
@@ -779,181 +1406,30 @@ def create_braille_pdf_with_comparison_working(original_text, braille_text, titl
         original_text: Original text content
         braille_text: Braille translation
         title: PDF title
+        engine: Rendering engine, one of PDF_ENGINES; defaults to DEFAULT_PDF_ENGINE
+        output: Optional file path or writable file object to write the PDF to
         
     Returns:
-        BytesIO object containing the PDF
+        BytesIO object containing the PDF, or output if it was given
     """
-    try:
-        # Create a BytesIO object to store the PDF
-        buffer = io.BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Create a custom style for Braille text - use standard font
-        braille_style = ParagraphStyle(
-            'Braille',
-            parent=normal_style,
-            fontName='Helvetica',
-            fontSize=14,
-            leading=18
-        )
-        
-        # Create the content
-        content = []
-        
-        # Add title
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 12))
-        
-        # Create a simpler table structure
-        data = [["Original Text", "Braille Translation"]]
-        
-        # Process text line by line
-        orig_lines = original_text.split('\n')
-        braille_lines = braille_text.split('\n')
-        
-        # Make sure both lists have the same length
-        max_len = max(len(orig_lines), len(braille_lines))
-        orig_lines = orig_lines + [''] * (max_len - len(orig_lines))
-        braille_lines = braille_lines + [''] * (max_len - len(braille_lines))
-        
-        # Add each line pair to the table
-        for i in range(max_len):
-            orig = orig_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            braille = braille_lines[i].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            data.append([orig, braille])
-        
-        # Create the table
-        table = Table(data, colWidths=[doc.width/2-12, doc.width/2-12])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (1, 0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (1, 0), 1, colors.black),
-            ('BOX', (0, 0), (-1, -1), 1, colors.black),
-            ('LINEABOVE', (0, 1), (-1, -1), 1, colors.black),
-            ('FONT', (0, 1), (0, -1), 'Helvetica'),
-            ('FONT', (1, 1), (1, -1), 'Helvetica')
-        ]))
-        
-        content.append(table)
-        
-        # Build the PDF
-        doc.build(content)
-        
-        # Reset buffer position to the beginning
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error in create_braille_pdf_with_comparison: {str(e)}")
-        # Return the error message in a simple PDF
-        simple_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(simple_buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        content = [Paragraph(f"Error creating PDF: {str(e)}", styles['Normal'])]
-        doc.build(content)
-        simple_buffer.seek(0)
-        return simple_buffer
+    return PdfRenderer("comparison", engine).render(original_text, braille_text, title, output)
 
 
-def create_braille_pdf_with_comparison1(original_text, braille_text, title="Menu in Braille"):
+def write_braille_pdf(output, original_text, braille_text, title="Menu in Braille", comparison=False, engine=None, layout=None):
     """
-    Create a PDF file with side-by-side comparison of original text and Braille.
+    Write a Braille PDF straight to a file path or writable stream.
     
     Args:
+        output: File path or writable file object (e.g. a response stream)
         original_text: Original text content
         braille_text: Braille translation
         title: PDF title
+        comparison: Whether to use the side-by-side layout
+        engine: Rendering engine, one of PDF_ENGINES
+        layout: Layout name, one of PDF_LAYOUTS; overrides comparison
         
     Returns:
-        BytesIO object containing the PDF
+        output
     """
-    # Create a BytesIO object to store the PDF
-    buffer = io.BytesIO()
-    
-    # Create the PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Create a custom style for Braille text
-    braille_style = ParagraphStyle(
-        'Braille',
-        parent=normal_style,
-        fontName='BrailleFont' if font_registered else 'Helvetica',
-        fontSize=14,
-        leading=18
-    )
-    
-    # Create the content
-    content = []
-    
-    # Add title
-    content.append(Paragraph(title, title_style))
-    content.append(Spacer(1, 12))
-    
-    # Split text into lines
-    original_lines = original_text.split('\n')
-    braille_lines = braille_text.split('\n')
-    
-    # Ensure both lists have the same length
-    max_lines = max(len(original_lines), len(braille_lines))
-    original_lines = original_lines + [''] * (max_lines - len(original_lines))
-    braille_lines = braille_lines + [''] * (max_lines - len(braille_lines))
-    
-    # Create a table for side-by-side comparison
-    table_data = [
-        [Paragraph("Original Text", heading_style), Paragraph("Braille Translation", heading_style)]
-    ]
-    
-    # Add each line as a row in the table
-    for i in range(max_lines):
-        original_para = Paragraph(original_lines[i], normal_style) if original_lines[i].strip() else Spacer(1, 12)
-        braille_para = Paragraph(braille_lines[i], braille_style) if braille_lines[i].strip() else Spacer(1, 12)
-        table_data.append([original_para, braille_para])
-    
-    # Create the table
-    table = Table(table_data, colWidths=[doc.width/2.0-12, doc.width/2.0-12])
-    
-    # Style the table
-    table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, 0), 1, colors.black),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey)
-    ]))
-    
-    content.append(table)
-    
-    # Build the PDF
-    doc.build(content)
-    
-    # Reset buffer position to the beginning
-    buffer.seek(0)
-    return buffer
+    layout = layout or ("comparison" if comparison else "sequential")
+    return PdfRenderer(layout, engine).render(original_text, braille_text, title, output)
@@ -0,0 +1,197 @@
+import io
+import os
+import time
+import random
+import pstats
+import asyncio
+import cProfile
+import tempfile
+import threading
+import itertools
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+# Profiling settings (can be overridden with environment variables).
+# PROFILE_SAMPLE_RATE is the fraction of requests profiled without being
+# asked to: 0 turns sampling off, 1 profiles every request.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "braille_menu_profiles"))
+PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", 25))
+# Oldest reports are removed beyond this many, so sampling can stay on
+PROFILE_MAX_REPORTS = int(os.environ.get("PROFILE_MAX_REPORTS", 200))
+
+# Only one request is profiled at a time: cProfile can't run on two threads
+# at once on newer Pythons, and tracemalloc sees every thread's allocations
+_profile_lock = threading.Lock()
+_report_counter = itertools.count()
+
+# Whether the current request is being profiled, see profiling_active
+_profiling = contextvars.ContextVar("profiling", default=False)
+
+
+def profiling_active():
+    """
+    Check whether the current request is being profiled.
+
+    The pipeline runs its stages inline instead of in executors while this
+    is true, so the profile covers all of the request's work.
+    """
+    return _profiling.get()
+
+
+def sample_profile(force=False):
+    """
+    Decide whether to profile a request.
+
+    Args:
+        force: Whether the request asked to be profiled
+
+    Returns:
+        True if the request should be profiled
+    """
+    return force or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def _prune_reports(profile_dir, max_reports):
+    """Remove the oldest reports beyond max_reports."""
+    reports = sorted(
+        (entry for entry in os.scandir(profile_dir) if entry.name.endswith(".txt")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in reports[:max(0, len(reports) - max_reports)]:
+        stem = entry.path[:-len(".txt")]
+        for path in (entry.path, stem + ".prof"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def write_profile_report(name, profiler, snapshot, wall_seconds, peak_bytes, profile_dir=PROFILE_DIR, top_n=PROFILE_TOP_N):
+    """
+    Write the profile artifacts of one request.
+
+    Args:
+        name: Name of the profiled call, e.g. "process_image"
+        profiler: Stopped cProfile.Profile
+        snapshot: tracemalloc snapshot taken at the end of the request
+        wall_seconds: Wall time of the request
+        peak_bytes: Peak traced memory during the request
+        profile_dir: Directory for the artifacts
+        top_n: Number of hotspots and allocation sites to list
+
+    Returns:
+        Path of the text report; the raw profile is next to it with a
+        .prof extension, for snakeviz or pstats
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    stem = os.path.join(profile_dir, f"{stamp}-{name}-{os.getpid()}-{next(_report_counter)}")
+    profiler.dump_stats(stem + ".prof")
+
+    hotspots = io.StringIO()
+    pstats.Stats(profiler, stream=hotspots).sort_stats("cumulative").print_stats(top_n)
+
+    allocators = [
+        f"{stat.size / 1024:10.1f} KB {stat.count:8d} blocks  {stat.traceback}"
+        for stat in snapshot.statistics("lineno")[:top_n]
+    ]
+
+    with open(stem + ".txt", "w", encoding="utf-8") as f:
+        f.write(f"Profile of {name}\n")
+        f.write(f"Wall time: {wall_seconds:.3f} s\n")
+        # tracemalloc sees every thread, so concurrent requests are included
+        f.write(f"Peak traced memory: {peak_bytes / (1024 * 1024):.1f} MB (all threads)\n\n")
+        f.write(f"Top {top_n} functions by cumulative time:\n")
+        f.write(hotspots.getvalue())
+        f.write(f"\nTop {top_n} allocation sites still held at the end:\n")
+        f.write("\n".join(allocators) + "\n")
+
+    _prune_reports(profile_dir, PROFILE_MAX_REPORTS)
+    return stem + ".txt"
+
+
+@contextmanager
+def profiled(name, force=False):
+    """
+    Profile a block with cProfile and tracemalloc if the request is sampled.
+
+    Args:
+        name: Name used in the report file name
+        force: Whether to profile regardless of PROFILE_SAMPLE_RATE
+
+    Yields:
+        Dictionary that receives the report path under 'report' once the
+        block has finished, or None if the block is not profiled
+    """
+    if not sample_profile(force) or not _profile_lock.acquire(blocking=False):
+        yield None
+        return
+
+    info = {'report': None}
+    started_tracing = not tracemalloc.is_tracing()
+    token = _profiling.set(True)
+    profiler = cProfile.Profile()
+    try:
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield info
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            try:
+                info['report'] = write_profile_report(name, profiler, snapshot, wall_seconds, peak_bytes)
+                print(f"Profile of {name} written to {info['report']}")
+            except Exception as e:
+                print(f"Error writing profile report: {str(e)}")
+    finally:
+        _profiling.reset(token)
+        _profile_lock.release()
+
+
+def profile_call(name, function, *args, force=False, **kwargs):
+    """
+    Call a function, profiling it if the call is sampled.
+
+    Args:
+        name: Name used in the report file name
+        function: Function to call
+        args: Positional arguments for function
+        force: Whether to profile regardless of PROFILE_SAMPLE_RATE
+        kwargs: Keyword arguments for function
+
+    Returns:
+        Result of function
+    """
+    with profiled(name, force):
+        return function(*args, **kwargs)
+
+
+def run_profiled_coroutine(name, coroutine_function, *args, force=True):
+    """
+    Run a coroutine on its own event loop in this thread, profiled.
+
+    Meant to be called from a worker thread so the profiled work doesn't
+    block the server's event loop.
+
+    Args:
+        name: Name used in the report file name
+        coroutine_function: Async function to run
+        args: Arguments for coroutine_function
+        force: Whether to profile regardless of PROFILE_SAMPLE_RATE
+
+    Returns:
+        Result of the coroutine
+    """
+    with profiled(name, force):
+        return asyncio.run(coroutine_function(*args))
@@ -0,0 +1,122 @@
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+# Session store settings (can be overridden with environment variables)
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL", 3600))
+SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", 1000))
+
+# Initialize with None - will be created on first use
+session_store = None
+_session_store_lock = threading.Lock()
+
+
+class MenuSession:
+    """
+    The translated menu of one UI session.
+
+    Holds a single copy of the processed text and its Braille translation;
+    downloads derive their own formats from them.
+    """
+
+    __slots__ = ('original_text', 'braille_text', 'metadata', 'last_used')
+
+    def __init__(self, original_text, braille_text, metadata=None):
+        self.original_text = original_text
+        self.braille_text = braille_text
+        self.metadata = metadata or {}
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """
+    Server-side store of translated menus, keyed by a random session ID.
+
+    The UI keeps only the session ID in gr.State, so a menu's texts exist
+    once per user no matter how many downloads are made. Sessions unused
+    for ttl_seconds are removed, and the least recently used sessions are
+    removed once more than max_entries are stored.
+    """
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        """Remove expired sessions; the caller holds the lock."""
+        # Sessions are ordered by last use, so the expired ones come first
+        while self._sessions and self.ttl_seconds:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def put(self, original_text, braille_text, metadata=None, session_id=None):
+        """
+        Store a translated menu.
+
+        Args:
+            original_text: Processed menu text
+            braille_text: Formatted Unicode Braille translation
+            metadata: Optional metadata from text_to_braille
+            session_id: ID of the session to replace, e.g. when the user
+                processes another menu; a new ID is created if None
+
+        Returns:
+            Session ID
+        """
+        session = MenuSession(original_text, braille_text, metadata)
+        with self._lock:
+            self._evict_expired(session.last_used)
+            if session_id is None:
+                session_id = secrets.token_urlsafe(16)
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id):
+        """
+        Look up a session.
+
+        Args:
+            session_id: ID from put
+
+        Returns:
+            MenuSession, or None if the ID is unknown or has expired
+        """
+        if not session_id:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        """Remove a session if it exists."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def get_session_store():
+    """Get or initialize the process-wide session store."""
+    global session_store
+    if session_store is None:
+        with _session_store_lock:
+            if session_store is None:
+                session_store = SessionStore()
+    return session_store